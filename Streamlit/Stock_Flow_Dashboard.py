@@ -7,16 +7,51 @@ import calendar
 import os
 import numpy as np
 
+from cache_utils import CACHE_ENTRIES, current_path, file_version
+from stock_flow_data import (INDEX_PATH, PROJECTION_PATH, STOCK_PATH, calculate_advanced_kpis,
+                             calculate_winding_recommendations, filter_stock_data, forecast_months,
+                             load_stock_projection, process_stock_flow, total_projection)
+
 # 1. Configuración de página en modo WIDE
 st.set_page_config(
     page_title="Dashboard de Gestión de Stock",
     layout="wide"  # <-- Ajusta para usar todo el ancho disponible
 )
-WINDING_RATE = 500  # Kg por día que se pueden ovillar
-MONTH_NAMES_ES = [
-    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
-]
+
+# ------------------------------------------------
+#   CÁLCULOS MEMORIZADOS
+# ------------------------------------------------
+# Clave explícita: versión de los CSV publicados (file_version, incluye sus rutas),
+# stock de seguridad, nivel de agrupación, filtros y mes actual (define los 15 meses
+# proyectados). Al publicarse resultados nuevos cambia la versión y se recalcula; las
+# entradas viejas salen por LRU.
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_stock_projection(version):
+    (stock_path, _, _), (projection_path, _, _), (hierarchy_path, _, _) = version
+    return load_stock_projection(stock_path, projection_path, hierarchy_path)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_stock_flow(version, safety_stock, grouping_column, family, groups, current_month):
+    data = filter_stock_data(cached_stock_projection(version), grouping_column, family, groups)
+    return process_stock_flow(data, safety_stock, grouping_column)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_winding_recommendations(version, safety_stock, grouping_column, family, groups, current_month):
+    return calculate_winding_recommendations(
+        cached_stock_flow(version, safety_stock, grouping_column, family, groups, current_month)
+    )
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_advanced_kpis(version, safety_stock, grouping_column, family, groups, current_month):
+    data = filter_stock_data(cached_stock_projection(version), grouping_column, family, groups)
+    return calculate_advanced_kpis(
+        cached_stock_flow(version, safety_stock, grouping_column, family, groups, current_month), data
+    )
+
 
 def main():
     st.markdown("""
@@ -184,67 +219,19 @@ def main():
             }
         </style>
     """, unsafe_allow_html=True)
-    def load_data():
-        """Carga los datos de stock y proyecciones."""
+    def load_data(version):
+        """Carga los datos de stock y proyecciones (una fila por producto, Mes_1..Mes_12)."""
         try:
-            stock_df = pd.read_csv('./Stock_Optimization/Results/Stock_Cono_Ovillo.csv')
+            combined_df = cached_stock_projection(version)
             st.sidebar.markdown("### Stock Data Loaded")
-            st.sidebar.markdown(f"Total productos: {len(stock_df)}")
-
-            # 2. Cargar proyecciones y procesar fechas
-            projection_df = pd.read_csv('./demand_forecasting_project/data/output/Consolidated_forecast.csv')
-            projection_df['Date'] = pd.to_datetime(projection_df['Date'])
-
-            # Extraer mes y año de la fecha
-            projection_df['Month'] = projection_df['Date'].dt.month
-            projection_df['Year'] = projection_df['Date'].dt.year
-                    # 3. Agrupar proyecciones por producto y mes
-            projection_grouped = projection_df.groupby(
-                ['Codigo Producto', 'Familia', 'Super Familia', 'Month']
-            ).agg({
-                'Projection': 'sum'
-            }).reset_index()
-            # Crear un diccionario con las proyecciones mensuales
-            projection_dict = {}
-            for _, row in projection_grouped.iterrows():
-                key = row['Codigo Producto']
-                if key not in projection_dict:
-                    projection_dict[key] = {
-                        'Familia': row['Familia'],
-                        'SuperFamily': row['Super Familia'],
-                        'monthly_projection': {i: 0 for i in range(1, 13)}  # Inicializar todos los meses
-                    }
-                projection_dict[key]['monthly_projection'][row['Month']] = row['Projection']
-        
-            # 4. Combinar con datos de stock
-            combined_data = []
-            for _, stock_row in stock_df.iterrows():
-                product_code = stock_row['Ovillo_Code']
-                proj_data = projection_dict.get(product_code, {
-                    'Familia': 'Sin Familia',
-                    'SuperFamily': 'Sin Super Familia',
-                    'monthly_projection': {i: 0 for i in range(1, 13)}
-                })
-            
-                combined_row = {
-                    'Product_Code': product_code,
-                    'Stock_Cones': stock_row['Cono_Stock'],
-                    'Stock_Ovillo': stock_row['Ovillo_Stock'],
-                    'Stock_Total': stock_row['Stock_total'],
-                    'Familia': proj_data['Familia'],
-                    'SuperFamily': proj_data['SuperFamily'],
-                    'monthly_projection': proj_data['monthly_projection']
-                }
-                combined_data.append(combined_row)
-        
-            combined_df = pd.DataFrame(combined_data)
+            st.sidebar.markdown(f"Total productos: {len(combined_df)}")
 
-            # 5. Diagnóstico final
+            # Diagnóstico final
             st.sidebar.markdown("### Diagnóstico Final")
             st.sidebar.markdown(f"Productos totales: {len(combined_df)}")
             st.sidebar.markdown(
                 "Productos con proyección: "
-                f"{len(combined_df[combined_df['monthly_projection'].apply(lambda x: sum(x.values()) > 0)])}"
+                f"{int((total_projection(combined_df) > 0).sum())}"
             )
         
             return combined_df
@@ -257,84 +244,7 @@ def main():
 
     def get_forecast_months():
         """Obtiene la lista de meses para los próximos 15 meses desde el mes actual."""
-        current_date = datetime.now()
-        months = []
-    
-        for i in range(15):
-            future_date = current_date + pd.DateOffset(months=i+1)
-            month_name = MONTH_NAMES_ES[future_date.month - 1]
-            month_year = f"{month_name} {future_date.year}"
-            months.append(month_year)
-    
-        return months
-        
-    def calculate_monthly_flow(item, safety_stock=0):
-        """Calcula el flujo mensual de stock considerando proyecciones mensuales."""
-        monthly_flow = {}
-        current_stock = item['Stock_Total'] + safety_stock
-        monthly_projections = item['monthly_projection']
-    
-        current_date = datetime.now()
-        for i in range(15):
-            future_date = current_date + pd.DateOffset(months=i+1)
-            month_key = f"{MONTH_NAMES_ES[future_date.month - 1]} {future_date.year}"
-        
-            monthly_demand = monthly_projections.get(future_date.month, 0)
-        
-            remaining_stock = current_stock - monthly_demand
-            monthly_flow[month_key] = remaining_stock
-            current_stock = remaining_stock
-    
-        return monthly_flow
-    
-    def process_stock_flow(data, safety_stock, grouping_option):
-        """Procesa los datos de stock y flujo."""
-        forecast_months = get_forecast_months()
-    
-        # Definir los trimestres
-        quarters = {}
-        for i, month in enumerate(forecast_months):
-            quarter_num = (i // 3) + 1
-            if quarter_num not in quarters:
-                quarters[quarter_num] = []
-            quarters[quarter_num].append(month)
-
-        data['has_associated_cone'] = data['Stock_Cones'] > 0
-        data['Stock_Total'] = data['Stock_Total'] + safety_stock
-    
-        processed_items = []
-        for _, item in data.iterrows():
-            monthly_flow = calculate_monthly_flow(item, safety_stock)
-            item_dict = item.to_dict()
-            item_dict['monthly_flow'] = monthly_flow
-            processed_items.append(item_dict)
-
-        grouped = pd.DataFrame(processed_items).groupby(grouping_option)
-    
-        processed_results = []
-        for group, items in grouped:
-            monthly_flows = {}
-            for month in forecast_months:
-                monthly_flows[month] = sum(
-                    it['monthly_flow'][month]
-                    for it in processed_items if it[grouping_option] == group
-                    )
-
-            quarterly_data = {}
-            for quarter_num, months in quarters.items():
-                quarterly_data[f'{quarter_num}° Trimestre'] = monthly_flows[months[-1]]
-
-            processed_results.append({
-                'group': group,
-                'stockCones': items['Stock_Cones'].sum(),
-                'stockOvillo': items['Stock_Ovillo'].sum(),
-                'stockInitial': items['Stock_Total'].sum(),
-                'monthly': monthly_flows,
-                'quarterly': quarterly_data,
-                'hasStockout': any(val <= 0 for val in monthly_flows.values())
-            })
-
-        return processed_results
+        return forecast_months()[0]
     
     def create_detailed_table(data):
         detailed_data = []
@@ -350,51 +260,6 @@ def main():
             detailed_data.append(detailed_row)
         return pd.DataFrame(detailed_data)
     
-    def calculate_winding_recommendations(data):
-        """Calcula las recomendaciones de ovillado considerando tendencias."""
-        recommendations = []
-    
-        for row in data:
-            monthly_data = list(row['monthly'].items())
-            current_ovillo_stock = row['stockOvillo']
-            current_cono_stock = row['stockCones']
-            monthly_projection = row.get('Projection', 0) / 12 if 'Projection' in row else 0
-        
-            for idx, (month, projected_stock) in enumerate(monthly_data):
-                months_until_need = idx
-                if projected_stock < monthly_projection and current_cono_stock > 0:
-                    stock_needed = monthly_projection - projected_stock
-                    # Usar aquí la constante WINDING_RATE
-                    days_needed = round(min(stock_needed, current_cono_stock) / WINDING_RATE)
-                    months_needed = round(days_needed / 29, 1)
-                
-                    if months_until_need <= 1:
-                        priority = 'Alta'
-                    elif months_until_need <= 4:
-                        priority = 'Media'
-                    else:
-                        priority = 'Baja'
-                
-                    recommendations.append({
-                        'Mes': month,
-                        'Cantidad Necesaria': round(stock_needed),
-                        'Conos Disponibles': round(current_cono_stock),
-                        'Stock Ovillos': round(current_ovillo_stock),
-                        'Días Necesarios': days_needed,
-                        'Meses Necesarios': months_needed,
-                        'Prioridad': priority,
-                        'Grupo': row['group'],
-                        'Stock Proyectado': round(projected_stock),
-                        'Demanda Mensual': round(monthly_projection)
-                    })
-                    current_cono_stock = max(0, current_cono_stock - stock_needed)
-    
-        # Ordenar por prioridad
-        priority_order = {'Alta': 0, 'Media': 1, 'Baja': 2}
-        recommendations.sort(key=lambda x: (priority_order[x['Prioridad']], x['Mes']))
-    
-        return recommendations
-    
     def create_stock_flow_chart(data, view_type='monthly'):
         if view_type == 'monthly':
             monthly_data = []
@@ -629,64 +494,16 @@ def main():
             if pd.notnull(val) and val != "" else 0
         )
             
-    def calculate_advanced_kpis(processed_data, original_data):
-            """
-            Calcula KPIs más profundos:
-            - Tasa de Agotamiento (porcentaje de meses con stock negativo)
-            - Fill Rate (simplificado)
-            - Días de Inventario (total stock vs. demanda diaria promedio)
-            Nota: El Fill Rate exacto requiere simular demanda satisfecha/insatisfecha.
-            Aquí se hace un approach muy sencillo.
-            """
-            if not processed_data:
-                return {"stockout_rate": 0, "fill_rate": 0, "days_of_inventory": 0}
-        
-            # --- 1) Tasa de Agotamiento ---
-            negative_count = 0
-            total_months = 0
-        
-            # Recorremos cada agrupación (ej. cada familia, super familia, etc.)
-            for row in processed_data:
-                leftover_vals = row['monthly'].values()  # stock resultante mes a mes
-                total_months += len(leftover_vals)
-                negative_count += sum(1 for val in leftover_vals if val < 0)
-        
-            stockout_rate = (negative_count / total_months * 100) if total_months else 0
-
-            # --- 2) Fill Rate (simplificado) ---
-            # Suponemos que cada vez que stock es negativo un mes, se deja de atender esa parte.
-            # Fill Rate = (1 - (Agotamiento)) x 100? 
-            # No es exacto, pero sirve de aproximación rápida:
-            fill_rate = 100 - stockout_rate if stockout_rate < 100 else 0
-        
-            # --- 3) Días de Inventario ---
-            # Tomamos el stock total de todos los grupos (stockInitial sumado) 
-            total_stock = sum(row['stockInitial'] for row in processed_data)
-        
-            # Sumamos la demanda 12 meses (de la DataFrame original) para tener la "demanda anual"
-            # "original_data" = subset de data con 'monthly_projection'
-            if original_data is not None and 'monthly_projection' in original_data.columns:
-                monthly_demand_12 = 0
-                for i in range(1, 13):
-                    # sumamos la demanda del mes i de todos los productos
-                    monthly_demand_12 += original_data['monthly_projection'].apply(lambda x: x.get(i, 0)).sum()
-            else:
-                monthly_demand_12 = 0
-        
-            # Demanda diaria promedio
-            daily_demand = (monthly_demand_12 / (12*30)) if monthly_demand_12 else 0
-        
-            days_of_inventory = total_stock / daily_demand if daily_demand > 0 else 0
-
-            return {
-                    "stockout_rate": stockout_rate,     # Porcentaje
-                    "fill_rate": fill_rate,            # Porcentaje
-                    "days_of_inventory": days_of_inventory
-                }
     # ------------------------------------------------
     #            INDICADORES CLAVE (KPIs)
     # ------------------------------------------------
-    data = load_data()
+    data_version = file_version(
+        current_path('Stock_Cono_Ovillo.csv', STOCK_PATH),
+        current_path('Consolidated_forecast.csv', PROJECTION_PATH),
+        current_path('hierarchy_index.npz', INDEX_PATH)
+    )
+    current_month = datetime.now().strftime('%Y-%m')
+    data = load_data(data_version)
 
     if data is not None:
 
@@ -715,6 +532,7 @@ def main():
             }
 
             # Filtrar por familia si seleccionamos "Codigo Producto"
+            family_filter = None
             if grouping_option == 'Codigo Producto':
                 if "Familia" in data.columns:
                     all_families = sorted(data["Familia"].dropna().unique())
@@ -723,6 +541,7 @@ def main():
                         options=["(Ver todas)"] + list(all_families)
                     )
                     if selected_family != "(Ver todas)":
+                        family_filter = selected_family
                         data = data[data['Familia'] == selected_family]
 
             # Multiselect de grupos
@@ -736,9 +555,9 @@ def main():
             if not grouping_filter:
                 grouping_filter = all_group_values
         
-            data_filtered = data[data[column_mapping[grouping_option]].isin(grouping_filter)]
-
-            processed_data = process_stock_flow(data_filtered, safety_stock, column_mapping[grouping_option])
+            view_key = (data_version, safety_stock, column_mapping[grouping_option],
+                        family_filter, tuple(grouping_filter), current_month)
+            processed_data = cached_stock_flow(*view_key)
 
 
         
@@ -829,7 +648,7 @@ def main():
         with col1:
             priority_filter = st.selectbox("Filtrar por prioridad", ["Todas", "Alta", "Media", "Baja"])
     
-        recommendations = calculate_winding_recommendations(processed_data)
+        recommendations = cached_winding_recommendations(*view_key)
     
         if recommendations:
             if priority_filter != "Todas":
@@ -863,7 +682,7 @@ def main():
             if not processed_data:
                 st.info("No hay datos para calcular KPIs Avanzados.")
             else:
-                adv_kpis = calculate_advanced_kpis(processed_data, data_filtered)
+                adv_kpis = cached_advanced_kpis(*view_key)
 
                 # Mostramos en 3 métricas
                 colA, colB, colC = st.columns(3)
@@ -0,0 +1,35 @@
+"""
+Claves de caché de los dashboards.
+
+Los resultados se memorizan con st.cache_data (LRU acotado por max_entries) usando
+claves explícitas: los parámetros de la vista y la versión de los archivos de datos.
+La versión (mtime y tamaño de cada archivo) cambia cuando un CSV se reescribe, así que
+esas entradas dejan de usarse y salen del caché por LRU.
+
+Los dashboards leen la versión publicada de los resultados (current_path, ver
+demand_forecasting_project/src/pipeline/publish.py): una corrida del modelo en curso no
+cambia lo que se muestra hasta que publica todos sus archivos juntos.
+"""
+import os
+import sys
+
+# Raíz del repositorio en el PATH para importar demand_forecasting_project
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from demand_forecasting_project.src.pipeline.publish import current_path
+
+CACHE_ENTRIES = 32  # Entradas por función memorizada
+
+
+def file_version(*paths):
+    """Versión de los archivos de datos: (ruta, mtime_ns, tamaño) de cada uno (None si no existe)."""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append((path, None, None))
+    return tuple(version)
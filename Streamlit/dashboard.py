@@ -4,78 +4,126 @@ import plotly.express as px
 from io import BytesIO
 import matplotlib.pyplot as plt
 import os
-import subprocess
+import sys
+import time
 import datetime
 
+from cache_utils import CACHE_ENTRIES, current_path, file_version
+
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_DIR = os.path.dirname(CURRENT_DIR)
 FORECAST_DIR = os.path.join(BASE_DIR, "demand_forecasting_project")
 base_dir = FORECAST_DIR
 
+SALES_FILE = './demand_forecasting_project/data/output/merged2.csv'
+CUBE_FILE = './demand_forecasting_project/data/output/merged2_cube.parquet'
+NUMERIC_COLS = ['Venta 2025', 'Venta 2024', 'Venta 2023', 'Venta 2022', 'Projection 2025', 'Projection 2026']
+
+sys.path.append(FORECAST_DIR)
+sys.path.append(BASE_DIR)
+from sales_cube import build_sales_cube, cube_catalog, partition_cube, read_sales_cube, slice_cube
+from demand_forecasting_project.src.data.schema import enforce_schema
+from demand_forecasting_project.src.pipeline.jobs import FAILED, JobRunner, QUEUED, RUNNING, SUCCEEDED, job_progress
+from demand_forecasting_project.src.pipeline.publish import read_current
+
 # ------------------------------------------------
-#   Corrida de Modelo
+#   CARGA Y AGREGACIÓN MEMORIZADAS
 # ------------------------------------------------
-def update_demand_data():
-    """
-    Actualiza los datos de demanda desde SQL Server.
-    """
-    try:
-        # Ejecutar el script de demanda
-        script_path = os.path.join(base_dir, "src/data/Demanda_real.py")
-        print(f"Ejecutando: {script_path}")
-        result = subprocess.run(["python", script_path], capture_output=True, text=True, check=True)
-        print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"Error al ejecutar {e.cmd}: {e.stderr}")
-        return False
-    except Exception as e:
-        print(f"Error inesperado: {str(e)}")
-        return False
-
-def run_model_pipeline(input_type='demand'):
-    try:
-        """
-        Ejecuta el pipeline completo del modelo.
-        """
-        base_scripts = [
-            "src/data/hierarchy_map.py",
-            "src/data/Data_groups.py",
-            "src/models/Proyecciones.py",
-            "src/models/Invierno/Top_Down.py",
-            "src/models/Hilos_Verano/Top_Down_Verano_25.py",
-            "src/models/Bebé/Top_Down_25.py",
-            "Consolidado_resultados.py",
-            "merged_data.py",
-            "src/flow_details.py"
-        ]
-
-        # Elegir el procesador según el tipo de input
-        if input_type == 'demand':
-            print("Usando datos de demanda (data.xlsx)")
-            data_processor = "run_processor2.py"
-        else:
-            print("Usando datos de venta (data_venta.xlsx)")
-            data_processor = "run_processor.py"
+# Las tablas salen del cubo pre-agregado que escribe merged_data.py (sales_cube):
+# cada rerun toma la partición del nivel y la vista y suma sólo las filas filtradas.
+# Clave explícita: versión publicada del cubo y de merged2.csv (file_version, incluye
+# sus rutas) y filtros/vista.
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_cube(version):
+    """Cubo separado por (Nivel, Vista); compartido y de sólo lectura entre reruns."""
+    (cube_file, _, _), (sales_file, _, _) = version
+    if os.path.exists(cube_file):
+        cube = read_sales_cube(cube_file)
+    else:
+        # merged2.csv de una corrida anterior al cubo
+        data = pd.read_csv(sales_file)
+        for col in NUMERIC_COLS:
+            if col in data.columns:
+                data[col] = pd.to_numeric(data[col].replace({',': ''}, regex=True), errors='coerce')
+        cube = build_sales_cube(enforce_schema(data, 'merged2'))
+    return partition_cube(cube)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_data(version):
+    """SuperFamily / Familia / Codigo Producto disponibles para los filtros."""
+    return cube_catalog(load_cube(version))
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_table_data(version, group_col, view_type, superfamilies=None, families=None, products=None):
+    """Tabla agregada por group_col y Mes o Trimestre."""
+    return slice_cube(load_cube(version), group_col, view_type, superfamilies, families, products)
 
-        scripts = [data_processor] + base_scripts
 
-        # Ejecutar cada script
-        for script in scripts:
-            script_path = os.path.join(base_dir, script)  # Ruta absoluta
-            print(f"Ejecutando: {script_path}")
-            result = subprocess.run(["python", script_path], capture_output=True, text=True, check=True)
-            print(result.stdout)
+def style_kg(df):
+    """
+    Formato de miles con punto (sin decimales) para las columnas en Kg al mostrar la
+    tabla; los datos siguen siendo numéricos.
+    """
+    kg_cols = [col for col in df.columns if col.endswith("(Kg)") or col in NUMERIC_COLS]
+    return df.style.format(precision=0, thousands=".", decimal=",", na_rep="", subset=kg_cols)
 
-        print("Ejecución de scripts completada.")
-        return True
+# ------------------------------------------------
+#   Corrida de Modelo
+# ------------------------------------------------
+@st.cache_resource
+def get_job_runner():
+    """Ejecutor en segundo plano compartido por todas las sesiones (una corrida a la vez)."""
+    return JobRunner()
+
+JOB_REFRESH_SECONDS = 3  # Espera entre reruns mientras hay un trabajo en cola o en ejecución
+
+JOB_STATUS_LABELS = {
+    QUEUED: "En cola",
+    RUNNING: "En ejecución",
+    SUCCEEDED: "Terminado",
+    FAILED: "Con errores",
+}
+
+def show_job_status(job):
+    """Progreso y duración por paso de un trabajo en segundo plano."""
+    if job is None:
+        return
+
+    st.progress(job_progress(job), text=f"Estado: {JOB_STATUS_LABELS[job['status']]}")
+    if job['steps']:
+        steps = pd.DataFrame([
+            {"Paso": name, "Estado": step['status'], "Segundos": step['seconds']}
+            for name, step in job['steps'].items()
+        ])
+        st.dataframe(steps.style.format(precision=1, na_rep="", subset=["Segundos"]), use_container_width=True)
+
+    if job['status'] in (QUEUED, RUNNING):
+        st.info("Los dashboards siguen mostrando los resultados anteriores hasta que termine la ejecución. "
+                f"El avance se actualiza cada {JOB_REFRESH_SECONDS} s.")
+        st.button("Actualizar estado", key=f"refresh_{job['id']}")
+    elif job['status'] == SUCCEEDED:
+        st.success(f"Ejecución terminada en {job['wall_time']:.0f} s.")
+    else:
+        st.error("Hubo un error en la ejecución; se mantienen los resultados anteriores.")
+        if job['error']:
+            with st.expander("Detalle del error"):
+                st.code(job['error'])
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error al ejecutar {e.cmd}: {e.stderr}")
-        return False
-    except Exception as e:
-        print(f"Error inesperado: {str(e)}")
-        return False
+def refresh_while_job_runs():
+    """
+    Vuelve a ejecutar la página cada JOB_REFRESH_SECONDS mientras el último trabajo está
+    en cola o en ejecución, para que su avance se actualice sin el botón. Se llama al
+    final de la página, con todo ya dibujado.
+    """
+    job = get_job_runner().latest()
+    if job is not None and job['status'] in (QUEUED, RUNNING):
+        time.sleep(JOB_REFRESH_SECONDS)
+        # st.rerun desde Streamlit 1.27; experimental_rerun en la versión de requirements.txt
+        rerun = getattr(st, 'rerun', None) or st.experimental_rerun
+        rerun()
 
 def model_control_interface():
     """
@@ -85,10 +133,12 @@ def model_control_interface():
 
     st.write("""
     Esta interfaz permite ejecutar el modelo de proyección eligiendo entre usar datos
-    de demanda o venta como input. El proceso actualiza automáticamente los dashboards
-    una vez completado.
+    de demanda o venta como input. El modelo corre en segundo plano: se puede seguir
+    usando el dashboard y los resultados nuevos se publican todos juntos al terminar.
     """)
 
+    runner = get_job_runner()
+
     # Selección del tipo de input
     input_type = st.radio(
         "Seleccione el tipo de datos de entrada:",
@@ -97,25 +147,25 @@ def model_control_interface():
         help="Elija si desea usar datos de demanda o de venta para generar las proyecciones."
     )
 
-    # Estado de la última ejecución
-    if os.path.exists('processed_data.csv'):
-        last_modified = os.path.getmtime('processed_data.csv')
-        last_modified_date = datetime.datetime.fromtimestamp(last_modified)
-        st.info(f"Última actualización: {last_modified_date.strftime('%Y-%m-%d %H:%M:%S')}")
-
-    # Botón para ejecutar el modelo
-    if st.button("Ejecutar Modelo", type="primary"):
-        with st.spinner('Ejecutando modelo...'):
-            success = run_model_pipeline(input_type.lower())
-
-            if success:
-                st.success(
-                    "¡Modelo ejecutado exitosamente! "
-                    "Los dashboards de proyección y flujo de stock han sido actualizados."
-                )
-                st.experimental_rerun()
-            else:
-                st.error("Hubo un error en la ejecución del modelo. Por favor revisa los logs.")
+    # Resultados que se están mostrando
+    published = read_current()
+    if published is not None:
+        st.info(f"Resultados publicados: {published['published_at'].replace('T', ' ')}")
+
+    # Botones para ejecutar el modelo o sólo el refresco de stock
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Ejecutar Modelo", type="primary"):
+            job, created = runner.submit('model', input_type=input_type.lower())
+            if not created:
+                st.warning("Ya hay una ejecución en curso; se muestra su avance.")
+    with col2:
+        if st.button("Actualizar sólo Stock"):
+            job, created = runner.submit('stock')
+            if not created:
+                st.warning("Ya hay una ejecución en curso; se muestra su avance.")
+
+    show_job_status(runner.latest())
 
 def update_data_interface():
     """
@@ -124,8 +174,8 @@ def update_data_interface():
     st.title("Actualización de Datos de Demanda")
 
     st.write("""
-    Esta interfaz permite actualizar los datos de demanda desde SQL Server. 
-    Una vez completada la actualización, se ejecutará el modelo de proyección.
+    Esta interfaz permite actualizar los datos de demanda desde SQL Server, en segundo
+    plano. Luego se puede ejecutar el modelo de proyección con los datos nuevos.
     """)
 
     # Estado de la última actualización
@@ -134,18 +184,17 @@ def update_data_interface():
         last_modified_date = datetime.datetime.fromtimestamp(last_modified)
         st.info(f"Última actualización: {last_modified_date.strftime('%Y-%m-%d %H:%M:%S')}")
 
-    # Botón para actualizar los datos
+    # Botón para actualizar los datos (misma cola que el modelo: una corrida a la vez)
     if st.button("Actualizar Datos de Demanda", type="primary"):
-        with st.spinner('Actualizando datos...'):
-            success = update_demand_data()
-
-            if success:
-                st.success("Datos de demanda actualizados exitosamente.")
-                st.experimental_rerun()
-            else:
-                st.error("Hubo un error al actualizar los datos. Por favor revisa los logs.")
+        job, created = get_job_runner().submit('demand')
+        if not created:
+            st.warning("Ya hay una ejecución en curso; se muestra su avance en Control de Modelo.")
 
 def main():
+    render_dashboard()
+    refresh_while_job_runs()
+
+def render_dashboard():
 
     # -----------------------------------------------------------------------
     # 1. Estilos CSS: se han agregado comentarios y ligeras mejoras visuales
@@ -290,21 +339,11 @@ def main():
     # ------------------------------------------------
     #   CARGA DE DATOS DESDE CSV
     # ------------------------------------------------
-    file_path = './demand_forecasting_project/data/output/merged2.csv'
-
-    @st.cache_data
-    def load_data():
-        data = pd.read_csv(file_path)
-        
-        # Convertir las columnas numéricas eliminando el formato de miles
-        numeric_cols = ['Venta 2025', 'Venta 2024', 'Venta 2023', 'Venta 2022', 'Projection 2025', 'Projection 2026']
-        for col in numeric_cols:
-            if col in data.columns:
-                data[col] = pd.to_numeric(data[col].replace({',': ''}, regex=True), errors='coerce')
-        
-        return data
-
-    data = load_data()
+    data_version = file_version(
+        current_path('merged2_cube.parquet', CUBE_FILE),
+        current_path('merged2.csv', SALES_FILE)
+    )
+    data = load_data(data_version)
     
     # ------------------------------------------------
     #   TÍTULO PRINCIPAL
@@ -349,27 +388,8 @@ def main():
             st.warning("Por favor selecciona al menos una Super Familia.")
             st.stop()
 
-        filtered_data = data[data["SuperFamily"].isin(superfamily_filter)].copy()
-
-        if view_type == "Trimestres":
-            filtered_data["Trimestre"] = ((filtered_data["Mes"] - 1) // 3) + 1
-            table_data = filtered_data.groupby(["SuperFamily","Trimestre"], as_index=False).agg({
-                "Projection 2025": "sum",
-                "Projection 2026": "sum",
-                "Venta 2025": "sum",
-                "Venta 2024": "sum",
-                "Venta 2023": "sum",
-                "Venta 2022": "sum"
-            })
-        else:  # Meses
-            table_data = filtered_data.groupby(["SuperFamily","Mes"], as_index=False).agg({
-                "Projection 2025": "sum",
-                "Projection 2026": "sum",
-                "Venta 2025": "sum",
-                "Venta 2024": "sum",
-                "Venta 2023": "sum",
-                "Venta 2022": "sum"
-            })
+        filters = dict(superfamilies=tuple(superfamily_filter))
+        table_data = cached_table_data(data_version, "SuperFamily", view_type, **filters)
 
     elif grouping_level == "Familia":
         superfamily_filter = st.sidebar.multiselect(
@@ -386,30 +406,8 @@ def main():
             st.warning("Por favor selecciona al menos una Familia.")
             st.stop()
 
-        filtered_data = data[
-            (data["SuperFamily"].isin(superfamily_filter)) &
-            (data["Familia"].isin(family_filter))
-        ].copy()
-
-        if view_type == "Trimestres":
-            filtered_data["Trimestre"] = ((filtered_data["Mes"] - 1) // 3) + 1
-            table_data = filtered_data.groupby(["Familia","Trimestre"], as_index=False).agg({
-                "Projection 2025": "sum",
-                "Projection 2026": "sum",
-                "Venta 2025": "sum",
-                "Venta 2024": "sum",
-                "Venta 2023": "sum",
-                "Venta 2022": "sum"
-            })
-        else:  # Meses
-            table_data = filtered_data.groupby(["Familia","Mes"], as_index=False).agg({
-                "Projection 2025": "sum",
-                "Projection 2026": "sum",
-                "Venta 2025": "sum",
-                "Venta 2024": "sum",
-                "Venta 2023": "sum",
-                "Venta 2022": "sum"
-            })
+        filters = dict(superfamilies=tuple(superfamily_filter), families=tuple(family_filter))
+        table_data = cached_table_data(data_version, "Familia", view_type, **filters)
 
     else:  # Codigo Producto
         family_filter = st.sidebar.selectbox(
@@ -425,41 +423,11 @@ def main():
             st.warning("Por favor selecciona al menos un Codigo Producto.")
             st.stop()
 
-        filtered_data = data[
-            (data["Familia"] == family_filter) &
-            (data["Codigo Producto"].isin(product_filter))
-        ].copy()
-
-        if view_type == "Trimestres":
-            filtered_data["Trimestre"] = ((filtered_data["Mes"] - 1) // 3) + 1
-            table_data = filtered_data.groupby(["Codigo Producto","Trimestre"], as_index=False).agg({
-                "Projection 2025": "sum",
-                "Projection 2026": "sum",
-                "Venta 2025": "sum",
-                "Venta 2024": "sum",
-                "Venta 2023": "sum",
-                "Venta 2022": "sum"
-            })
-        else:  # Meses
-            table_data = filtered_data.groupby(["Codigo Producto","Mes"], as_index=False).agg({
-                "Projection 2025": "sum",
-                "Projection 2026": "sum",
-                "Venta 2025": "sum",
-                "Venta 2024": "sum",
-                "Venta 2023": "sum",
-                "Venta 2022": "sum"
-            })
+        filters = dict(families=(family_filter,), products=tuple(product_filter))
+        table_data = cached_table_data(data_version, "Codigo Producto", view_type, **filters)
 
-    # ------------------------------------------------
-    #   FORMATEO MILES (.,) PARA LA TABLA
-    # ------------------------------------------------
-    numeric_cols = ["Projection 2025", "Projection 2026","Venta 2025","Venta 2024","Venta 2023","Venta 2022"]
-    for col in numeric_cols:
-        if col in table_data.columns:
-            table_data[col] = table_data[col].apply(
-                lambda x: f"{int(x):,}".replace(",", "X").replace(".", ",").replace("X", ".") 
-                if pd.notnull(x) else x
-            )
+    # Las columnas numéricas se mantienen numéricas; el formato de miles (.,) se
+    # aplica sólo al mostrar las tablas (style_kg)
 
     # ------------------------------------------------
     #            INDICADORES CLAVE (KPIs)
@@ -467,37 +435,6 @@ def main():
     st.header("Indicadores Clave")
     st.info("Los siguientes KPIs muestran la proyección total vs. las ventas reales de 2025/2024 y un crecimiento estimado.")
 
-    # Convertir columnas a float nuevamente para poder hacer sum
-    def str_to_float(val):
-        # Helper para convertir "00.000" => float
-        return float(
-            str(val).replace(".","").replace(",",".") 
-            if pd.notnull(val) and val != "" else 0
-        )
-    
-    current_month = datetime.datetime.now().month
-
-    # Filtrar datos hasta el mes actual
-    filtered_month_data = filtered_data[filtered_data["Mes"] <= current_month]
-
-
-    total_projection_2025 = filtered_month_data["Projection 2025"].apply(str_to_float).sum()
-    total_projection_2026 = filtered_month_data["Projection 2026"].apply(str_to_float).sum()
-    total_sales_2025 = filtered_month_data["Venta 2025"].apply(str_to_float).sum()
-    total_sales_2024 = filtered_month_data["Venta 2024"].apply(str_to_float).sum()
-
-    # Crecimiento vs. 2024
-
-    growth_percentage = ((total_projection_2025 - total_sales_2024) / total_sales_2024) * 100 if total_sales_2024 else 0
-    growth_percentage_float = growth_percentage
-
-    formatted_growth_percentage = f"{growth_percentage_float:,.2f}" 
-    formatted_total_projection = f"{total_projection_2025:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    formatted_total_sales_2025 = f"{total_sales_2025:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    formatted_total_sales_2024 = f"{total_sales_2024:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    formatted_growth_percentage = formatted_growth_percentage.replace(",", "X").replace(".", ",").replace("X", ".")
-
-
     # ------------------------------------------------
     # YTD según Mes / Trimestre actual
     # ------------------------------------------------
@@ -516,11 +453,6 @@ def main():
         table_data_ytd[time_column] = table_data_ytd[time_column].astype(int)
         table_data_ytd = table_data_ytd[table_data_ytd[time_column] <= current_period]
 
-        # Quitar formateo en Projection, Venta 2025, Venta 2024
-        for col in ["Projection 2025", "Venta 2025", "Venta 2024"]:
-            if col in table_data_ytd.columns:
-                table_data_ytd[col] = table_data_ytd[col].apply(str_to_float)
-
         # Sumas
         projection_ytd = table_data_ytd["Projection 2025"].sum()
         venta_2025_ytd = table_data_ytd["Venta 2025"].sum()
@@ -629,7 +561,7 @@ def main():
         }
         table_data_resumida.rename(columns=rename_map_resum, inplace=True)
 
-        st.dataframe(table_data_resumida, use_container_width=True)
+        st.dataframe(style_kg(table_data_resumida), use_container_width=True)
 
     # =========================================================
     #   2) TABLA DETALLADA
@@ -663,7 +595,7 @@ def main():
         }
         table_data_detallada.rename(columns=rename_map_detail, inplace=True)
 
-        st.dataframe(table_data_detallada, use_container_width=True)
+        st.dataframe(style_kg(table_data_detallada), use_container_width=True)
 
     # =========================================================
     #   3) GRÁFICA
@@ -672,11 +604,7 @@ def main():
         st.subheader("Gráfica de Proyección vs. Ventas")
         st.info("Comparativa visual para entender la relación entre Proyección y Ventas históricas.")
 
-        # Para graficar, revertimos formateo
-        table_plot = table_data.copy()
-        for col in numeric_cols:
-            if col in table_plot.columns:
-                table_plot[col] = table_plot[col].apply(str_to_float)
+        table_plot = table_data
 
         # Determinar eje X
         x_col = "Trimestre" if ("Trimestre" in table_plot.columns and view_type=="Trimestres") else "Mes"
@@ -740,11 +668,6 @@ def main():
             table_data_ytd[x_col] = table_data_ytd[x_col].astype(int)
             table_data_ytd = table_data_ytd.sort_values(by=x_col)
 
-            # Convertir a float
-            for c in ["Projection 2025", "Projection 2026","Venta 2025","Venta 2024"]:
-                if c in table_data_ytd.columns:
-                    table_data_ytd[c] = table_data_ytd[c].apply(str_to_float)
-
             # Calcular cumsum
             for c in ["Projection 2025", "Projection 2026","Venta 2025","Venta 2024"]:
                 ytd_col = c + "_YTD"
@@ -859,19 +782,12 @@ def main():
         # Filtro de vista
         view_type = st.radio("Seleccionar vista:", ["Meses", "Trimestres"], horizontal=True)
 
-        # Filtrar datos por familia
-        filtered_data = data[data["Familia"].isin(family_filter)].copy()
+        # Productos de las familias elegidas (partición a nivel producto del cubo)
+        time_col = "Trimestre" if view_type == "Trimestres" else "Mes"
+        filtered_data = cached_table_data(data_version, "Codigo Producto", view_type, families=tuple(family_filter))
 
-        if view_type == "Trimestres":
-            filtered_data["Trimestre"] = ((filtered_data["Mes"] - 1) // 3) + 1
-            time_col = "Trimestre"
-        else:
-            time_col = "Mes"
-        
         # Tabla de datos
-        table_data = filtered_data.groupby(["Codigo Producto", time_col], as_index=False).agg({
-            "Venta 2023": "sum", "Venta 2024": "sum", "Venta 2025": "sum", "Projection 2025": "sum"
-        })
+        table_data = filtered_data
         
         pivot_table = table_data.pivot(index="Codigo Producto", columns=time_col, values=["Venta 2023", "Venta 2024", "Venta 2025", "Projection 2025"])
         pivot_table.columns = [f"{col[0]} - {col[1]}" for col in pivot_table.columns]
@@ -0,0 +1,310 @@
+"""
+Capa de acceso a datos del Dashboard de Gestión de Stock.
+
+Arma una tabla ancha con una fila por producto en stock y una columna de proyección
+por mes del año (Mes_1 ... Mes_12), unida al stock con un único merge. Las funciones
+del dashboard leen las proyecciones desde estas columnas (o como matriz NumPy con
+projection_matrix) en lugar de diccionarios anidados por producto.
+
+process_stock_flow calcula el flujo de stock de los próximos 15 meses para todos los
+productos a la vez (stock inicial menos la suma acumulada de la matriz de proyección)
+y lo agrega por el nivel elegido con un solo groupby.
+"""
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Raíz del repositorio en el PATH para importar demand_forecasting_project
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from demand_forecasting_project.src.data.hierarchy_index import INDEX_PATH, load_hierarchy_index
+from demand_forecasting_project.src.data.schema import read_artifact
+
+STOCK_PATH = './Stock_Optimization/Results/Stock_Cono_Ovillo.csv'
+PROJECTION_PATH = './demand_forecasting_project/data/output/Consolidated_forecast.csv'
+
+MONTHS = list(range(1, 13))
+MONTH_COLUMNS = [f'Mes_{month}' for month in MONTHS]
+
+WINDING_RATE = 500  # Kg por día que se pueden ovillar
+FORECAST_HORIZON = 15  # Meses proyectados desde el mes siguiente al actual
+MONTH_NAMES_ES = [
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+]
+
+NO_FAMILY = 'Sin Familia'
+NO_SUPER_FAMILY = 'Sin Super Familia'
+
+
+def load_projections(projection_path=PROJECTION_PATH):
+    """
+    Proyecciones por producto en formato ancho.
+
+    Returns:
+        pd.DataFrame: índice Product_Code; columnas Familia, SuperFamily y Mes_1..Mes_12
+            (suma de la proyección de ese mes del año, 0 si no hay)
+    """
+    projection_df = read_artifact(
+        projection_path, 'consolidated_forecast',
+        usecols=['Date', 'Familia', 'Codigo Producto', 'Projection', 'Super Familia']
+    )
+    month = projection_df['Date'].dt.month
+
+    wide = pd.pivot_table(
+        projection_df, values='Projection', index='Codigo Producto', columns=month,
+        aggfunc='sum', fill_value=0, observed=True
+    ).reindex(columns=MONTHS, fill_value=0)
+    wide.columns = MONTH_COLUMNS
+
+    # Familia y Super Familia de la primera aparición de cada producto
+    attributes = (
+        projection_df.sort_values(['Codigo Producto', 'Familia', 'Super Familia'])
+        .drop_duplicates('Codigo Producto')
+        .set_index('Codigo Producto')[['Familia', 'Super Familia']]
+        .rename(columns={'Super Familia': 'SuperFamily'})
+    )
+    wide = attributes.join(wide)
+    wide.index.name = 'Product_Code'
+    return wide
+
+
+def load_stock(stock_path=STOCK_PATH):
+    """Stock por producto con los nombres de columna del dashboard."""
+    stock_df = read_artifact(stock_path, 'stock_cono_ovillo',
+                             usecols=['Ovillo_Code', 'Cono_Stock', 'Ovillo_Stock', 'Stock_total'])
+    return stock_df.rename(columns={
+        'Ovillo_Code': 'Product_Code',
+        'Cono_Stock': 'Stock_Cones',
+        'Ovillo_Stock': 'Stock_Ovillo',
+        'Stock_total': 'Stock_Total',
+    })
+
+
+def load_stock_projection(stock_path=STOCK_PATH, projection_path=PROJECTION_PATH, hierarchy_path=INDEX_PATH):
+    """
+    Una fila por producto en stock con su stock y su proyección mensual.
+
+    Familia y Super Familia salen del índice de jerarquía del pipeline
+    (hierarchy_index.npz, con los nombres de los resultados; join vectorizado por
+    Product_Code). Los productos que no están en el índice, o si el índice no existe,
+    usan la primera aparición del producto en las proyecciones.
+
+    Returns:
+        pd.DataFrame: Product_Code, Stock_Cones, Stock_Ovillo, Stock_Total, Familia,
+            SuperFamily, Mes_1..Mes_12. Los productos sin jerarquía quedan en
+            'Sin Familia' / 'Sin Super Familia', y los sin proyección con proyección 0.
+    """
+    stock_df = load_stock(stock_path)
+    projections = load_projections(projection_path)
+
+    combined = stock_df.merge(projections, how='left', left_on='Product_Code', right_index=True)
+    combined['Familia'] = combined['Familia'].astype(object)
+    combined['SuperFamily'] = combined['SuperFamily'].astype(object)
+
+    hierarchy_index = load_hierarchy_index(hierarchy_path) if hierarchy_path else None
+    if hierarchy_index is not None:
+        indexed = hierarchy_index.annotate(combined[['Product_Code']], 'Product_Code')
+        for col in ('Familia', 'SuperFamily'):
+            combined[col] = indexed[col].astype(object).fillna(combined[col])
+
+    combined['Familia'] = combined['Familia'].fillna(NO_FAMILY)
+    combined['SuperFamily'] = combined['SuperFamily'].fillna(NO_SUPER_FAMILY)
+    combined[MONTH_COLUMNS] = combined[MONTH_COLUMNS].fillna(0)
+    return combined.reset_index(drop=True)
+
+
+def projection_matrix(data):
+    """Proyecciones como matriz productos × 12 meses del año (columna 0 = enero)."""
+    return data[MONTH_COLUMNS].to_numpy(dtype=float)
+
+
+def total_projection(data):
+    """Proyección de los 12 meses por producto."""
+    return projection_matrix(data).sum(axis=1)
+
+
+def annual_demand(data):
+    """Demanda de 12 meses de todos los productos de data."""
+    if data is None or not set(MONTH_COLUMNS).issubset(data.columns):
+        return 0
+    return float(projection_matrix(data).sum())
+
+
+def filter_stock_data(data, grouping_column, family=None, groups=None):
+    """
+    Filtros de la barra lateral: Familia (opcional) y los grupos elegidos del nivel
+    grouping_column (None o vacío = todos).
+    """
+    if family is not None:
+        data = data[data['Familia'] == family]
+    if groups:
+        data = data[data[grouping_column].isin(groups)]
+    return data
+
+
+def forecast_months(today=None, horizon=FORECAST_HORIZON):
+    """
+    Meses proyectados a partir del mes siguiente a today.
+
+    Returns:
+        tuple: (etiquetas 'Mes Año', números de mes 1..12)
+    """
+    today = today or datetime.now()
+    dates = [today + pd.DateOffset(months=i + 1) for i in range(horizon)]
+    labels = [f"{MONTH_NAMES_ES[date.month - 1]} {date.year}" for date in dates]
+    return labels, [date.month for date in dates]
+
+
+def stock_flow_matrix(data, safety_stock=0, today=None):
+    """
+    Stock remanente al cierre de cada mes proyectado, para todos los productos.
+
+    El stock de partida es Stock_Total más dos veces el stock de seguridad, como en el
+    cálculo por producto que reemplaza (process_stock_flow lo sumaba al stock y
+    calculate_monthly_flow otra vez).
+
+    Returns:
+        tuple: (matriz productos × meses, etiquetas de los meses)
+    """
+    labels, month_numbers = forecast_months(today)
+    demand = projection_matrix(data)[:, np.asarray(month_numbers) - 1]
+    start = data['Stock_Total'].to_numpy(dtype=float) + 2 * safety_stock
+    return start[:, None] - np.cumsum(demand, axis=1), labels
+
+
+def process_stock_flow(data, safety_stock, grouping_column, today=None):
+    """
+    Flujo de stock agregado por grouping_column (SuperFamily, Familia o Product_Code).
+
+    Returns:
+        list[dict]: por grupo (en orden), group, stockCones, stockOvillo, stockInitial,
+            monthly {mes: stock}, quarterly {'N° Trimestre': stock al cierre} y hasStockout
+    """
+    flow, labels = stock_flow_matrix(data, safety_stock, today)
+
+    frame = pd.DataFrame(flow, columns=labels, index=data.index)
+    frame['stockCones'] = data['Stock_Cones']
+    frame['stockOvillo'] = data['Stock_Ovillo']
+    frame['stockInitial'] = data['Stock_Total'] + safety_stock
+    grouped = frame.groupby(data[grouping_column]).sum()
+
+    monthly = grouped[labels].to_numpy()
+    quarter_ends = list(range(2, len(labels), 3))
+    has_stockout = (monthly <= 0).any(axis=1)
+
+    processed_results = []
+    for i, group in enumerate(grouped.index):
+        processed_results.append({
+            'group': group,
+            'stockCones': grouped['stockCones'].iat[i],
+            'stockOvillo': grouped['stockOvillo'].iat[i],
+            'stockInitial': grouped['stockInitial'].iat[i],
+            'monthly': dict(zip(labels, monthly[i].tolist())),
+            'quarterly': {
+                f'{q + 1}° Trimestre': monthly[i, end] for q, end in enumerate(quarter_ends)
+            },
+            'hasStockout': bool(has_stockout[i]),
+        })
+    return processed_results
+
+
+def calculate_winding_recommendations(data):
+    """Calcula las recomendaciones de ovillado considerando tendencias."""
+    recommendations = []
+
+    for row in data:
+        monthly_data = list(row['monthly'].items())
+        current_ovillo_stock = row['stockOvillo']
+        current_cono_stock = row['stockCones']
+        monthly_projection = row.get('Projection', 0) / 12 if 'Projection' in row else 0
+
+        for idx, (month, projected_stock) in enumerate(monthly_data):
+            months_until_need = idx
+            if projected_stock < monthly_projection and current_cono_stock > 0:
+                stock_needed = monthly_projection - projected_stock
+                # Usar aquí la constante WINDING_RATE
+                days_needed = round(min(stock_needed, current_cono_stock) / WINDING_RATE)
+                months_needed = round(days_needed / 29, 1)
+
+                if months_until_need <= 1:
+                    priority = 'Alta'
+                elif months_until_need <= 4:
+                    priority = 'Media'
+                else:
+                    priority = 'Baja'
+
+                recommendations.append({
+                    'Mes': month,
+                    'Cantidad Necesaria': round(stock_needed),
+                    'Conos Disponibles': round(current_cono_stock),
+                    'Stock Ovillos': round(current_ovillo_stock),
+                    'Días Necesarios': days_needed,
+                    'Meses Necesarios': months_needed,
+                    'Prioridad': priority,
+                    'Grupo': row['group'],
+                    'Stock Proyectado': round(projected_stock),
+                    'Demanda Mensual': round(monthly_projection)
+                })
+                current_cono_stock = max(0, current_cono_stock - stock_needed)
+
+    # Ordenar por prioridad
+    priority_order = {'Alta': 0, 'Media': 1, 'Baja': 2}
+    recommendations.sort(key=lambda x: (priority_order[x['Prioridad']], x['Mes']))
+
+    return recommendations
+
+
+def calculate_advanced_kpis(processed_data, original_data):
+    """
+    Calcula KPIs más profundos:
+    - Tasa de Agotamiento (porcentaje de meses con stock negativo)
+    - Fill Rate (simplificado)
+    - Días de Inventario (total stock vs. demanda diaria promedio)
+    Nota: El Fill Rate exacto requiere simular demanda satisfecha/insatisfecha.
+    Aquí se hace un approach muy sencillo.
+    """
+    if not processed_data:
+        return {"stockout_rate": 0, "fill_rate": 0, "days_of_inventory": 0}
+
+    # --- 1) Tasa de Agotamiento ---
+    negative_count = 0
+    total_months = 0
+
+    # Recorremos cada agrupación (ej. cada familia, super familia, etc.)
+    for row in processed_data:
+        leftover_vals = row['monthly'].values()  # stock resultante mes a mes
+        total_months += len(leftover_vals)
+        negative_count += sum(1 for val in leftover_vals if val < 0)
+
+    stockout_rate = (negative_count / total_months * 100) if total_months else 0
+
+    # --- 2) Fill Rate (simplificado) ---
+    # Suponemos que cada vez que stock es negativo un mes, se deja de atender esa parte.
+    # Fill Rate = (1 - (Agotamiento)) x 100? 
+    # No es exacto, pero sirve de aproximación rápida:
+    fill_rate = 100 - stockout_rate if stockout_rate < 100 else 0
+
+    # --- 3) Días de Inventario ---
+    # Tomamos el stock total de todos los grupos (stockInitial sumado) 
+    total_stock = sum(row['stockInitial'] for row in processed_data)
+
+    # Sumamos la demanda 12 meses (de la DataFrame original) para tener la "demanda anual"
+    # "original_data" = subset de data con las columnas Mes_1..Mes_12
+    monthly_demand_12 = annual_demand(original_data)
+
+    # Demanda diaria promedio
+    daily_demand = (monthly_demand_12 / (12*30)) if monthly_demand_12 else 0
+
+    days_of_inventory = total_stock / daily_demand if daily_demand > 0 else 0
+
+    return {
+        "stockout_rate": stockout_rate,     # Porcentaje
+        "fill_rate": fill_rate,             # Porcentaje
+        "days_of_inventory": days_of_inventory
+    }
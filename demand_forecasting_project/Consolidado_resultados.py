@@ -1,7 +1,32 @@
 import os
+import sys
 import pandas as pd
 
-def consolidar_proyecciones():
+# Añadir la raíz del repositorio al PATH para importar el esquema de los artefactos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from demand_forecasting_project.src.data.Data_groups import category_label
+from demand_forecasting_project.src.data.schema import write_artifact
+
+# Archivo consolidado que leen merged_data.py y los dashboards
+CONSOLIDATED_PATH = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\output\Consolidated_forecast.csv'
+
+def consolidar_proyecciones(product_forecasts=None):
+    """
+    Une las proyecciones por producto de Bebé, Invierno y Verano en Consolidated_forecast.csv.
+
+    Args:
+        product_forecasts (dict): 'Bebé' / 'Invierno' / 'Verano' -> DataFrame de
+            forecast_product_*.csv ya en memoria. Las que falten se leen del CSV.
+
+    Returns:
+        pd.DataFrame: el consolidado (None si hubo un error)
+    """
+    product_forecasts = product_forecasts or {}
+
+    def read_forecast(name, path):
+        return product_forecasts[name].copy() if name in product_forecasts else pd.read_csv(path)
+
     # Definir rutas de los archivos
     base_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\processed'
     bebe_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\processed\Bebé\forecast_product_2025.csv'
@@ -11,20 +36,20 @@ def consolidar_proyecciones():
     # Leer los archivos
     try:
         # Leer archivos y asegurarse de limpiar duplicados o errores
-        bebe_df = pd.read_csv(bebe_path)
-        bebe_df["SuperFamily"] = "Bebé"
+        bebe_df = read_forecast('Bebé', bebe_path)
+        bebe_df["SuperFamily"] = category_label('Bebé')
         bebe_df["Familia"] = bebe_df["Familia"].str.strip()  # Eliminar espacios
         bebe_df["Familia"] = bebe_df["Familia"].str.replace(r'\s+', ' ', regex=True)  # Corregir concatenaciones repetitivas
         bebe_df["Product_Code"] = bebe_df["Product_Code"].str.strip()
 
-        invierno_df = pd.read_csv(invierno_path)
-        invierno_df["SuperFamily"] = "Invierno"
+        invierno_df = read_forecast('Invierno', invierno_path)
+        invierno_df["SuperFamily"] = category_label('Invierno')
         invierno_df["Familia"] = invierno_df["Familia"].str.strip()
         invierno_df["Familia"] = invierno_df["Familia"].str.replace(r'\s+', ' ', regex=True)  # Corregir concatenaciones repetitivas
         invierno_df["Product_Code"] = invierno_df["Product_Code"].str.strip()
 
-        verano_df = pd.read_csv(verano_path)
-        verano_df["SuperFamily"] = "Hilos Verano"
+        verano_df = read_forecast('Verano', verano_path)
+        verano_df["SuperFamily"] = category_label('Verano')
         verano_df["Familia"] = verano_df["Familia"].str.strip()
         verano_df["Familia"] = verano_df["Familia"].str.replace(r'\s+', ' ', regex=True)  # Corregir concatenaciones repetitivas
         verano_df["Product_Code"] = verano_df["Product_Code"].str.strip()
@@ -53,11 +78,13 @@ def consolidar_proyecciones():
             consolidated_df["Projection"] = pd.to_numeric(consolidated_df["Projection"], errors="coerce")
             
         # Definir la ruta del archivo consolidado
-        consolidated_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\output\Consolidated_forecast.csv'
+        consolidated_path = CONSOLIDATED_PATH
 
-        # Guardar el DataFrame consolidado
-        consolidated_df.to_csv(consolidated_path, index=False)
+        # Guardar el DataFrame consolidado (con los tipos del esquema: claves categóricas,
+        # Projection en float32)
+        consolidated_df = write_artifact(consolidated_df, consolidated_path, 'consolidated_forecast')
         print(f"Archivo consolidado guardado en: {consolidated_path}")
+        return consolidated_df
 
     except FileNotFoundError as e:
         print(f"Error: {e}")
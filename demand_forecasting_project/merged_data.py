@@ -1,52 +1,24 @@
+import os
+import sys
+
 import pandas as pd
 
+from sales_cube import CUBE_FILENAME, build_sales_cube, write_sales_cube
+
+# Añadir la raíz del repositorio al PATH para importar el esquema de los artefactos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from demand_forecasting_project.src.data.hierarchy_index import INDEX_PATH, load_hierarchy_index
+from demand_forecasting_project.src.data.schema import enforce_schema, read_artifact, write_artifact
+
 # Rutas de los archivos
 projections_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\output\Consolidated_forecast.csv'
 sales_paths = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\input\demand_data.csv'
+output_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\output\merged2.csv'
 
-# Cargar datos de proyecciones
-forecast_df = pd.read_csv(projections_path)
-forecast_df = forecast_df.rename(columns={"Super Familia": "SuperFamily"})
-forecast_df["Projection"] = pd.to_numeric(forecast_df["Projection"], errors="coerce")
-forecast_df["Date"] = pd.to_datetime(forecast_df["Date"], errors="coerce")
-forecast_df = forecast_df.dropna(subset=["Date"])
-forecast_df["Mes"] = forecast_df["Date"].dt.month
-forecast_df["Year"] = forecast_df["Date"].dt.year
-
-# Agrupar datos
-grouped_data = forecast_df.groupby(
-    ['Mes', 'SuperFamily', 'Familia', 'Codigo Producto', 'Year']
-)['Projection'].sum().reset_index()
-
-# Separar datos por año
-data_2025 = grouped_data[grouped_data['Year'] == 2025].copy()
-data_2026 = grouped_data[grouped_data['Year'] == 2026].copy()
-
-# Crear DataFrame base
-base_keys = ['Mes', 'SuperFamily', 'Familia', 'Codigo Producto']
-base_df = grouped_data[base_keys].drop_duplicates()
-
-# Preparar datos 2025 y 2026
-data_2025_clean = data_2025.drop('Year', axis=1).rename(columns={'Projection': 'Projection 2025'})
-data_2026_clean = data_2026.drop('Year', axis=1).rename(columns={'Projection': 'Projection 2026'})
-
-# Unir los datos
-final_data = base_df.merge(
-    data_2025_clean, 
-    on=base_keys, 
-    how='left'
-).merge(
-    data_2026_clean,
-    on=base_keys,
-    how='left'
-)
-
-# Llenar NaN con 0
-final_data = final_data.fillna(0)
 
 # Procesar datos de ventas
-def process_sales_data(path):
-    df = pd.read_csv(path)
+def process_sales_data(df):
     df = df.rename(columns={
         "Fecha": "Date",
         "codigoProducto": "Codigo Producto",
@@ -60,43 +32,135 @@ def process_sales_data(path):
     df = df.groupby(["Date", "Mes", "Year", "Codigo Producto"])[numeric_cols].sum().reset_index()
     return df
 
-# Procesar ventas
-sales_data = process_sales_data(sales_paths)
-sales_data = sales_data.pivot_table(
-    index=["Mes", "Codigo Producto"],
-    columns="Year",
-    values="Sales"
-).reset_index()
-sales_data.columns = ["Mes", "Codigo Producto"] + [f"Venta {col}" for col in sales_data.columns[2:]]
-
-# Combinar con datos de ventas
-merged_data = pd.merge(
-    sales_data,
-    final_data,
-    on=["Mes", "Codigo Producto"],
-    how="inner"
-)
-
-# Reordenar columnas
-columns_order = [
-    "Mes", "SuperFamily", "Familia", "Codigo Producto",
-    "Venta 2025", "Venta 2024", "Venta 2023", "Venta 2022",
-    "Projection 2025", "Projection 2026"
-]
-merged_data = merged_data.reindex(columns=columns_order, fill_value=0)
-
-# Eliminar registros con Mes nulo
-merged_data = merged_data.dropna(subset=['Mes'])
-
-print("\nVerificación antes de guardar:")
-print("Número total de registros:", len(merged_data))
-print("Registros por mes:")
-print(merged_data['Mes'].value_counts().sort_index())
-print("\nBuscando valores nulos:")
-print(merged_data.isnull().sum())
-
-# Guardar los datos combinados
-output_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\output\merged2.csv'
-merged_data.to_csv(output_path, index=False)
 
-print(f"\nArchivo combinado guardado exitosamente en: {output_path}")
\ No newline at end of file
+def apply_hierarchy(forecast_df, hierarchy_index):
+    """
+    SuperFamily y Familia de cada producto desde el índice de jerarquía (nombres de los
+    resultados, ver hierarchy_map); los productos que no están en el índice conservan
+    los del consolidado.
+    """
+    if hierarchy_index is None:
+        return forecast_df
+    indexed = hierarchy_index.annotate(forecast_df[['Codigo Producto']], 'Codigo Producto',
+                                       columns={'Family': 'Familia', 'Super_Family': 'SuperFamily'})
+    forecast_df = forecast_df.copy()
+    for col in ('Familia', 'SuperFamily'):
+        forecast_df[col] = indexed[col].astype(object).fillna(forecast_df[col].astype(object))
+    print(f"Jerarquía desde el índice para {int(indexed['Familia'].notna().sum())} de {len(indexed)} filas")
+    return forecast_df
+
+
+def build_merged_data(forecast_df=None, demand_df=None, hierarchy_index=None):
+    """
+    Proyección 2025/2026 y ventas por año, por Mes y producto (merged2).
+
+    Args:
+        forecast_df (pd.DataFrame): Consolidated_forecast (None = leer projections_path)
+        demand_df (pd.DataFrame): demand_data de Demanda_real (None = leer sales_paths)
+        hierarchy_index (HierarchyIndex): fuente de SuperFamily y Familia (None = las del
+            consolidado)
+    """
+    # Cargar datos de proyecciones
+    if forecast_df is None:
+        forecast_df = read_artifact(projections_path, 'consolidated_forecast')
+    forecast_df = forecast_df.rename(columns={"Super Familia": "SuperFamily"})
+    forecast_df = apply_hierarchy(forecast_df, hierarchy_index)
+    forecast_df["Projection"] = pd.to_numeric(forecast_df["Projection"], errors="coerce")
+    forecast_df["Date"] = pd.to_datetime(forecast_df["Date"], errors="coerce")
+    forecast_df = forecast_df.dropna(subset=["Date"])
+    forecast_df["Mes"] = forecast_df["Date"].dt.month
+    forecast_df["Year"] = forecast_df["Date"].dt.year
+
+    # Agrupar datos
+    grouped_data = forecast_df.groupby(
+        ['Mes', 'SuperFamily', 'Familia', 'Codigo Producto', 'Year'], observed=True
+    )['Projection'].sum().reset_index()
+
+    # Separar datos por año
+    data_2025 = grouped_data[grouped_data['Year'] == 2025].copy()
+    data_2026 = grouped_data[grouped_data['Year'] == 2026].copy()
+
+    # Crear DataFrame base
+    base_keys = ['Mes', 'SuperFamily', 'Familia', 'Codigo Producto']
+    base_df = grouped_data[base_keys].drop_duplicates()
+
+    # Preparar datos 2025 y 2026
+    data_2025_clean = data_2025.drop('Year', axis=1).rename(columns={'Projection': 'Projection 2025'})
+    data_2026_clean = data_2026.drop('Year', axis=1).rename(columns={'Projection': 'Projection 2026'})
+
+    # Unir los datos
+    final_data = base_df.merge(
+        data_2025_clean, 
+        on=base_keys, 
+        how='left'
+    ).merge(
+        data_2026_clean,
+        on=base_keys,
+        how='left'
+    )
+
+    # Llenar NaN con 0 (las claves son categóricas: sólo las proyecciones)
+    projection_cols = ['Projection 2025', 'Projection 2026']
+    final_data[projection_cols] = final_data[projection_cols].fillna(0)
+
+    # Procesar ventas
+    if demand_df is None:
+        demand_df = pd.read_csv(sales_paths)
+    sales_data = process_sales_data(demand_df)
+    sales_data = sales_data.pivot_table(
+        index=["Mes", "Codigo Producto"],
+        columns="Year",
+        values="Sales"
+    ).reset_index()
+    sales_data.columns = ["Mes", "Codigo Producto"] + [f"Venta {col}" for col in sales_data.columns[2:]]
+
+    # Códigos como texto en ambos lados: en memoria vienen como texto y desde CSV
+    # pueden leerse como números
+    sales_data["Codigo Producto"] = sales_data["Codigo Producto"].astype(str)
+    final_data["Codigo Producto"] = final_data["Codigo Producto"].astype(str)
+
+    # Combinar con datos de ventas
+    merged_data = pd.merge(
+        sales_data,
+        final_data,
+        on=["Mes", "Codigo Producto"],
+        how="inner"
+    )
+
+    # Reordenar columnas
+    columns_order = [
+        "Mes", "SuperFamily", "Familia", "Codigo Producto",
+        "Venta 2025", "Venta 2024", "Venta 2023", "Venta 2022",
+        "Projection 2025", "Projection 2026"
+    ]
+    merged_data = merged_data.reindex(columns=columns_order, fill_value=0)
+
+    # Eliminar registros con Mes nulo
+    merged_data = merged_data.dropna(subset=['Mes'])
+    merged_data = enforce_schema(merged_data, 'merged2')
+
+    print("\nVerificación antes de guardar:")
+    print("Número total de registros:", len(merged_data))
+    print("Registros por mes:")
+    print(merged_data['Mes'].value_counts().sort_index())
+    print("\nBuscando valores nulos:")
+    print(merged_data.isnull().sum())
+
+    return merged_data
+
+
+def save_merged_data(merged_data):
+    """Guarda merged2.csv y el cubo pre-agregado que lee el dashboard."""
+    # Guardar los datos combinados
+    merged_data = write_artifact(merged_data, output_path, 'merged2')
+
+    print(f"\nArchivo combinado guardado exitosamente en: {output_path}")
+
+    # Cubo pre-agregado (niveles × Meses/Trimestres) que lee el dashboard
+    cube_path = os.path.join(os.path.dirname(output_path), CUBE_FILENAME)
+    write_sales_cube(build_sales_cube(merged_data), cube_path)
+    print(f"Cubo de ventas guardado en: {cube_path}")
+
+
+if __name__ == "__main__":
+    save_merged_data(build_merged_data(hierarchy_index=load_hierarchy_index(INDEX_PATH)))
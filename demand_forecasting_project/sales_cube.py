@@ -0,0 +1,202 @@
+"""
+Cubo pre-agregado de ventas y proyecciones para el Dashboard de Proyección y Ventas.
+
+merged_data.py genera merged2.csv (una fila por Mes × producto). El dashboard, en cada
+rerun, filtraba esas filas y las agrupaba por el nivel y la vista elegidos. El cubo
+guarda esas agregaciones ya calculadas para los tres niveles (Super Familia, Familia,
+Codigo Producto) y las dos vistas (Meses, Trimestres), como Parquet tipado:
+
+    Nivel, Vista               category
+    SuperFamily, Familia,
+    Codigo Producto            category (la ruta jerárquica hasta el nivel; el resto vacío)
+    Periodo                    int8     (mes 1-12 o trimestre 1-4)
+    Projection / Venta ...     float64
+
+partition_cube separa el cubo por (Nivel, Vista) una vez al cargarlo; slice_cube toma
+la partición del nivel y la vista, aplica los filtros de la barra lateral
+y suma las pocas filas que quedan por grupo y período: el resultado es la misma tabla
+que el groupby sobre merged2.csv.
+
+Uso:
+    python sales_cube.py --benchmark    # latencia de rerun a nivel producto (merged2.csv si existe)
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+CUBE_FILENAME = 'merged2_cube.parquet'
+MERGED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'output', 'merged2.csv')
+
+KEY_COLS = ['SuperFamily', 'Familia', 'Codigo Producto']
+METRIC_COLS = ['Projection 2025', 'Projection 2026', 'Venta 2025', 'Venta 2024', 'Venta 2023', 'Venta 2022']
+
+# Nivel de agrupación -> columnas de la ruta jerárquica hasta ese nivel
+LEVELS = {
+    'SuperFamily': ['SuperFamily'],
+    'Familia': ['SuperFamily', 'Familia'],
+    'Codigo Producto': ['SuperFamily', 'Familia', 'Codigo Producto'],
+}
+# Vista -> nombre de la columna de período en la tabla del dashboard
+VIEWS = {'Meses': 'Mes', 'Trimestres': 'Trimestre'}
+
+
+def build_sales_cube(merged_data):
+    """
+    Agrega merged2 (Mes, SuperFamily, Familia, Codigo Producto y métricas) para todos los
+    niveles y vistas.
+
+    Returns:
+        pd.DataFrame: el cubo, con las columnas tipadas descritas en el módulo
+    """
+    data = merged_data[['Mes'] + KEY_COLS + METRIC_COLS].copy()
+    data[METRIC_COLS] = data[METRIC_COLS].apply(pd.to_numeric, errors='coerce')
+    periods = {
+        'Meses': data['Mes'].astype(int),
+        'Trimestres': (data['Mes'].astype(int) - 1) // 3 + 1,
+    }
+
+    parts = []
+    for level, keys in LEVELS.items():
+        for view, period in periods.items():
+            part = data.assign(Periodo=period).groupby(keys + ['Periodo'], observed=True, as_index=False)[METRIC_COLS].sum()
+            part.insert(0, 'Vista', view)
+            part.insert(0, 'Nivel', level)
+            parts.append(part)
+
+    cube = pd.concat(parts, ignore_index=True)
+    cube = cube[['Nivel', 'Vista'] + KEY_COLS + ['Periodo'] + METRIC_COLS]
+    for col in ['Nivel', 'Vista'] + KEY_COLS:
+        cube[col] = cube[col].astype('category')
+    cube['Periodo'] = cube['Periodo'].astype('int8')
+    cube[METRIC_COLS] = cube[METRIC_COLS].astype('float64')
+    return cube
+
+
+def write_sales_cube(cube, path):
+    """Escribe el cubo como Parquet (reemplazo atómico)."""
+    tmp_path = f'{path}.tmp'
+    cube.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def read_sales_cube(path):
+    return pd.read_parquet(path)
+
+
+def partition_cube(cube):
+    """Separa el cubo en un DataFrame por (Nivel, Vista), para no filtrarlo entero en cada rerun."""
+    return {key: part.reset_index(drop=True)
+            for key, part in cube.groupby(['Nivel', 'Vista'], observed=True)}
+
+
+def slice_cube(partitions, level, view, superfamilies=None, families=None, products=None):
+    """
+    Tabla del dashboard para un nivel y una vista: una fila por grupo y período con las
+    métricas sumadas, sobre las filas que cumplen los filtros (None = sin filtro).
+
+    Args:
+        partitions (dict): salida de partition_cube
+
+    Returns:
+        pd.DataFrame: columnas [level, 'Mes' o 'Trimestre'] + METRIC_COLS
+    """
+    rows = partitions[(level, view)]
+    if superfamilies is not None:
+        rows = rows[rows['SuperFamily'].isin(superfamilies)]
+    if families is not None:
+        rows = rows[rows['Familia'].isin(families)]
+    if products is not None:
+        rows = rows[rows['Codigo Producto'].isin(products)]
+
+    table = rows.groupby([level, 'Periodo'], observed=True, as_index=False)[METRIC_COLS].sum()
+    table[level] = table[level].astype(rows[level].cat.categories.dtype)
+    table['Periodo'] = table['Periodo'].astype(int)
+    return table.rename(columns={'Periodo': VIEWS[view]})
+
+
+def cube_catalog(partitions):
+    """Combinaciones SuperFamily / Familia / Codigo Producto presentes (para los filtros)."""
+    rows = partitions[('Codigo Producto', 'Meses')]
+    catalog = rows[KEY_COLS].drop_duplicates().reset_index(drop=True)
+    for col in KEY_COLS:
+        catalog[col] = catalog[col].astype(rows[col].cat.categories.dtype)
+    return catalog
+
+
+def make_synthetic_merged(n_products=20_000, n_families=200, n_superfamilies=6, seed=0):
+    """merged2 sintético: 12 meses por producto."""
+    rng = np.random.default_rng(seed)
+    product = np.arange(n_products)
+    family = rng.integers(0, n_families, n_products)
+    rows = len(product) * 12
+    data = pd.DataFrame({
+        'Mes': np.tile(np.arange(1, 13), n_products),
+        'SuperFamily': np.repeat([f'SF{f % n_superfamilies}' for f in family], 12),
+        'Familia': np.repeat([f'FAM{f:03d}' for f in family], 12),
+        'Codigo Producto': np.repeat([f'P{p:06d}' for p in product], 12),
+    })
+    for col in METRIC_COLS:
+        data[col] = rng.gamma(2.0, 100.0, rows)
+    return data
+
+
+def load_merged(path=MERGED_PATH):
+    """merged2.csv como lo leía el dashboard (claves como texto, métricas numéricas)."""
+    merged = pd.read_csv(path, dtype={col: str for col in KEY_COLS})
+    for col in METRIC_COLS:
+        merged[col] = pd.to_numeric(merged[col].replace({',': ''}, regex=True), errors='coerce')
+    return merged
+
+
+def benchmark(n_products=20_000, repeats=20, merged_path=MERGED_PATH):
+    """
+    Latencia de un rerun a nivel producto: groupby sobre las filas de merged2 (antes)
+    vs. slice_cube (ahora), para una familia y todos sus productos. Usa merged_path si
+    existe y, si no, un merged2 sintético de n_products productos.
+    """
+    if merged_path and os.path.exists(merged_path):
+        merged = load_merged(merged_path)
+        print(f"merged2: {merged_path}")
+    else:
+        merged = make_synthetic_merged(n_products)
+    partitions = partition_cube(build_sales_cube(merged))
+
+    family = merged['Familia'].iloc[0]
+    products = tuple(merged.loc[merged['Familia'] == family, 'Codigo Producto'].unique())
+
+    def legacy():
+        filtered = merged[(merged['Familia'] == family) & (merged['Codigo Producto'].isin(products))].copy()
+        filtered['Trimestre'] = ((filtered['Mes'] - 1) // 3) + 1
+        return filtered.groupby(['Codigo Producto', 'Trimestre'], as_index=False)[METRIC_COLS].sum()
+
+    def sliced():
+        return slice_cube(partitions, 'Codigo Producto', 'Trimestres', families=(family,), products=products)
+
+    pd.testing.assert_frame_equal(legacy(), sliced())
+
+    timings = {}
+    for name, func in [('merged2 groupby', legacy), ('slice_cube', sliced)]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        timings[name] = (time.perf_counter() - start) / repeats * 1000
+
+    print(f"Rerun a nivel producto ({merged['Codigo Producto'].nunique()} productos, {len(products)} en la familia): "
+          + ", ".join(f"{name} {ms:.1f} ms" for name, ms in timings.items())
+          + " (tablas idénticas)")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cubo pre-agregado de merged2.")
+    parser.add_argument("--benchmark", action="store_true", help="Mide la latencia de rerun a nivel producto.")
+    parser.add_argument("--products", type=int, default=20_000, help="Productos sintéticos del benchmark.")
+    parser.add_argument("--merged", default=MERGED_PATH,
+                        help="merged2.csv del benchmark ('' = siempre sintético).")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.products, merged_path=args.merged)
@@ -1,34 +1,31 @@
-import pyodbc
+import os
+import sys
 import pandas as pd
 
-# Configuración de conexión a SQL Server
-SERVER = '186.10.95.240'  # Reemplaza con el nombre de tu servidor
-DATABASE = 'tasa_entel_srv'  # Reemplaza con el nombre de tu base de datos
-USERNAME = 'tasa_entel_usr'  # Reemplaza con tu usuario
-PASSWORD = 't4s43nt3l'  # Reemplaza con tu contraseña
+# Añadir la raíz del repositorio al PATH para importar sql_extract
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-# Consulta SQL para obtener el stock actual
+from demand_forecasting_project.src.data.sql_extract import query_to_parquet
+
+STOCK_DATA_PATH = "Stock_Optimization/Data/stock_data.csv"
+STOCK_PARQUET_PATH = "Stock_Optimization/Data/stock_data.parquet"
+
+# Consulta SQL para obtener el stock actual (también la usa stock_pipeline)
 QUERY = """
 SELECT KOPR as 'Product_Code', STFI1 AS 'Stock'
 FROM MAEPR
 WHERE RUPR IN ('R10', 'R20') AND TIPR = 'FPN'
 """
 
-def get_stock_data():
+def get_stock_data(pool=None, parquet_path=STOCK_PARQUET_PATH):
     """
-    Conecta a SQL Server, ejecuta la consulta y retorna los datos en un DataFrame.
+    Descarga el stock por bloques a parquet_path (sql_extract.query_to_parquet) y lo
+    retorna en un DataFrame.
     """
     try:
-        # Establecer la conexión
-        connection = pyodbc.connect(
-            f"DRIVER={{SQL Server}};SERVER={SERVER};DATABASE={DATABASE};UID={USERNAME};PWD={PASSWORD}"
-        )
-        print("Conexión a SQL Server exitosa.")
-
-        # Ejecutar la consulta y cargar los datos en un DataFrame
-        stock_data = pd.read_sql_query(QUERY, connection)
-        connection.close()
-        print("Consulta ejecutada y conexión cerrada.")
+        query_to_parquet(QUERY, parquet_path, pool=pool)
+        stock_data = pd.read_parquet(parquet_path)
+        print("Consulta de stock ejecutada.")
         
         # Mostrar las primeras filas como verificación
         print(stock_data.head())
@@ -38,9 +35,13 @@ def get_stock_data():
         print(f"Error al conectarse a SQL Server o ejecutar la consulta: {e}")
         return None
 
+def save_stock_data(stock_data, output_path=STOCK_DATA_PATH):
+    stock_data.to_csv(output_path, index=False)
+    print("Datos de stock guardados en 'stock_data.csv'.")
+    return stock_data
+
 if __name__ == "__main__":
     stock_data = get_stock_data()
     if stock_data is not None:
         # Guardar los datos en un CSV (opcional)
-        stock_data.to_csv("Stock_Optimization/Data/stock_data.csv", index=False)
-        print("Datos de stock guardados en 'stock_data.csv'.")
+        save_stock_data(stock_data)
@@ -1,31 +1,170 @@
-import pandas as pd
+"""
+Partición de los datos procesados por Super Familia.
+
+Un solo groupby reparte processed_data en un dataset Parquet particionado al estilo Hive:
 
+    data/processed/super_family_dataset/Super Familia=INVIERNO/part-0.parquet
+    data/processed/super_family_dataset/Super Familia=HILOS%20VERANO/part-0.parquet
+    ...
 
-# Cargar el archivo processed_data.csv
+(el valor va codificado como URI, igual que pyarrow.dataset con partitioning='hive').
+Los pronósticos leen sólo su partición y sólo las columnas que usan con
+read_super_family. Una Super Familia nueva en los datos genera su partición sin cambios
+de código (super_families() lista las existentes). También se escriben los CSV
+processed_data_<super familia>.csv de siempre para los scripts de análisis.
+"""
 import os
+import shutil
+import sys
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Añadir la raíz del repositorio al PATH para importar excel_cache y schema
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from demand_forecasting_project.src.data.excel_cache import normalize_types
+from demand_forecasting_project.src.data.schema import read_artifact
 
 # Ajustar la ruta al archivo con base en la ubicación del script
 file_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\processed\processed_data.csv'
-processed_data = pd.read_csv(file_path)
-
-# Confirmar columnas disponibles
-columns = processed_data.columns.tolist()
-
-# Inspeccionar valores únicos de la columna Super_Family
-super_families = processed_data['Super Familia'].unique()
-
-# Dividir los datos por Super_Family
-processed_data_groups = {}
-for super_family in super_families:
-    filtered_data = processed_data[processed_data['Super Familia'] == super_family]
-    processed_data_groups[super_family] = filtered_data
-    # Guardar cada subconjunto en un archivo CSV separado
-    output_file = f'demand_forecasting_project/data/processed/processed_data_{super_family.lower()}.csv'
-    filtered_data.to_csv(output_file, index=False)
-
-# Resumen del proceso
-{
-    "columnas_disponibles": columns,
-    "super_familias_encontradas": list(super_families),
-    "archivos_generados": [f"processed_data_{sf.lower()}.csv" for sf in super_families]
-}
\ No newline at end of file
+output_dir = 'demand_forecasting_project/data/processed'
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATASET_DIR = os.path.join(PROJECT_DIR, 'data', 'processed', 'super_family_dataset')
+PARTITION_COL = 'Super Familia'
+PART_FILENAME = 'part-0.parquet'
+
+# Categorías a pronosticar (categoría -> Super Familia de los datos procesados). Agregar aquí las nuevas.
+CATEGORIES = {
+    'Invierno': 'INVIERNO',
+    'Verano': 'HILOS VERANO',
+    'Bebé': 'BEBÉ'
+}
+# Nombre de la Super Familia en los resultados (Consolidated_forecast, merged2, índice de
+# jerarquía y dashboards) cuando no es el de su categoría
+CATEGORY_LABELS = {'Verano': 'Hilos Verano'}
+
+
+def category_label(category):
+    """Nombre de la Super Familia de una categoría en los resultados."""
+    return CATEGORY_LABELS.get(category, category)
+
+
+def super_family_labels():
+    """Super Familia de los datos -> nombre en los resultados, para las categorías pronosticadas."""
+    return {super_family: category_label(category) for category, super_family in CATEGORIES.items()}
+
+
+def group_filename(super_family):
+    """Nombre del CSV de una Super Familia (el que leen los scripts de análisis)."""
+    return f'processed_data_{super_family.lower()}.csv'
+
+
+def partition_path(super_family, dataset_dir=DATASET_DIR):
+    """Archivo Parquet de la partición de una Super Familia."""
+    return os.path.join(dataset_dir, f'{PARTITION_COL}={quote(str(super_family), safe="")}', PART_FILENAME)
+
+
+def super_families(dataset_dir=DATASET_DIR):
+    """Super Familias con partición en el dataset."""
+    if not os.path.isdir(dataset_dir):
+        return []
+    prefix = f'{PARTITION_COL}='
+    return sorted(unquote(name[len(prefix):]) for name in os.listdir(dataset_dir) if name.startswith(prefix))
+
+
+def write_partitions(groups, dataset_dir=DATASET_DIR):
+    """
+    Escribe una partición por Super Familia en una carpeta nueva y la deja en lugar de
+    la anterior (las Super Familias que ya no están desaparecen del dataset).
+    """
+    tmp_dir = f'{dataset_dir}.tmp'
+    old_dir = f'{dataset_dir}.old'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for super_family, data in groups.items():
+        path = partition_path(super_family, tmp_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data.drop(columns=PARTITION_COL).to_parquet(path, index=False)
+
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(dataset_dir):
+        os.replace(dataset_dir, old_dir)
+    os.replace(tmp_dir, dataset_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_super_family(super_family, columns=None, dataset_dir=DATASET_DIR):
+    """
+    Datos procesados de una Super Familia, leídos sólo desde su partición.
+
+    Args:
+        columns (list): columnas a leer (None = todas). La columna 'Super Familia' no se
+            guarda en los archivos: se agrega con el valor de la partición.
+
+    Returns:
+        pd.DataFrame (si no hay dataset todavía, se lee el CSV processed_data_<sf>.csv)
+    """
+    path = partition_path(super_family, dataset_dir)
+    file_columns = None if columns is None else [col for col in columns if col != PARTITION_COL]
+    if os.path.exists(path):
+        data = pq.read_table(path, columns=file_columns).to_pandas()
+    else:
+        data = pd.read_csv(os.path.join(output_dir, group_filename(super_family)), usecols=file_columns)
+    if columns is None or PARTITION_COL in columns:
+        data[PARTITION_COL] = super_family
+    return data
+
+
+def _drop_unused_categories(data):
+    data = data.copy()
+    for col in data.columns[data.dtypes == 'category']:
+        data[col] = data[col].cat.remove_unused_categories()
+    return data
+
+
+def split_by_super_family(processed_data=None, dataset_dir=DATASET_DIR, legacy_csv=True):
+    """
+    Divide los datos procesados por Super Familia en una pasada (groupby) y escribe el
+    dataset particionado.
+
+    Args:
+        processed_data (pd.DataFrame): salida del DataProcessor. Si no se entrega se lee
+            processed_data.csv.
+        legacy_csv (bool): escribir también un CSV por Super Familia en output_dir
+
+    Returns:
+        dict: Super Familia -> DataFrame
+    """
+    if processed_data is None:
+        processed_data = read_artifact(file_path, 'processed_data')
+
+    # Tipos consistentes para Parquet (códigos numéricos y alfanuméricos en la misma columna)
+    processed_data = normalize_types(processed_data)
+
+    # Dividir los datos por Super_Family. Con claves categóricas (schema) cada grupo
+    # conserva sólo las categorías que usa: un groupby posterior por Familia no debe
+    # traer las Familias de otras Super Familias
+    processed_data_groups = {
+        super_family: _drop_unused_categories(data)
+        for super_family, data in processed_data.groupby(PARTITION_COL, sort=False, observed=True)
+    }
+    write_partitions(processed_data_groups, dataset_dir)
+
+    if legacy_csv:
+        for super_family, filtered_data in processed_data_groups.items():
+            filtered_data.to_csv(os.path.join(output_dir, group_filename(super_family)), index=False)
+
+    # Resumen del proceso
+    print({
+        "columnas_disponibles": processed_data.columns.tolist(),
+        "super_familias_encontradas": list(processed_data_groups),
+        "dataset": dataset_dir,
+        "archivos_generados": [group_filename(sf) for sf in processed_data_groups] if legacy_csv else [],
+    })
+    return processed_data_groups
+
+
+if __name__ == "__main__":
+    split_by_super_family()
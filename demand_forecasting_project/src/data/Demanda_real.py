@@ -1,38 +1,56 @@
-import pyodbc
+import os
+import sys
 import pandas as pd
 
-# Configuración de conexión a SQL Server
-SERVER = '186.10.95.240'  # Reemplaza con el nombre de tu servidor
-DATABASE = 'tasa_entel_srv'  # Reemplaza con el nombre de tu base de datos
-USERNAME = 'tasa_entel_usr'  # Reemplaza con tu usuario
-PASSWORD = 't4s43nt3l'  # Reemplaza con tu contraseña
+# Añadir la raíz del repositorio al PATH para importar sql_extract
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
-# Consulta SQL para obtener el stock actual
-QUERY = """
-SELECT DATEFROMPARTS(YEAR(dbo.MAEDDO.FEEMLI), MONTH(dbo.MAEDDO.FEEMLI), 1) AS 'Fecha', SUM(dbo.MAEDDO.CAPRCO1) AS Demanda, dbo.MAEDDO.UD01PR AS unidad, dbo.MAEPR.KOPR AS codigoProducto, 
+from demand_forecasting_project.src.data.sql_extract import default_pool, query_to_parquet
+
+DEMAND_DATA_PATH = "demand_forecasting_project/data/input/demand_data.csv"
+DEMAND_PARQUET_PATH = "demand_forecasting_project/data/input/demand_data.parquet"
+
+# Ventana de la demanda
+START_DATE = '2022-01-01'
+END_DATE = '2025-12-31'
+
+# Primer día del mes de FEEMLI según el motor (SQLite sólo en pruebas, ver sql_extract)
+MONTH_EXPR = {
+    'sqlserver': "DATEFROMPARTS(YEAR(dbo.MAEDDO.FEEMLI), MONTH(dbo.MAEDDO.FEEMLI), 1)",
+    'sqlite': "date(dbo.MAEDDO.FEEMLI, 'start of month')",
+}
+
+# Consulta SQL para obtener la demanda mensual por producto
+QUERY_TEMPLATE = """
+SELECT {month} AS 'Fecha', SUM(dbo.MAEDDO.CAPRCO1) AS Demanda, dbo.MAEDDO.UD01PR AS unidad, dbo.MAEPR.KOPR AS codigoProducto, 
                   dbo.MAEPR.NOKOPR AS producto, dbo.MAEPR.KOGE AS codigoGenerico, dbo.MAEPR.RUPR AS RUBRO
 FROM     dbo.MAEDDO INNER JOIN
                   dbo.MAEPR ON dbo.MAEDDO.KOPRCT = dbo.MAEPR.KOPR
-WHERE  (dbo.MAEDDO.FEEMLI BETWEEN '2022-01-01' AND '2025-12-31') AND (dbo.MAEDDO.TIDO = 'FCV') AND (dbo.MAEDDO.TIPR = 'FPN')
-GROUP BY DATEFROMPARTS(YEAR(dbo.MAEDDO.FEEMLI), MONTH(dbo.MAEDDO.FEEMLI), 1), dbo.MAEDDO.UD01PR, dbo.MAEDDO.TIDO, dbo.MAEPR.KOPR, dbo.MAEPR.NOKOPR, dbo.MAEPR.KOGE, dbo.MAEPR.UD01PR, dbo.MAEPR.RUPR
+WHERE  (dbo.MAEDDO.FEEMLI BETWEEN ? AND ?) AND (dbo.MAEDDO.TIDO = 'FCV') AND (dbo.MAEDDO.TIPR = 'FPN')
+GROUP BY {month}, dbo.MAEDDO.UD01PR, dbo.MAEDDO.TIDO, dbo.MAEPR.KOPR, dbo.MAEPR.NOKOPR, dbo.MAEPR.KOGE, dbo.MAEPR.UD01PR, dbo.MAEPR.RUPR
 """
 
-def get_demand_data():
+
+def demand_query(start=START_DATE, end=END_DATE, dialect='sqlserver'):
+    """Consulta de demanda entre start y end, y sus parámetros."""
+    return QUERY_TEMPLATE.format(month=MONTH_EXPR[dialect]), (start, end)
+
+
+QUERY, QUERY_PARAMS = demand_query()
+
+
+def get_demand_data(pool=None, parquet_path=DEMAND_PARQUET_PATH):
     """
-    Conecta a SQL Server, ejecuta la consulta y retorna los datos en un DataFrame.
+    Descarga la demanda por bloques a parquet_path (sql_extract.query_to_parquet) y la
+    retorna en un DataFrame, con los textos sin espacios y Fecha como fecha.
     """
     try:
-        # Establecer la conexión
-        connection = pyodbc.connect(
-            f"DRIVER={{SQL Server}};SERVER={SERVER};DATABASE={DATABASE};UID={USERNAME};PWD={PASSWORD}"
-        )
-        print("Conexión a SQL Server exitosa.")
-
-        # Ejecutar la consulta y cargar los datos en un DataFrame
-        demand_data = pd.read_sql_query(QUERY, connection)
-        connection.close()
-        print("Consulta ejecutada y conexión cerrada.")
-        
+        pool = pool or default_pool()
+        query, params = demand_query(dialect=pool.dialect)
+        query_to_parquet(query, parquet_path, params=params, pool=pool, parse_dates=['Fecha'], strip=True)
+        demand_data = pd.read_parquet(parquet_path)
+        print("Consulta de demanda ejecutada.")
+
         # Mostrar las primeras filas como verificación
         print(demand_data.head())
         
@@ -41,12 +59,17 @@ def get_demand_data():
         print(f"Error al conectarse a SQL Server o ejecutar la consulta: {e}")
         return None
 
+def save_demand_data(demand_data, output_path=DEMAND_DATA_PATH):
+    """Limpia los espacios de las columnas de texto y guarda demand_data.csv."""
+    for column in demand_data.select_dtypes(include=["object"]).columns:
+        demand_data[column] = demand_data[column].str.strip()
+
+    demand_data.to_csv(output_path, index=False)
+    print("Datos de demand guardados en 'demand_data.csv'.")
+    return demand_data
+
 if __name__ == "__main__":
     demand_data = get_demand_data()
     if demand_data is not None:
         # Guardar los datos en un CSV (opcional)
-        for column in demand_data.select_dtypes(include=["object"]).columns:
-            demand_data[column] = demand_data[column].str.strip()
-
-        demand_data.to_csv("demand_forecasting_project/data/input/demand_data.csv", index=False)
-        print("Datos de demand guardados en 'demand_data.csv'.")
+        save_demand_data(demand_data)
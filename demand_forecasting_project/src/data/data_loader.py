@@ -1,18 +1,38 @@
+import argparse
 import os
+import sys
+import tracemalloc
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
+
+# Añadir la raíz del repositorio al PATH para importar excel_cache
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from demand_forecasting_project.src.data.excel_cache import read_excel_cached
+
+# Extensiones que se pueden leer por partes (chunks)
+CHUNKED_EXTENSIONS = ('.csv', '.parquet')
+
+REQUIRED_COLUMNS = ['Date', 'Product_Code', 'Sales']
+MIN_YEAR = 2020
+
 
 class DataLoader:
-    def __init__(self, raw_data_path):
+    def __init__(self, raw_data_path, date_format='%Y-%m-%d'):
         """
         Inicializa el DataLoader con la ruta a los datos crudos.
-        
+
         Args:
             raw_data_path (str): Ruta al directorio que contiene los archivos de datos
+            date_format (str): Formato explícito de la columna de fecha cuando viene como texto.
+                Las fechas que no calzan con él se leen con el formato inferido por fila.
         """
         self.raw_data_path = os.path.abspath(raw_data_path)
+        self.date_format = date_format
+        self.last_load_stats = None
         print(f"DataLoader inicializado con ruta: {self.raw_data_path}")
-        
+
         # Define mapeos de columnas posibles para manejar diferentes formatos de entrada
         self.column_mappings = [
             {'Fecha': 'Date', 'Codigo Producto': 'Product_Code', 'Venta': 'Sales'},
@@ -20,54 +40,186 @@ class DataLoader:
             {'Fecha': 'Date', 'codigoProducto': 'Product_Code', 'Demanda': 'Sales'}
         ]
 
-    def load_data(self, filename):
+    def _get_file_path(self, filename):
+        file_path = os.path.join(self.raw_data_path, filename)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"No se encontró el archivo: {file_path}")
+        return file_path
+
+    def detect_column_mapping(self, columns):
+        """
+        Elige el mapeo de columnas a partir de los nombres del encabezado (sin leer datos).
+
+        Returns:
+            dict: el primer mapeo de self.column_mappings con el que quedan Date, Product_Code y Sales
+        """
+        for mapping in self.column_mappings:
+            renamed = [mapping.get(col, col) for col in columns]
+            if all(col in renamed for col in REQUIRED_COLUMNS):
+                return mapping
+        raise ValueError("No se pudo mapear las columnas del archivo a los nombres requeridos")
+
+    def read_header(self, filename):
+        """Nombres de columna del archivo (CSV: sólo la primera línea; Parquet: el esquema)."""
+        file_path = self._get_file_path(filename)
+        file_extension = os.path.splitext(filename)[1].lower()
+        if file_extension == '.csv':
+            return list(pd.read_csv(file_path, nrows=0).columns)
+        if file_extension == '.parquet':
+            return list(pq.ParquetFile(file_path).schema_arrow.names)
+        raise ValueError(f"Tipo de archivo no soportado para lectura por partes: {file_extension}")
+
+    def _parse_dates(self, dates, date_counts):
+        """
+        Fechas con self.date_format; las que no calzan (p.ej. '2024-01-01 00:00:00' o
+        '01/03/2024') se vuelven a leer con el formato inferido por fila. Suma en
+        date_counts las fechas inferidas y las que quedan inválidas (NaT).
+        """
+        parsed = pd.to_datetime(dates, format=self.date_format, errors='coerce')
+        failed = parsed.isna() & dates.notna()
+        if failed.any():
+            parsed[failed] = pd.to_datetime(dates[failed], format='mixed', errors='coerce')
+            date_counts['inferred'] += int(failed.sum())
+            date_counts['invalid'] += int((parsed.isna() & dates.notna()).sum())
+        return parsed
+
+    def _type_chunk(self, chunk, mapping, date_counts):
+        """Renombra, tipa Date y Sales y filtra años >= MIN_YEAR."""
+        chunk = chunk.rename(columns=mapping)
+
+        if not pd.api.types.is_datetime64_any_dtype(chunk['Date']):
+            chunk['Date'] = self._parse_dates(chunk['Date'], date_counts)
+        chunk = chunk[chunk['Date'].dt.year >= MIN_YEAR]  # NaT queda fuera
+
+        return chunk.assign(Sales=pd.to_numeric(chunk['Sales'], errors='coerce'))
+
+    @staticmethod
+    def _report_dates(filename, date_counts):
+        if date_counts['inferred']:
+            print(f"Advertencia: {date_counts['inferred']} fechas de {filename} no calzan con el formato "
+                  f"esperado y se leyeron con el formato inferido; {date_counts['invalid']} de ellas "
+                  f"son inválidas y sus filas se descartaron")
+
+    def iter_chunks(self, filename, chunksize=200_000, columns=None, track_memory=False):
+        """
+        Lee un CSV o Parquet por partes y entrega cada parte ya renombrada, tipada
+        (Date datetime64, Product_Code texto en CSV, Sales float) y filtrada a años >= 2020.
+
+        El mapeo de columnas se detecta una sola vez desde el encabezado. Al terminar se
+        guarda en self.last_load_stats el número de partes y filas, las fechas leídas con
+        el formato inferido o descartadas por inválidas y, con track_memory, la memoria
+        máxima (tracemalloc) usada mientras se consumían las partes.
+
+        Args:
+            filename (str): Nombre del archivo a cargar
+            chunksize (int): Filas por parte
+            columns (list): Columnas adicionales a leer, con su nombre original
+                (None = todas). Date, Product_Code y Sales se leen siempre.
+            track_memory (bool): Medir la memoria máxima con tracemalloc (agrega costo a
+                cada asignación; para benchmarks y reportes, no para la carga normal)
+
+        Yields:
+            pd.DataFrame: cada parte procesada (se omiten las que quedan vacías)
+        """
+        file_path = self._get_file_path(filename)
+        file_extension = os.path.splitext(filename)[1].lower()
+
+        header = self.read_header(filename)
+        mapping = self.detect_column_mapping(header)
+        source = {mapping.get(col, col): col for col in header}  # nombre final -> original
+        if columns is not None:
+            columns = list(dict.fromkeys([source[col] for col in REQUIRED_COLUMNS] + list(columns)))
+
+        if file_extension == '.csv':
+            reader = pd.read_csv(
+                file_path, usecols=columns, chunksize=chunksize,
+                dtype={source['Product_Code']: str}
+            )
+        else:
+            reader = (
+                batch.to_pandas()
+                for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns)
+            )
+
+        started_tracing = track_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if track_memory:
+            tracemalloc.reset_peak()
+
+        n_chunks, n_rows = 0, 0
+        date_counts = {'inferred': 0, 'invalid': 0}
+        try:
+            for chunk in reader:
+                chunk = self._type_chunk(chunk, mapping, date_counts)
+                if chunk.empty:
+                    continue
+                n_chunks += 1
+                n_rows += len(chunk)
+                yield chunk
+        finally:
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6 if track_memory else None
+            if started_tracing:
+                tracemalloc.stop()
+
+        self.last_load_stats = {'chunks': n_chunks, 'rows': n_rows, 'inferred_dates': date_counts['inferred'],
+                                'invalid_dates': date_counts['invalid'], 'peak_memory_mb': peak_mb}
+        print(f"Leídas {n_rows} filas de {filename} en {n_chunks} partes")
+        self._report_dates(filename, date_counts)
+        if peak_mb is not None:
+            print(f"Memoria máxima durante la lectura: {peak_mb:.1f} MB")
+
+    def load_data(self, filename, chunksize=200_000):
         """
         Carga y procesa los datos del archivo especificado.
-        
+
+        Los CSV y Parquet se leen por partes con iter_chunks; los Excel se leen completos
+        desde su snapshot Parquet (excel_cache).
+
         Args:
             filename (str): Nombre del archivo a cargar
-            
+            chunksize (int): Filas por parte (CSV/Parquet)
+
         Returns:
             pd.DataFrame: DataFrame con los datos procesados
         """
         # Construir la ruta completa al archivo
-        file_path = os.path.join(self.raw_data_path, filename)
+        file_path = self._get_file_path(filename)
         print(f"Intentando cargar archivo: {file_path}")
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"No se encontró el archivo: {file_path}")
-            
+
         # Determinar el tipo de archivo y leer
         file_extension = os.path.splitext(filename)[1].lower()
         try:
-            if file_extension == '.xlsx':
-                data = pd.read_excel(file_path)
-            elif file_extension == '.csv':
-                data = pd.read_csv(file_path)
+            if file_extension in CHUNKED_EXTENSIONS:
+                chunks = list(self.iter_chunks(filename, chunksize=chunksize))
+                if not chunks:
+                    raise ValueError(f"El archivo {filename} no tiene datos desde {MIN_YEAR}")
+                data_mapped = pd.concat(chunks, ignore_index=True)
+            elif file_extension == '.xlsx':
+                data = read_excel_cached(file_path)
+                date_counts = {'inferred': 0, 'invalid': 0}
+                data_mapped = self._type_chunk(data, self.detect_column_mapping(data.columns), date_counts)
+                self._report_dates(filename, date_counts)
             else:
                 raise ValueError(f"Tipo de archivo no soportado: {file_extension}")
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error al leer el archivo {filename}: {str(e)}")
 
-        # Intentar diferentes mapeos de columnas
-        data_mapped = None
-        for mapping in self.column_mappings:
-            try:
-                data_temp = data.rename(columns=mapping)
-                if all(col in data_temp.columns for col in ['Date', 'Product_Code', 'Sales']):
-                    data_mapped = data_temp
-                    break
-            except:
-                continue
-        
-        if data_mapped is None:
-            raise ValueError("No se pudo mapear las columnas del archivo a los nombres requeridos")
-
-        # Procesar fechas
-        data_mapped['Date'] = pd.to_datetime(data_mapped['Date'], errors='coerce')
-        data_mapped = data_mapped.dropna(subset=['Date'])
-        data_mapped = data_mapped[data_mapped['Date'].dt.year >= 2020]
-
         print(f"Datos cargados exitosamente de {filename}")
         print(f"Dimensiones del DataFrame: {data_mapped.shape}")
-        return data_mapped
\ No newline at end of file
+        return data_mapped
+
+
+if __name__ == "__main__":
+    # Reporte de una lectura por partes: filas, fechas inferidas/inválidas y memoria máxima
+    parser = argparse.ArgumentParser(description="Lectura por partes de un CSV o Parquet con su memoria máxima.")
+    parser.add_argument("path", help="Archivo CSV o Parquet a leer.")
+    parser.add_argument("--chunksize", type=int, default=200_000, help="Filas por parte.")
+    args = parser.parse_args()
+
+    loader = DataLoader(os.path.dirname(os.path.abspath(args.path)))
+    for _ in loader.iter_chunks(os.path.basename(args.path), chunksize=args.chunksize, track_memory=True):
+        pass
+    print(loader.last_load_stats)
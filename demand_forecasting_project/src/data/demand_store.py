@@ -0,0 +1,192 @@
+"""
+Almacén local de la demanda mensual con descarga incremental (marca de agua).
+
+En vez de reagregar MAEDDO para toda la ventana 2022–2025 en cada actualización, la
+demanda se guarda en un Parquet por mes:
+
+    data/input/demand_store/2024-05.parquet, 2024-06.parquet, ...
+    data/input/demand_store/_watermark.json    ({"last_month": "2024-06-01", ...})
+
+update_demand_store pide al servidor sólo los meses desde la marca de agua (el último
+mes cargado, que puede seguir abierto y se vuelve a pedir) y reemplaza esos meses en el
+almacén (upsert por mes). Sin marca de agua hace la carga completa desde START_DATE. El
+tiempo de una actualización depende de los meses nuevos, no de la historia completa.
+
+Uso:
+    python demand_store.py                  # actualización incremental
+    python demand_store.py --full           # recarga completa
+    python demand_store.py --sqlite /tmp/standin.db   # prueba contra SQLite (almacén temporal
+                                                      # junto a la base, nunca el real)
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+# Añadir la raíz del repositorio al PATH para importar Demanda_real y sql_extract
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from demand_forecasting_project.src.data.Demanda_real import END_DATE, START_DATE, demand_query
+from demand_forecasting_project.src.data.sql_extract import default_pool, read_query
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STORE_DIR = os.path.join(PROJECT_DIR, 'data', 'input', 'demand_store')
+WATERMARK_FILE = '_watermark.json'
+
+
+def _month_path(store_dir, month):
+    return os.path.join(store_dir, f'{month:%Y-%m}.parquet')
+
+
+def read_watermark(store_dir=STORE_DIR):
+    """Primer día del último mes cargado (None si el almacén está vacío)."""
+    path = os.path.join(store_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return pd.Timestamp(json.load(f)['last_month'])
+
+
+def write_watermark(month, store_dir=STORE_DIR):
+    path = os.path.join(store_dir, WATERMARK_FILE)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'last_month': f'{month:%Y-%m-%d}',
+                   'updated_at': datetime.now().isoformat(timespec='seconds')}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def stored_months(store_dir=STORE_DIR):
+    """Meses presentes en el almacén (primer día de cada mes), ordenados."""
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(
+        pd.Timestamp(f'{name[:-len(".parquet")]}-01') for name in os.listdir(store_dir)
+        if name.endswith('.parquet') and not name.startswith(('.', '_'))
+    )
+
+
+def update_demand_store(pool=None, store_dir=STORE_DIR, full=False, end=END_DATE):
+    """
+    Descarga los meses desde la marca de agua y los reemplaza en el almacén.
+
+    Args:
+        pool (ConnectionPool): pool de sql_extract (por defecto SQL Server)
+        full (bool): ignorar la marca de agua y recargar desde START_DATE
+        end (str): último día de la ventana de demanda
+
+    Returns:
+        dict: start (primer mes pedido), months (meses escritos), rows y watermark
+    """
+    pool = pool or default_pool()
+    watermark = None if full else read_watermark(store_dir)
+    start = watermark if watermark is not None else pd.Timestamp(START_DATE)
+
+    query, params = demand_query(start=f'{start:%Y-%m-%d}', end=end, dialect=pool.dialect)
+    demand = read_query(query, params=params, pool=pool, parse_dates=['Fecha'], strip=True)
+    print(f"Demanda desde {start:%Y-%m}: {len(demand)} filas.")
+
+    os.makedirs(store_dir, exist_ok=True)
+    written = []
+    for month, month_data in demand.groupby('Fecha', sort=True):
+        path = _month_path(store_dir, month)
+        tmp_path = os.path.join(store_dir, f'.{os.path.basename(path)}.tmp')
+        month_data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        written.append(month)
+
+    # Meses del rango pedido que ya no tienen ventas (p.ej. documentos anulados)
+    for month in stored_months(store_dir):
+        if month >= start and month not in written:
+            os.remove(_month_path(store_dir, month))
+
+    new_watermark = max(written) if written else watermark
+    if new_watermark is not None:
+        write_watermark(new_watermark, store_dir)
+    print(f"Almacén de demanda actualizado: {len(written)} meses, marca de agua {new_watermark}.")
+    return {'start': start, 'months': written, 'rows': len(demand), 'watermark': new_watermark}
+
+
+def load_demand_store(store_dir=STORE_DIR):
+    """Toda la demanda del almacén en un DataFrame (mismas columnas que Demanda_real)."""
+    files = [_month_path(store_dir, month) for month in stored_months(store_dir)]
+    if not files:
+        raise FileNotFoundError(f"El almacén de demanda está vacío: {store_dir}")
+    return pd.concat((pd.read_parquet(path) for path in files), ignore_index=True)
+
+
+def check_sqlite(path, store_dir):
+    """
+    Carga completa, agrega ventas al mes abierto y al siguiente en la base SQLite,
+    actualiza en forma incremental y compara el almacén con una consulta completa.
+
+    store_dir se sobrescribe con datos sintéticos: no puede ser el almacén real (STORE_DIR).
+    """
+    if os.path.abspath(store_dir) == os.path.abspath(STORE_DIR):
+        raise ValueError(f"La prueba con SQLite no puede usar el almacén real: {STORE_DIR}")
+
+    import sqlite3
+
+    import numpy as np
+    from demand_forecasting_project.src.data.sql_extract import (
+        ConnectionPool, create_sqlite_standin, sqlite_connect,
+    )
+
+    create_sqlite_standin(path, end='2024-06-15')
+    pool = ConnectionPool(sqlite_connect(path))
+    update_demand_store(pool, store_dir, full=True)
+    assert read_watermark(store_dir) == pd.Timestamp('2024-06-01')
+
+    with sqlite3.connect(path) as connection:
+        codes = pd.read_sql_query("SELECT KOPR FROM MAEPR", connection)['KOPR']
+        days = pd.date_range('2024-06-16', '2024-07-20', freq='D')
+        rng = np.random.default_rng(1)
+        pd.DataFrame({
+            'FEEMLI': np.repeat(days, 50).strftime('%Y-%m-%d 00:00:00'),
+            'KOPRCT': rng.choice(codes, len(days) * 50),
+            'CAPRCO1': rng.gamma(1.5, 4.0, len(days) * 50).round(3),
+            'UD01PR': 'KG', 'TIDO': 'FCV', 'TIPR': 'FPN',
+        }).to_sql('MAEDDO', connection, index=False, if_exists='append')
+    connection.close()
+
+    result = update_demand_store(pool, store_dir)
+    assert result['start'] == pd.Timestamp('2024-06-01')
+    assert [f'{m:%Y-%m}' for m in result['months']] == ['2024-06', '2024-07']
+
+    query, params = demand_query(dialect='sqlite')
+    connection = sqlite_connect(path)()
+    expected = pd.read_sql_query(query, connection, params=params)
+    connection.close()
+    stored = load_demand_store(store_dir)
+    key = ['Fecha', 'codigoProducto', 'unidad']
+    expected['Fecha'] = pd.to_datetime(expected['Fecha'])
+    expected['codigoProducto'] = expected['codigoProducto'].str.strip()
+    merged = stored.merge(expected, on=key, suffixes=('', '_full'), how='outer', indicator=True)
+    assert (merged['_merge'] == 'both').all()
+    assert np.allclose(merged['Demanda'], merged['Demanda_full'])
+    print(f"Almacén incremental idéntico a la carga completa ({len(stored)} filas).")
+    pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualización incremental de la demanda.")
+    parser.add_argument("--full", action="store_true", help="Recargar toda la ventana de demanda.")
+    parser.add_argument("--sqlite", default=None, help="Probar contra esta base SQLite (se recrea).")
+    parser.add_argument("--store", default=None,
+                        help="Carpeta del almacén (por defecto STORE_DIR; con --sqlite, una temporal).")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        if args.store and os.path.abspath(args.store) == os.path.abspath(STORE_DIR):
+            parser.error("--sqlite no puede usar el almacén real; indica otra carpeta con --store")
+        database_dir = os.path.dirname(os.path.abspath(args.sqlite))
+        os.makedirs(database_dir, exist_ok=True)
+        store_dir = args.store or tempfile.mkdtemp(prefix='demand_store_', dir=database_dir)
+        print(f"Almacén de prueba: {store_dir}")
+        check_sqlite(args.sqlite, store_dir)
+    else:
+        update_demand_store(store_dir=args.store or STORE_DIR, full=args.full)
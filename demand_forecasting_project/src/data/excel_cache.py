@@ -0,0 +1,139 @@
+"""
+Snapshot binario (Parquet) de archivos Excel para lecturas repetidas rápidas.
+
+data.xlsx y los Excel de input se parsean con openpyxl en varios scripts (hierarchy_map,
+run_processor2, Top_Down...). read_excel_cached parsea el Excel sólo la primera vez,
+guarda un Parquet tipado junto a él y desde ahí sirve las lecturas desde el Parquet:
+
+    data/input/.excel_cache/data.parquet
+    data/input/.excel_cache/data.meta.json    (mtime, tamaño y sha256 del Excel)
+
+El snapshot se invalida cuando cambia el Excel: si mtime y tamaño coinciden se usa
+directamente; si no, se compara el sha256 (un Excel sólo "tocado" no se vuelve a parsear).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+CACHE_DIRNAME = '.excel_cache'
+
+# Un lock por snapshot: dos pasos del DAG que leen el mismo Excel a la vez (p.ej.
+# hierarchy y processor con data.xlsx) lo parsean una sola vez
+_snapshot_locks = {}
+_snapshot_locks_lock = threading.Lock()
+
+
+def file_sha256(path, block_size=1 << 20):
+    """sha256 del archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _snapshot_paths(excel_path, sheet_name, cache_dir):
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(excel_path)), CACHE_DIRNAME)
+    name = os.path.splitext(os.path.basename(excel_path))[0]
+    if sheet_name != 0:
+        name = f'{name}__{sheet_name}'
+    return os.path.join(cache_dir, f'{name}.parquet'), os.path.join(cache_dir, f'{name}.meta.json')
+
+
+def _snapshot_lock(snapshot_path):
+    with _snapshot_locks_lock:
+        return _snapshot_locks.setdefault(os.path.abspath(snapshot_path), threading.Lock())
+
+
+def _replace_atomic(path, write):
+    """Escribe con write(tmp_path) en un temporal propio de la carpeta de path y lo deja en su lugar."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_meta(meta_path, meta):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    _replace_atomic(meta_path, write)
+
+
+def normalize_types(df):
+    """
+    Tipos consistentes para Parquet: las columnas de texto con valores de distinto tipo
+    (p.ej. códigos numéricos y alfanuméricos en la misma columna) pasan a texto; los
+    vacíos se mantienen como NaN.
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        not_null = values.notna()
+        if values[not_null].map(type).nunique() > 1:
+            df[col] = values.where(~not_null, values.astype(str))
+    return df
+
+
+def read_excel_cached(excel_path, sheet_name=0, cache_dir=None, **read_excel_kwargs):
+    """
+    Igual que pd.read_excel(excel_path, sheet_name=...), pero servido desde un snapshot
+    Parquet mientras el Excel no cambie.
+
+    Args:
+        excel_path (str): Ruta al archivo Excel
+        sheet_name (str|int): Hoja a leer (una sola)
+        cache_dir (str): Carpeta de snapshots (por defecto .excel_cache junto al Excel)
+        **read_excel_kwargs: Argumentos extra para pd.read_excel (forman parte de la clave)
+
+    Returns:
+        pd.DataFrame
+    """
+    snapshot_path, meta_path = _snapshot_paths(excel_path, sheet_name, cache_dir)
+    with _snapshot_lock(snapshot_path):
+        return _read_excel_cached(excel_path, sheet_name, snapshot_path, meta_path, read_excel_kwargs)
+
+
+def _read_excel_cached(excel_path, sheet_name, snapshot_path, meta_path, read_excel_kwargs):
+    stat = os.stat(excel_path)
+    read_args = json.dumps(read_excel_kwargs, sort_keys=True, default=str)
+
+    meta = None
+    if os.path.exists(snapshot_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+
+    if meta is not None and meta.get('read_args') == read_args:
+        if meta['mtime'] == stat.st_mtime and meta['size'] == stat.st_size:
+            return pd.read_parquet(snapshot_path)
+
+        sha256 = file_sha256(excel_path)
+        if meta['sha256'] == sha256:
+            # Mismo contenido con otra fecha de modificación: sólo se actualiza la metadata
+            meta.update(mtime=stat.st_mtime, size=stat.st_size)
+            _write_meta(meta_path, meta)
+            return pd.read_parquet(snapshot_path)
+    else:
+        sha256 = file_sha256(excel_path)
+
+    data = normalize_types(pd.read_excel(excel_path, sheet_name=sheet_name, **read_excel_kwargs))
+
+    # Temporales únicos (mkstemp): otro proceso puede estar escribiendo el mismo snapshot
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    _replace_atomic(snapshot_path, lambda tmp_path: data.to_parquet(tmp_path, index=False))
+    _write_meta(meta_path, {'source': os.path.abspath(excel_path), 'mtime': stat.st_mtime, 'size': stat.st_size,
+                            'sha256': sha256, 'read_args': read_args})
+    print(f"Snapshot Parquet de {os.path.basename(excel_path)} guardado en: {snapshot_path}")
+
+    return data
@@ -0,0 +1,232 @@
+"""
+Índice de la jerarquía de productos: Product_Code -> Family -> Super_Family.
+
+Reemplaza al dict por producto de hierarchy_mapping.json. Cada nivel se guarda como
+categorías (las Familias y Super Familias distintas, una vez cada una) y un arreglo de
+códigos enteros por producto:
+
+    products        ['1100AN1010022', '1100AN1010033', ...]   (pd.Index: búsqueda por hash)
+    family_codes    [0, 0, 3, ...]   -> families        ['Ukryl Etiqueta Dorada', ...]
+    super_codes     [1, 1, 1, ...]   -> super_families  ['CINTAS, ...', 'INVIERNO', ...]
+
+Se arma con pd.factorize (sin iterar filas), se guarda en un .npz comprimido y se
+consulta de dos formas: lookup(codigo) para un producto (O(1)) y map_column /
+annotate para una columna completa (un get_indexer y una indexación de arreglos).
+hierarchy_map.py lo escribe en el pipeline (con los nombres de Super Familia y Familia
+de los resultados) y merged_data y el dashboard de stock lo leen con
+load_hierarchy_index.
+
+Uso (comparación con el armado por iterrows):
+    python hierarchy_index.py --products 50000
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INDEX_PATH = os.path.join(PROJECT_DIR, 'data', 'hierarchy_index.npz')
+
+LEVELS = ('Family', 'Super_Family')
+
+
+def _code_dtype(n_categories):
+    """Entero más chico que alcanza para los códigos (-1 = sin dato)."""
+    return np.int16 if n_categories < np.iinfo(np.int16).max else np.int32
+
+
+class HierarchyIndex:
+    def __init__(self, products, families, super_families, family_codes, super_codes):
+        """
+        Args:
+            products: Códigos de producto (únicos)
+            families, super_families: Categorías de cada nivel
+            family_codes, super_codes: Posición de la Familia / Super Familia de cada producto
+        """
+        self.products = pd.Index(np.asarray(products, dtype=object), name='Product_Code')
+        self.categories = {
+            'Family': pd.Index(np.asarray(families, dtype=object)),
+            'Super_Family': pd.Index(np.asarray(super_families, dtype=object)),
+        }
+        self.codes = {
+            'Family': np.asarray(family_codes, dtype=_code_dtype(len(families))),
+            'Super_Family': np.asarray(super_codes, dtype=_code_dtype(len(super_families))),
+        }
+        if not self.products.is_unique:
+            raise ValueError("Los códigos de producto del índice deben ser únicos")
+
+    @classmethod
+    def from_frame(cls, data, product_col='Product_Code', family_col='Family', super_col='Super_Family'):
+        """
+        Índice desde una tabla con producto, Familia y Super Familia: descarta filas
+        incompletas y usa la primera aparición de cada producto.
+        """
+        data = data.dropna(subset=[product_col, family_col, super_col])
+        data = data.drop_duplicates(subset=product_col)
+        family_codes, families = pd.factorize(data[family_col])
+        super_codes, super_families = pd.factorize(data[super_col])
+        return cls(data[product_col].astype(str), families, super_families, family_codes, super_codes)
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """Índice desde el formato de hierarchy_mapping.json ({producto: {Family, Super_Family}})."""
+        data = pd.DataFrame.from_dict(mapping, orient='index')
+        data.index.name = 'Product_Code'
+        return cls.from_frame(data.reset_index())
+
+    def __len__(self):
+        return len(self.products)
+
+    def __contains__(self, product_code):
+        return product_code in self.products
+
+    def position(self, product_code):
+        """Posición del producto en el índice (-1 si no está)."""
+        try:
+            return self.products.get_loc(product_code)
+        except KeyError:
+            return -1
+
+    def lookup(self, product_code):
+        """{'Family': ..., 'Super_Family': ...} del producto (None si no está)."""
+        position = self.position(product_code)
+        if position < 0:
+            return None
+        return {level: self.categories[level][self.codes[level][position]] for level in LEVELS}
+
+    def positions(self, product_codes):
+        """Posición de cada código en el índice (-1 = no está), en un solo get_indexer."""
+        return self.products.get_indexer(pd.Index(product_codes, dtype=object).astype(str))
+
+    def map_column(self, product_codes, level='Family', positions=None):
+        """
+        Familia o Super Familia de cada código como pd.Categorical (NaN si el producto
+        no está en el índice).
+        """
+        positions = self.positions(product_codes) if positions is None else positions
+        codes = np.where(positions >= 0, self.codes[level][positions], -1)
+        return pd.Categorical.from_codes(codes, categories=self.categories[level])
+
+    def annotate(self, df, product_col='Product_Code', columns=None):
+        """
+        Copia de df con la Familia y la Super Familia de cada fila (join vectorizado por
+        product_col).
+
+        Args:
+            columns (dict): nivel -> nombre de la columna a agregar
+                (por defecto {'Family': 'Familia', 'Super_Family': 'SuperFamily'})
+        """
+        columns = columns or {'Family': 'Familia', 'Super_Family': 'SuperFamily'}
+        df = df.copy()
+        positions = self.positions(df[product_col])
+        for level, column in columns.items():
+            df[column] = self.map_column(None, level, positions=positions)
+        return df
+
+    def to_frame(self):
+        """Product_Code, Family y Super_Family (una fila por producto)."""
+        return pd.DataFrame({
+            'Product_Code': self.products.to_numpy(),
+            **{level: self.categories[level].to_numpy()[self.codes[level]] for level in LEVELS},
+        })
+
+    def to_mapping(self):
+        """Mapeo {producto: {'Family', 'Super_Family'}} (formato de hierarchy_mapping.json)."""
+        families = self.categories['Family'].to_numpy()[self.codes['Family']]
+        super_families = self.categories['Super_Family'].to_numpy()[self.codes['Super_Family']]
+        return {
+            product: {'Family': family, 'Super_Family': super_family}
+            for product, family, super_family in zip(self.products, families, super_families)
+        }
+
+    def save(self, path=INDEX_PATH):
+        """Guarda el índice en un .npz comprimido (reemplazo atómico)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                products=self.products.to_numpy(dtype=str),
+                families=self.categories['Family'].to_numpy(dtype=str),
+                super_families=self.categories['Super_Family'].to_numpy(dtype=str),
+                family_codes=self.codes['Family'],
+                super_codes=self.codes['Super_Family'],
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(arrays['products'], arrays['families'], arrays['super_families'],
+                       arrays['family_codes'], arrays['super_codes'])
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_hierarchy_index(path=INDEX_PATH):
+    """
+    Índice guardado en path, leído una vez por versión del archivo (mtime y tamaño) y
+    compartido dentro del proceso. None si el archivo no existe.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _loaded_lock:
+        if key not in _loaded:
+            _loaded.clear()
+            _loaded[key] = HierarchyIndex.load(path)
+        return _loaded[key]
+
+
+def make_synthetic_hierarchy(n_products=50_000, n_families=250, n_super_families=20, seed=0):
+    """Tabla producto / Familia / Super Familia para el benchmark."""
+    rng = np.random.default_rng(seed)
+    family = rng.integers(0, n_families, n_products)
+    return pd.DataFrame({
+        'Product_Code': [f'{i:05d}AN{i % 997:07d}' for i in range(n_products)],
+        'Family': [f'Familia {f}' for f in family],
+        'Super_Family': [f'SUPER {f % n_super_families}' for f in family],
+    })
+
+
+def benchmark(n_products=50_000, n_rows=500_000, path='hierarchy_index_benchmark.npz'):
+    """Armado y mapeo de una columna: iterrows + dict de hierarchy_mapping.json vs el índice."""
+    data = make_synthetic_hierarchy(n_products)
+    codes = pd.Series(np.random.default_rng(1).choice(data['Product_Code'], n_rows))
+
+    start = time.perf_counter()
+    mapping = {row['Product_Code']: {'Family': row['Family'], 'Super_Family': row['Super_Family']}
+               for _, row in data.iterrows()}
+    legacy_families = codes.map(lambda code: mapping[code]['Family'])
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = HierarchyIndex.from_frame(data)
+    families = index.map_column(codes, 'Family')
+    index_seconds = time.perf_counter() - start
+
+    assert (np.asarray(families) == legacy_families.to_numpy()).all()
+    assert index.to_mapping() == mapping
+    index.save(path)
+    assert HierarchyIndex.load(path).lookup(codes.iloc[0]) == mapping[codes.iloc[0]]
+    print(f"{n_products} productos, {n_rows} filas: iterrows + dict {legacy_seconds:.2f} s, "
+          f"índice {index_seconds:.3f} s ({legacy_seconds / index_seconds:.0f}x); "
+          f".npz {os.path.getsize(path) / 1e3:.0f} KB")
+    os.remove(path)
+    return legacy_seconds, index_seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del índice de jerarquía.")
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+    benchmark(args.products, args.rows)
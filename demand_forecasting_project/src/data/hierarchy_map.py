@@ -1,6 +1,13 @@
-import pandas as pd
+import os
+import sys
 import json
 
+# Añadir la raíz del repositorio al PATH para importar excel_cache, hierarchy_index y Data_groups
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from demand_forecasting_project.src.data.Data_groups import super_family_labels
+from demand_forecasting_project.src.data.excel_cache import read_excel_cached
+from demand_forecasting_project.src.data.hierarchy_index import INDEX_PATH, HierarchyIndex
 
 
 # Ruta del archivo de entrada
@@ -8,38 +15,47 @@ input_file_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_proje
 
 output_hierarchy_path =r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\hierarchy_mapping.json'
 
-# Cargar datos desde Excel
-data = pd.read_excel(input_file_path)
-
-# Verificar columnas disponibles
-print(f"Columnas disponibles: {data.columns.tolist()}")
-
-# Renombrar columnas si es necesario
-column_mapping = {
-    'fecha': 'Date',
-    'Codigo Producto': 'Product_Code',
-    'Familia': 'Family',
-    'Super Familia': 'Super_Family'
-}
-data.rename(columns=column_mapping, inplace=True)
 
-# Filtrar datos válidos
-data = data.dropna(subset=['Product_Code', 'Family', 'Super_Family'])
+def build_hierarchy_mapping(input_path=input_file_path, output_path=output_hierarchy_path, index_path=INDEX_PATH):
+    """
+    Índice Product_Code -> Family -> Super_Family desde data.xlsx (hierarchy_index.npz),
+    con los nombres de los resultados del pipeline: las Super Familias pronosticadas
+    renombradas con Data_groups.super_family_labels ('INVIERNO' -> 'Invierno', ...) y la
+    Familia sin espacios repetidos, como en Consolidado_resultados. Lo leen merged_data y
+    el dashboard de stock. El JSON de siempre conserva los nombres de data.xlsx.
+
+    Returns:
+        HierarchyIndex: el índice jerárquico
+    """
+    # Cargar datos desde Excel (snapshot Parquet mientras el Excel no cambie)
+    data = read_excel_cached(input_path)
+
+    # Verificar columnas disponibles
+    print(f"Columnas disponibles: {data.columns.tolist()}")
+
+    # Renombrar columnas si es necesario
+    column_mapping = {
+        'fecha': 'Date',
+        'Codigo Producto': 'Product_Code',
+        'Familia': 'Family',
+        'Super Familia': 'Super_Family'
+    }
+    data = data.rename(columns=column_mapping)
 
-# Eliminar duplicados
-data = data.drop_duplicates(subset='Product_Code')
+    # Guardar el mapeo como JSON (nombres de data.xlsx)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(HierarchyIndex.from_frame(data).to_mapping(), f, indent=4, ensure_ascii=False)
+    print(f"Archivo de jerarquías guardado en: {output_path}")
 
-# Crear un único mapeo jerárquico
-hierarchy_mapping = {
-    row['Product_Code']: {
-        'Family': row['Family'],
-        'Super_Family': row['Super_Family']
-    }
-    for _, row in data.iterrows()
-}
+    # Filas válidas y primera aparición de cada producto, codificadas por nivel, con los
+    # nombres de los resultados
+    data['Family'] = data['Family'].astype(object).str.strip().str.replace(r'\s+', ' ', regex=True)
+    data['Super_Family'] = data['Super_Family'].astype(object).replace(super_family_labels())
+    hierarchy_index = HierarchyIndex.from_frame(data)
+    hierarchy_index.save(index_path)
+    print(f"Índice de jerarquías guardado en: {index_path} ({len(hierarchy_index)} productos)")
+    return hierarchy_index
 
-# Guardar el mapeo como JSON
-with open(output_hierarchy_path, 'w', encoding='utf-8') as f:
-    json.dump(hierarchy_mapping, f, indent=4, ensure_ascii=False)
 
-print(f"Archivo de jerarquías guardado en: {output_hierarchy_path}")
+if __name__ == "__main__":
+    build_hierarchy_mapping()
@@ -0,0 +1,264 @@
+"""
+Tipos de columna de los artefactos del pipeline.
+
+Los CSV del pipeline se leían con los tipos que infería pandas: claves de la jerarquía
+como object (un str de Python por fila), proyecciones en float64 y Mes/Year en int64.
+En el servidor de los dashboards, con poca memoria, eso multiplica el tamaño de cada
+tabla. SCHEMAS fija el tipo de cada columna por artefacto:
+
+    claves de la jerarquía (Codigo Producto, Familia, Super Familia...)   category
+    proyecciones, ventas y stock                                          float32
+    Mes, Year                                                             int16 (Int16 con vacíos)
+    fechas                                                                datetime64
+
+Las columnas se nombran tal cual o con un patrón ('Venta *'); las que no figuran quedan
+como estén (p.ej. Sales de processed_data se mantiene en float64 para los modelos).
+Los escritores pasan su tabla por enforce_schema (write_artifact) y los lectores usan
+read_artifact, que además lee las claves directo como categorías (sin convertir códigos
+como '0012' en números).
+
+Uso (memoria de cada artefacto con y sin el esquema):
+    python schema.py
+    python schema.py --path merged2=/ruta/merged2.csv
+"""
+import argparse
+import os
+from fnmatch import fnmatchcase
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_DIR = os.path.dirname(PROJECT_DIR)
+
+CATEGORY = 'category'
+FLOAT = 'float32'
+SMALL_INT = 'int16'
+TINY_INT = 'int8'
+DATETIME = 'datetime64[ns]'
+
+# Artefacto -> {columna o patrón: tipo}
+SCHEMAS = {
+    # Salida del DataProcessor (columnas ya renombradas por DataLoader)
+    'processed_data': {
+        'Date': DATETIME,
+        'Product_Code': CATEGORY,
+        'Familia': CATEGORY,
+        'Super Familia': CATEGORY,
+        'Descripción Producto': CATEGORY,
+        'RUPR': CATEGORY,
+        'unidad': CATEGORY,
+        'Año': SMALL_INT,
+        'Mes': SMALL_INT,
+        'Year': SMALL_INT,
+        'Month': SMALL_INT,
+        'Quarter': TINY_INT,
+        'DayOfWeek': TINY_INT,
+        'WeekOfYear': TINY_INT,
+        'Sales_MA_*': FLOAT,
+        'Sales_Std_*': FLOAT,
+        'Sales_MoM_Growth': FLOAT,
+        'Season': CATEGORY,
+    },
+    # Consolidated_forecast.csv (Consolidado_resultados)
+    'consolidated_forecast': {
+        'Date': DATETIME,
+        'Super Familia': CATEGORY,
+        'Familia': CATEGORY,
+        'Codigo Producto': CATEGORY,
+        'Projection': FLOAT,
+    },
+    # merged2.csv (merged_data)
+    'merged2': {
+        'Mes': SMALL_INT,
+        'SuperFamily': CATEGORY,
+        'Familia': CATEGORY,
+        'Codigo Producto': CATEGORY,
+        'Venta *': FLOAT,
+        'Projection *': FLOAT,
+    },
+    # stock_unificado.csv (stock_pipeline); Fecha es la etiqueta del mes ('2025-01')
+    'stock_unificado': {
+        'Fecha': CATEGORY,
+        'Super Familia': CATEGORY,
+        'Familia': CATEGORY,
+        'Codigo Producto': CATEGORY,
+        'Projection': FLOAT,
+        'Cono_Stock': FLOAT,
+        'Ovillo_Stock': FLOAT,
+        'Stock Total': FLOAT,
+        'Stock_Flow': FLOAT,
+    },
+    # Stock_Cono_Ovillo.csv (flow_details), el stock que lee el dashboard de stock
+    'stock_cono_ovillo': {
+        'Ovillo_Code': CATEGORY,
+        'Cono_Stock': FLOAT,
+        'Ovillo_Stock': FLOAT,
+        'Stock_total': FLOAT,
+    },
+}
+
+# Rutas por defecto de cada artefacto (para el reporte de memoria)
+ARTIFACT_PATHS = {
+    'processed_data': os.path.join(PROJECT_DIR, 'data', 'processed', 'processed_data_venta.csv'),
+    'consolidated_forecast': os.path.join(PROJECT_DIR, 'data', 'output', 'Consolidated_forecast.csv'),
+    'merged2': os.path.join(PROJECT_DIR, 'data', 'output', 'merged2.csv'),
+    'stock_unificado': os.path.join(REPO_DIR, 'Stock_Optimization', 'Results', 'stock_unificado.csv'),
+    'stock_cono_ovillo': os.path.join(REPO_DIR, 'Stock_Optimization', 'Results', 'Stock_Cono_Ovillo.csv'),
+}
+
+
+def column_dtype(artifact, column):
+    """Tipo de column en el esquema de artifact (None si no está definido)."""
+    schema = SCHEMAS[artifact]
+    if column in schema:
+        return schema[column]
+    for pattern, dtype in schema.items():
+        if fnmatchcase(str(column), pattern):
+            return dtype
+    return None
+
+
+def _as_category(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    # Códigos numéricos y alfanuméricos como texto (los vacíos quedan como NaN)
+    if is_numeric_dtype(values) or values.dtype == object:
+        values = values.where(values.isna(), values.astype(str))
+    return values.astype(CATEGORY)
+
+
+def _as_integer(values, dtype):
+    values = pd.to_numeric(values, errors='coerce')
+    if values.isna().any():
+        return values.astype(dtype.capitalize())  # entero con vacíos (Int16 / Int8)
+    return values.astype(dtype)
+
+
+def enforce_schema(df, artifact):
+    """
+    Copia de df con los tipos del esquema de artifact. Los valores que no se pueden
+    convertir (números o fechas mal escritos) quedan como vacíos.
+    """
+    df = df.copy()
+    for col in df.columns:
+        dtype = column_dtype(artifact, col)
+        if dtype is None or df[col].dtype == dtype:
+            continue
+        if dtype == CATEGORY:
+            df[col] = _as_category(df[col])
+        elif dtype == DATETIME:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif dtype == FLOAT:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+        else:
+            df[col] = _as_integer(df[col], dtype)
+    return df
+
+
+def read_artifact(path, artifact, **read_kwargs):
+    """
+    Lee un artefacto (CSV o Parquet) con los tipos de su esquema.
+
+    Args:
+        **read_kwargs: argumentos extra para pd.read_csv / pd.read_parquet (usecols, columns...)
+    """
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        df = pd.read_parquet(path, **read_kwargs)
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        dtypes = {col: CATEGORY for col in header if column_dtype(artifact, col) == CATEGORY}
+        df = pd.read_csv(path, dtype={**dtypes, **read_kwargs.pop('dtype', {})}, **read_kwargs)
+    return enforce_schema(df, artifact)
+
+
+def write_artifact(df, path, artifact, report=True):
+    """
+    Escribe un artefacto (CSV o Parquet según la extensión) con los tipos de su esquema,
+    con reemplazo atómico.
+
+    Returns:
+        pd.DataFrame: la tabla tipada (la que deben usar los pasos siguientes)
+    """
+    df = enforce_schema(df, artifact)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    if report:
+        print(f"[{artifact}] {len(df)} filas, {memory_mb(df):.1f} MB en memoria: {path}")
+    return df
+
+
+def memory_mb(df):
+    """Memoria de df en MB (incluye los str de las columnas object)."""
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def memory_report(artifacts):
+    """
+    Memoria por artefacto.
+
+    Args:
+        artifacts (dict): artefacto -> DataFrame
+
+    Returns:
+        pd.DataFrame: Artefacto, Filas, Columnas, MB y la columna que más ocupa
+    """
+    rows = []
+    for name, df in artifacts.items():
+        usage = df.memory_usage(deep=True, index=False) / 2**20
+        rows.append({
+            'Artefacto': name,
+            'Filas': len(df),
+            'Columnas': df.shape[1],
+            'MB': memory_mb(df),
+            'Columna más pesada': usage.idxmax() if len(usage) else None,
+        })
+    return pd.DataFrame(rows, columns=['Artefacto', 'Filas', 'Columnas', 'MB', 'Columna más pesada'])
+
+
+def compare_memory(paths=None):
+    """
+    Lee cada artefacto existente con los tipos inferidos por pandas y con su esquema, y
+    compara la memoria de ambas versiones.
+
+    Returns:
+        pd.DataFrame: Artefacto, Filas, MB sin esquema, MB con esquema, Reducción
+    """
+    paths = {**ARTIFACT_PATHS, **(paths or {})}
+    rows = []
+    for artifact, path in paths.items():
+        if not os.path.exists(path):
+            print(f"[{artifact}] no existe: {path}")
+            continue
+        inferred = pd.read_csv(path)
+        typed = read_artifact(path, artifact)
+        assert len(inferred) == len(typed)
+        rows.append({
+            'Artefacto': artifact,
+            'Filas': len(typed),
+            'MB sin esquema': memory_mb(inferred),
+            'MB con esquema': memory_mb(typed),
+        })
+    report = pd.DataFrame(rows, columns=['Artefacto', 'Filas', 'MB sin esquema', 'MB con esquema'])
+    report['Reducción'] = 1 - report['MB con esquema'] / report['MB sin esquema'].replace(0, np.nan)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memoria de los artefactos del pipeline con y sin el esquema.")
+    parser.add_argument("--path", action="append", default=[], metavar="ARTEFACTO=RUTA",
+                        help="Ruta de un artefacto (por defecto ARTIFACT_PATHS).")
+    args = parser.parse_args()
+
+    overrides = dict(item.split('=', 1) for item in args.path)
+    unknown = set(overrides) - set(SCHEMAS)
+    if unknown:
+        parser.error(f"Artefactos desconocidos: {sorted(unknown)}")
+    with pd.option_context('display.float_format', '{:.2f}'.format, 'display.width', 120):
+        print(compare_memory(overrides).to_string(index=False))
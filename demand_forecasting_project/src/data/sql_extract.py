@@ -0,0 +1,307 @@
+"""
+Extracción desde SQL Server compartida por Demanda_real, Descarga_Stock y stock_pipeline.
+
+Antes cada script abría su propia conexión pyodbc y traía el resultado completo con
+pd.read_sql_query. Aquí:
+
+- ConnectionPool reutiliza las conexiones (una por hilo en uso): la demanda y el stock
+  se descargan a la vez (pasos independientes del DAG o extract_concurrently) sin
+  pagar el login en cada consulta.
+- query_to_parquet lee con cursor.fetchmany por bloques de CHUNK_SIZE filas y escribe
+  cada bloque al Parquet apenas llega (pyarrow.ParquetWriter), sin armar el resultado
+  completo en memoria ni pasar por un CSV.
+- La conexión es una función sin argumentos: sqlserver_connect en producción,
+  sqlite_connect(path) con una base SQLite local que imita MAEDDO/MAEPR
+  (create_sqlite_standin) para probar sin el servidor.
+
+Uso (prueba local contra SQLite):
+    python sql_extract.py --sqlite /tmp/standin.db
+"""
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Configuración de conexión a SQL Server
+SERVER = os.getenv("SQL_SERVER", '186.10.95.240')
+DATABASE = os.getenv("SQL_DATABASE", 'tasa_entel_srv')
+USERNAME = os.getenv("SQL_USERNAME", 'tasa_entel_usr')
+PASSWORD = os.getenv("SQL_PASSWORD", 't4s43nt3l')
+
+CHUNK_SIZE = 50_000  # Filas por fetchmany (y por row group del Parquet)
+POOL_SIZE = 4        # Conexiones inactivas que se conservan
+
+
+def sqlserver_connect():
+    """Conexión nueva a SQL Server (pyodbc se importa sólo al conectarse)."""
+    import pyodbc
+
+    return pyodbc.connect(
+        f"DRIVER={{SQL Server}};SERVER={SERVER};DATABASE={DATABASE};UID={USERNAME};PWD={PASSWORD}"
+    )
+
+
+def sqlite_connect(path):
+    """
+    Función de conexión a una base SQLite que reemplaza al servidor en pruebas. La misma
+    base queda adjunta como el esquema dbo para que las consultas con dbo.MAEDDO corran
+    sin cambios.
+    """
+    def connect():
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute("ATTACH DATABASE ? AS dbo", (path,))
+        return connection
+
+    return connect
+
+
+class ConnectionPool:
+    def __init__(self, connect=sqlserver_connect, size=POOL_SIZE, dialect=None):
+        """
+        Args:
+            connect (callable): Función sin argumentos que abre una conexión DB-API
+            size (int): Conexiones inactivas que se guardan para reutilizar
+            dialect (str): 'sqlserver' o 'sqlite' (por defecto según connect)
+        """
+        self.connect = connect
+        self.dialect = dialect or ('sqlserver' if connect is sqlserver_connect else 'sqlite')
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self):
+        """Conexión inactiva del pool (o una nueva); vuelve al pool al salir sin error."""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self.connect()
+            print(f"Conexión a {self.dialect} abierta.")
+        try:
+            yield connection
+        except Exception:
+            # La conexión puede haber quedado en mal estado: no se reutiliza
+            connection.close()
+            raise
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def default_pool():
+    """Pool de conexiones a SQL Server compartido por todo el proceso."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
+
+
+def _chunk_frame(rows, columns, parse_dates=(), strip=False):
+    """DataFrame de un bloque de filas con tipos estables entre bloques."""
+    df = pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns)
+    for col in df.columns[df.dtypes == object]:
+        values = df[col].dropna()
+        if values.empty:
+            continue
+        if isinstance(values.iloc[0], Decimal):  # SUM(...) de SQL Server llega como Decimal
+            df[col] = df[col].astype(float)
+        elif strip and isinstance(values.iloc[0], str):
+            df[col] = df[col].str.strip()
+    for col in parse_dates:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def _stable_schema(table):
+    """
+    Esquema del Parquet a partir del primer bloque: las columnas enteras pasan a float64
+    (un bloque posterior puede traer NULL) y las columnas sólo con NULL a texto.
+    """
+    fields = []
+    for field in table.schema:
+        if pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif pa.types.is_integer(field.type):
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def iter_query(query, params=(), pool=None, chunksize=CHUNK_SIZE, parse_dates=(), strip=False):
+    """
+    Ejecuta la consulta y entrega el resultado por bloques (DataFrames de hasta
+    chunksize filas) leídos con cursor.fetchmany.
+    """
+    pool = pool or default_pool()
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            first = True
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows and not first:  # Un resultado vacío entrega un bloque vacío con las columnas
+                    break
+                yield _chunk_frame(rows, columns, parse_dates, strip)
+                first = False
+        finally:
+            cursor.close()
+
+
+def read_query(query, params=(), pool=None, chunksize=CHUNK_SIZE, parse_dates=(), strip=False):
+    """Como pd.read_sql_query, pero con una conexión del pool y lectura por bloques."""
+    chunks = list(iter_query(query, params, pool, chunksize, parse_dates, strip))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def query_to_parquet(query, path, params=(), pool=None, chunksize=CHUNK_SIZE, parse_dates=(), strip=False):
+    """
+    Escribe el resultado de la consulta en un Parquet, bloque a bloque a medida que
+    llegan las filas. El archivo se reemplaza al final (os.replace): quien lo lea ve la
+    versión anterior completa hasta que la descarga termina.
+
+    Returns:
+        int: filas escritas
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    writer, rows = None, 0
+    try:
+        for chunk in iter_query(query, params, pool, chunksize, parse_dates, strip):
+            if writer is None:
+                schema = _stable_schema(pa.Table.from_pandas(chunk, preserve_index=False))
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    print(f"{rows} filas guardadas en: {path}")
+    return rows
+
+
+def extract_concurrently(jobs, pool=None, max_workers=None):
+    """
+    Ejecuta varias descargas a Parquet en paralelo con el mismo pool.
+
+    Args:
+        jobs (dict): nombre -> dict con los argumentos de query_to_parquet (query, path...)
+
+    Returns:
+        dict: nombre -> filas escritas
+    """
+    pool = pool or default_pool()
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs) or 1) as executor:
+        futures = {name: executor.submit(query_to_parquet, pool=pool, **job) for name, job in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+# ------------------------------------------------------------------------------
+# Base SQLite que imita las tablas de Random (MAEPR y MAEDDO) para probar
+# ------------------------------------------------------------------------------
+def create_sqlite_standin(path, n_products=300, start='2022-01-01', end='2025-06-30',
+                          lines_per_day=200, seed=0):
+    """
+    Crea (o reemplaza) una base SQLite con MAEPR (productos y stock) y MAEDDO (líneas
+    de documentos) sintéticas, con las columnas que usan las consultas de demanda y stock.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rng = np.random.default_rng(seed)
+
+    codes = [f'{i:06d}{"":<7}' for i in range(n_products)]  # CHAR con espacios, como en Random
+    maepr = pd.DataFrame({
+        'KOPR': codes,
+        'NOKOPR': [f'PRODUCTO {i}' for i in range(n_products)],
+        'KOGE': [f'G{i % 40:03d}' for i in range(n_products)],
+        'RUPR': rng.choice(['R10', 'R20', 'R30'], n_products),
+        'TIPR': rng.choice(['FPN', 'FPN', 'FPN', 'SSN'], n_products),
+        'UD01PR': 'KG',
+        'STFI1': rng.gamma(2.0, 50.0, n_products).round(2),
+    })
+
+    days = pd.date_range(start, end, freq='D')
+    n_lines = len(days) * lines_per_day
+    maeddo = pd.DataFrame({
+        'FEEMLI': np.repeat(days, lines_per_day).strftime('%Y-%m-%d 00:00:00'),
+        'KOPRCT': rng.choice(codes, n_lines),
+        'CAPRCO1': rng.gamma(1.5, 4.0, n_lines).round(3),
+        'UD01PR': 'KG',
+        'TIDO': rng.choice(['FCV', 'FCV', 'FCV', 'NCV'], n_lines),
+        'TIPR': 'FPN',
+    })
+
+    with sqlite3.connect(path) as connection:
+        maepr.to_sql('MAEPR', connection, index=False)
+        maeddo.to_sql('MAEDDO', connection, index=False)
+        connection.execute("CREATE INDEX IX_MAEDDO_FEEMLI ON MAEDDO (FEEMLI)")
+    connection.close()
+    return path
+
+
+def check_sqlite(path, chunksize=CHUNK_SIZE):
+    """Descarga demanda y stock desde la base SQLite y compara con pd.read_sql_query."""
+    from demand_forecasting_project.src.Descarga_Stock import QUERY as STOCK_QUERY
+    from demand_forecasting_project.src.data.Demanda_real import demand_query
+
+    out_dir = os.path.dirname(os.path.abspath(path))
+    pool = ConnectionPool(sqlite_connect(path))
+    demand_sql, demand_params = demand_query(dialect=pool.dialect)
+    jobs = {
+        'demand': dict(query=demand_sql, params=demand_params, parse_dates=['Fecha'], strip=True,
+                       path=os.path.join(out_dir, 'demand_data.parquet'), chunksize=chunksize),
+        'stock': dict(query=STOCK_QUERY, path=os.path.join(out_dir, 'stock_data.parquet'), chunksize=chunksize),
+    }
+
+    start = time.perf_counter()
+    rows = extract_concurrently(jobs, pool=pool)
+    print(f"Extracción concurrente: {time.perf_counter() - start:.2f} s, filas: {rows}")
+
+    connection = sqlite_connect(path)()
+    expected = pd.read_sql_query(demand_sql, connection, params=demand_params)
+    connection.close()
+    demand = pd.read_parquet(jobs['demand']['path'])
+    assert len(demand) == len(expected)
+    assert np.isclose(demand['Demanda'].sum(), expected['Demanda'].sum())
+    assert demand['codigoProducto'].str.len().max() == 6  # códigos sin espacios
+    print("Demanda por bloques idéntica a pd.read_sql_query.")
+    pool.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    if REPO_DIR not in sys.path:
+        sys.path.append(REPO_DIR)
+
+    parser = argparse.ArgumentParser(description="Prueba de la extracción contra una base SQLite local.")
+    parser.add_argument("--sqlite", required=True, help="Ruta de la base SQLite (se recrea).")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    create_sqlite_standin(args.sqlite)
+    check_sqlite(args.sqlite, args.chunksize)
@@ -0,0 +1,126 @@
+"""
+Features de rezagos, ventanas móviles y calendario para muchas series mensuales a la vez.
+
+Las series se guardan como una matriz ancha (una fila por serie, una columna por mes;
+NaN antes del primer mes de cada serie) y las features se calculan sobre la matriz
+completa con operaciones de NumPy, sin groupby ni un ciclo por producto:
+
+    Lag{k}            venta del mes t-k
+    Roll_Mean_{w}     promedio de los w meses anteriores a t (sin contar t)
+    Roll_Std_{w}      desviación estándar (poblacional) de esos w meses
+    Month             mes del año de t (1-12)
+
+Todas usan sólo información hasta t-1, así que la misma función arma la tabla de
+entrenamiento (todas las columnas) y el paso siguiente de un pronóstico recursivo
+(la columna T, el mes después del último dato).
+"""
+import numpy as np
+import pandas as pd
+
+LAGS = (1, 2, 3, 12)
+WINDOWS = (3, 6, 12)
+
+
+def to_wide(data, id_col='Product_Code', date_col='Date', value_col='Sales', end=None):
+    """
+    Venta mensual por serie en formato ancho.
+
+    Args:
+        data (pd.DataFrame): ventas en formato largo (cualquier frecuencia)
+        end: último mes de la matriz (por defecto el último mes con datos)
+
+    Returns:
+        pd.DataFrame: índice = series, columnas = primer día de cada mes. Los meses sin
+            venta desde el primer mes de cada serie quedan en 0; los anteriores, NaN.
+    """
+    months = pd.to_datetime(data[date_col]).dt.to_period('M').dt.to_timestamp()
+    monthly = data.groupby([data[id_col], months], observed=True)[value_col].sum()
+    wide = monthly.unstack(date_col)
+    last = pd.Timestamp(end) if end is not None else wide.columns.max()
+    wide = wide.reindex(columns=pd.date_range(wide.columns.min(), last, freq='MS'))
+
+    # 0 desde el primer mes con venta de cada serie; NaN antes
+    started = np.cumsum(wide.notna().to_numpy(), axis=1) > 0
+    wide = wide.fillna(0).where(started)
+    wide.index.name = id_col
+    return wide.astype(float)
+
+
+def feature_names(lags=LAGS, windows=WINDOWS, calendar=True):
+    names = [f'Lag{lag}' for lag in lags]
+    for window in windows:
+        names += [f'Roll_Mean_{window}', f'Roll_Std_{window}']
+    return names + (['Month'] if calendar else [])
+
+
+def lag_feature_matrix(values, months, positions=None, lags=LAGS, windows=WINDOWS, calendar=True):
+    """
+    Features para predecir las columnas positions de values con la información anterior.
+
+    Args:
+        values (np.ndarray): series × meses (NaN = serie sin iniciar)
+        months (np.ndarray): mes del año (1-12) de cada columna de values y de la
+            siguiente (largo = columnas + 1)
+        positions (np.ndarray): columnas a predecir, entre 0 y values.shape[1] (esta
+            última = el mes siguiente al último dato). Por defecto todas las de values.
+
+    Returns:
+        np.ndarray: (series × len(positions)) × features, en el orden de feature_names;
+            fila i*len(positions)+j = serie i, posición j
+    """
+    n_series, n_months = values.shape
+    positions = np.arange(n_months) if positions is None else np.asarray(positions)
+    columns = []
+
+    for lag in lags:
+        source = positions - lag
+        lagged = np.full((n_series, len(positions)), np.nan)
+        ok = source >= 0
+        lagged[:, ok] = values[:, source[ok]]
+        columns.append(lagged)
+
+    if windows:
+        # Sumas acumuladas (con un 0 al inicio) de valores, cuadrados y meses observados
+        observed = ~np.isnan(values)
+        filled = np.where(observed, values, 0.0)
+        pad = np.zeros((n_series, 1))
+        total = np.hstack([pad, np.cumsum(filled, axis=1)])
+        squares = np.hstack([pad, np.cumsum(filled ** 2, axis=1)])
+        counts = np.hstack([pad, np.cumsum(observed, axis=1)])
+        for window in windows:
+            start = np.maximum(positions - window, 0)
+            count = counts[:, positions] - counts[:, start]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = (total[:, positions] - total[:, start]) / count
+                variance = (squares[:, positions] - squares[:, start]) / count - mean ** 2
+            columns += [mean, np.sqrt(np.maximum(variance, 0))]
+
+    if calendar:
+        columns.append(np.broadcast_to(np.asarray(months)[positions], (n_series, len(positions))).astype(float))
+
+    return np.stack([column.ravel() for column in columns], axis=1)
+
+
+def month_numbers(dates, extra=1):
+    """Mes del año de cada fecha y de los extra meses siguientes."""
+    dates = pd.DatetimeIndex(dates)
+    following = pd.date_range(dates[-1], periods=extra + 1, freq='MS')[1:]
+    return np.concatenate([dates.month, following.month])
+
+
+def build_lag_features(wide, lags=LAGS, windows=WINDOWS, calendar=True):
+    """
+    Tabla de entrenamiento en formato largo: una fila por serie y mes observado, con la
+    venta del mes (target) y sus features.
+
+    Returns:
+        pd.DataFrame: <índice de wide>, Date, target y las columnas de feature_names
+    """
+    values = wide.to_numpy(dtype=float)
+    features = lag_feature_matrix(values, month_numbers(wide.columns, 0), lags=lags,
+                                  windows=windows, calendar=calendar)
+    table = pd.DataFrame(features, columns=feature_names(lags, windows, calendar))
+    table.insert(0, 'target', values.ravel())
+    table.insert(0, 'Date', np.tile(wide.columns.to_numpy(), len(wide)))
+    table.insert(0, wide.index.name or 'series', np.repeat(wide.index.to_numpy(), wide.shape[1]))
+    return table[table['target'].notna()].reset_index(drop=True)
@@ -1,7 +1,13 @@
 import os
 import math
+import sys
 import pandas as pd
 
+# Añadir la raíz del repositorio al PATH para importar el esquema de los artefactos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from demand_forecasting_project.src.data.schema import write_artifact
+
 # Ajusta estas rutas según tu proyecto:
 RELATION_CONE_PATH = "Stock_Optimization/Data/relation_cone_skein.xlsx"
 STOCK_DATA_PATH    = "Stock_Optimization/Data/stock_data.csv"         # Tiene Product_Code (conos + ovillos) y Stock
@@ -9,24 +15,41 @@ FORECAST_DATA_PATH = "Stock_Optimization/Data/consolidated_forecast.csv"  # Dond
 RESULTS_DIR        = "Stock_Optimization/Results"
 OUTPUT_FILE        = os.path.join(RESULTS_DIR, "stock_flow_details.csv")
 
-stock_data = pd.read_csv(STOCK_DATA_PATH)
-relation_cone_skein = pd.read_excel(RELATION_CONE_PATH)
-# Mergear las tablas utilizando la relación entre Cono_Code y Ovillo_Code
-merged_data = relation_cone_skein.merge(
-    stock_data, left_on='Cono_Code', right_on='Product_Code', how='left'
-).rename(columns={'Stock': 'Cono_Stock'})
+STOCK_CONO_OVILLO_PATH = os.path.join(RESULTS_DIR, "Stock_Cono_Ovillo.csv")
+
+
+def build_stock_cono_ovillo(stock_data=None):
+    """
+    Stock de conos y ovillos por Ovillo_Code (Stock_Cono_Ovillo.csv).
+
+    Args:
+        stock_data (pd.DataFrame): Product_Code y Stock (salida de Descarga_Stock). Si no
+            se entrega se lee STOCK_DATA_PATH.
+    """
+    if stock_data is None:
+        stock_data = pd.read_csv(STOCK_DATA_PATH)
+    relation_cone_skein = pd.read_excel(RELATION_CONE_PATH)
+    # Mergear las tablas utilizando la relación entre Cono_Code y Ovillo_Code
+    merged_data = relation_cone_skein.merge(
+        stock_data, left_on='Cono_Code', right_on='Product_Code', how='left'
+    ).rename(columns={'Stock': 'Cono_Stock'})
+
+    merged_data = merged_data.merge(
+        stock_data, left_on='Ovillo_Code', right_on='Product_Code', how='left'
+    ).rename(columns={'Stock': 'Ovillo_Stock'})
+
+    # Calcular el Stock_total
+    merged_data['Stock_total'] = merged_data['Cono_Stock'].fillna(0) + merged_data['Ovillo_Stock'].fillna(0)
 
-merged_data = merged_data.merge(
-    stock_data, left_on='Ovillo_Code', right_on='Product_Code', how='left'
-).rename(columns={'Stock': 'Ovillo_Stock'})
+    # Seleccionar las columnas relevantes para el resultado final
+    final_data = merged_data[['Ovillo_Code', 'Cono_Stock', 'Ovillo_Stock', 'Stock_total']]
 
-# Calcular el Stock_total
-merged_data['Stock_total'] = merged_data['Cono_Stock'].fillna(0) + merged_data['Ovillo_Stock'].fillna(0)
+    final_data = write_artifact(final_data, STOCK_CONO_OVILLO_PATH, 'stock_cono_ovillo')
 
-# Seleccionar las columnas relevantes para el resultado final
-final_data = merged_data[['Ovillo_Code', 'Cono_Stock', 'Ovillo_Stock', 'Stock_total']]
+    # Mostrar el resultado para verificar
+    print(final_data.head())
+    return final_data
 
-final_data.to_csv('Stock_Optimization/Results/Stock_Cono_Ovillo.csv', index=False)
 
-# Mostrar el resultado para verificar
-print(final_data.head())
\ No newline at end of file
+if __name__ == "__main__":
+    build_stock_cono_ovillo()
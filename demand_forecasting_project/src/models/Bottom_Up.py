@@ -0,0 +1,232 @@
+"""
+Pronóstico bottom-up por producto (Product_Code).
+
+En lugar de pronosticar sólo los agregados de super familia y repartirlos con
+proporciones históricas (Top_Down), se ajusta un modelo para cada Product_Code de
+processed_data.csv:
+
+- Selección automática del modelo por largo de la serie, igual que generate_forecast
+  (HW+SARIMA con 24+ meses, HW con menos).
+- Fallback simple (media de los últimos 12 meses) para series muy cortas o cuando el
+  ajuste falla.
+
+Las series se procesan en chunks en un pool de procesos, con un número acotado de
+chunks en vuelo, y cada chunk terminado se escribe de inmediato como un archivo
+part-XXXXX.parquet en la carpeta de salida. La memoria queda acotada por el tamaño
+del chunk y no por el tamaño del catálogo.
+
+Uso:
+    python Bottom_Up.py [--workers N] [--chunk-size N]
+    python Bottom_Up.py --benchmark 2000    # throughput en series/segundo
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from Proyecciones import generate_forecast, select_model, setup_forecast_periods
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INPUT_FILE = os.path.join(PROJECT_DIR, 'data', 'processed', 'processed_data.csv')
+OUTPUT_DIR = os.path.join(PROJECT_DIR, 'data', 'processed', 'bottom_up_forecast')
+
+MIN_OBSERVATIONS_HW = 6   # Con menos meses de historia se usa el fallback
+FALLBACK_WINDOW = 12      # Meses usados por el fallback (media)
+
+
+def load_monthly_series(file_path, train_start, train_end, chunksize=500_000):
+    """
+    Lee processed_data.csv por partes (sólo Date, Product_Code y Sales) y devuelve la
+    matriz de ventas mensuales: una fila por Product_Code, una columna por mes
+    entre train_start y train_end (meses sin venta = 0).
+    """
+    parts = []
+    for chunk in pd.read_csv(file_path, usecols=['Date', 'Product_Code', 'Sales'], chunksize=chunksize):
+        chunk['Date'] = pd.to_datetime(chunk['Date'])
+        chunk = chunk[(chunk['Date'] >= train_start) & (chunk['Date'] <= train_end)]
+        parts.append(
+            chunk.groupby(['Product_Code', chunk['Date'].dt.to_period('M')])['Sales'].sum()
+        )
+
+    monthly = pd.concat(parts).groupby(level=[0, 1]).sum()
+    months = pd.period_range(train_start, train_end, freq='M')
+    return monthly.unstack(fill_value=0).reindex(columns=months, fill_value=0)
+
+
+def forecast_series(monthly_sales, forecast_periods):
+    """
+    Pronostica una serie (DataFrame con columna 'Sales' e índice mensual).
+
+    Returns:
+        tuple: (np.ndarray con el pronóstico >= 0, nombre del modelo usado)
+    """
+    n_observations = len(monthly_sales)
+
+    if n_observations >= MIN_OBSERVATIONS_HW:
+        try:
+            forecast = generate_forecast(monthly_sales, forecast_periods, verbose=False)
+            values = np.asarray(forecast, dtype=float)
+            if np.isfinite(values).all():
+                return np.clip(values, 0, None), select_model(n_observations)
+        except Exception:
+            pass  # Se usa el fallback
+
+    recent_mean = monthly_sales['Sales'].iloc[-FALLBACK_WINDOW:].mean() if n_observations else 0.0
+    return np.full(forecast_periods, max(recent_mean, 0.0)), 'Media_12M'
+
+
+def _forecast_chunk(chunk_id, product_codes, values, train_months, forecast_dates):
+    """Pronostica un chunk de series (se ejecuta en un proceso del pool)."""
+    forecast_periods = len(forecast_dates)
+    forecasts = np.empty((len(product_codes), forecast_periods))
+    models = []
+
+    for i, series_values in enumerate(values):
+        # La serie parte en la primera venta (antes el producto no existía)
+        sold = np.flatnonzero(series_values)
+        start = sold[0] if len(sold) else len(series_values)
+        monthly_sales = pd.DataFrame({'Sales': series_values[start:]}, index=train_months[start:])
+
+        forecasts[i], model = forecast_series(monthly_sales, forecast_periods)
+        models.append(model)
+
+    result = pd.DataFrame({
+        'Product_Code': np.repeat(product_codes, forecast_periods),
+        'Date': np.tile(forecast_dates, len(product_codes)),
+        'Forecast_Sales': forecasts.ravel(),
+        'Model': np.repeat(models, forecast_periods),
+    })
+    return chunk_id, result
+
+
+def forecast_matrix(matrix, forecast_start, forecast_periods, output_dir,
+                    chunk_size=200, max_workers=None):
+    """
+    Pronostica todas las series de la matriz (Product_Code × mes) y escribe los
+    resultados en output_dir a medida que terminan los chunks.
+
+    Returns:
+        dict: resumen con series, segundos, series por segundo y conteo por modelo.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    train_months = pd.DatetimeIndex(matrix.columns.to_timestamp(), freq='MS')
+    forecast_dates = pd.date_range(start=forecast_start, periods=forecast_periods, freq='M')
+
+    product_codes = matrix.index.to_numpy()
+    values = matrix.to_numpy(dtype=float)
+    n_series = len(product_codes)
+    model_counts = {}
+
+    def write_chunk(chunk_id, result):
+        result.to_parquet(os.path.join(output_dir, f'part-{chunk_id:05d}.parquet'), index=False)
+        counts = result.drop_duplicates('Product_Code')['Model'].value_counts()
+        for model, count in counts.items():
+            model_counts[model] = model_counts.get(model, 0) + int(count)
+
+    start_time = time.perf_counter()
+    chunks = (
+        (chunk_id, product_codes[start:start + chunk_size], values[start:start + chunk_size])
+        for chunk_id, start in enumerate(range(0, n_series, chunk_size))
+    )
+
+    if max_workers <= 1:
+        for chunk_id, codes, chunk_values in chunks:
+            write_chunk(*_forecast_chunk(chunk_id, codes, chunk_values, train_months, forecast_dates))
+    else:
+        # Máximo 2 chunks en vuelo por proceso: la memoria no crece con el catálogo
+        max_in_flight = 2 * max_workers
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for chunk_id, codes, chunk_values in chunks:
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write_chunk(*future.result())
+                pending.add(executor.submit(
+                    _forecast_chunk, chunk_id, codes, chunk_values, train_months, forecast_dates
+                ))
+            for future in pending:
+                write_chunk(*future.result())
+
+    elapsed = time.perf_counter() - start_time
+    summary = {
+        'series': n_series,
+        'seconds': elapsed,
+        'series_per_second': n_series / elapsed if elapsed else 0.0,
+        'models': model_counts,
+    }
+    print(f"Pronosticadas {n_series} series en {elapsed:.1f} s "
+          f"({summary['series_per_second']:.1f} series/s). Modelos: {model_counts}")
+    return summary
+
+
+def run_bottom_up(input_file=INPUT_FILE, output_dir=OUTPUT_DIR, chunk_size=200, max_workers=None):
+    """Pronóstico de 15 meses para cada Product_Code de processed_data.csv."""
+    current_date, train_start, train_end, forecast_start, forecast_periods = setup_forecast_periods()
+
+    print(f"Cargando series mensuales desde {input_file}...")
+    matrix = load_monthly_series(input_file, train_start, train_end)
+    print(f"Series a pronosticar: {len(matrix)}")
+
+    summary = forecast_matrix(
+        matrix, forecast_start, forecast_periods, output_dir,
+        chunk_size=chunk_size, max_workers=max_workers
+    )
+    print(f"Proyecciones por producto guardadas en '{output_dir}'")
+    return summary
+
+
+def make_synthetic_matrix(n_series, n_months=48, seed=0):
+    """Series mensuales sintéticas (estacionales, de distinto largo) para el benchmark."""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range('2022-01', periods=n_months, freq='M')
+    t = np.arange(n_months)
+
+    level = rng.gamma(2.0, 50.0, size=(n_series, 1))
+    seasonality = 1 + 0.4 * np.sin(2 * np.pi * (t + rng.integers(0, 12, size=(n_series, 1))) / 12)
+    values = rng.poisson(level * seasonality).astype(float)
+
+    # Productos lanzados en distintos momentos: ejercita los tres modelos
+    launch = rng.integers(0, n_months - 1, size=n_series)
+    values[t[None, :] < launch[:, None]] = 0
+
+    index = [f'SKU{i:06d}' for i in range(n_series)]
+    return pd.DataFrame(values, index=index, columns=months)
+
+
+def benchmark(n_series=2000, chunk_size=200, max_workers=None, output_dir=None):
+    """Mide el throughput (series/segundo) sobre un catálogo sintético."""
+    output_dir = output_dir or os.path.join(tempfile.mkdtemp(), 'bottom_up_benchmark')
+    matrix = make_synthetic_matrix(n_series)
+    forecast_start = (matrix.columns[-1] + 1).to_timestamp()
+
+    print(f"Benchmark bottom-up: {n_series} series, chunk_size={chunk_size}, workers={max_workers or os.cpu_count()}")
+    summary = forecast_matrix(matrix, forecast_start, 15, output_dir,
+                              chunk_size=chunk_size, max_workers=max_workers)
+    shutil.rmtree(output_dir)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pronóstico bottom-up por Product_Code.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (1 = secuencial).")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Series por chunk.")
+    parser.add_argument("--benchmark", type=int, metavar="N_SERIES", default=None,
+                        help="Corre el benchmark de throughput con N_SERIES series sintéticas.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, chunk_size=args.chunk_size, max_workers=args.workers)
+    else:
+        run_bottom_up(chunk_size=args.chunk_size, max_workers=args.workers)
@@ -1,50 +1,47 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.metrics import mean_absolute_error, mean_squared_error
-from xgboost import XGBRegressor
-from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
 from sklearn.preprocessing import StandardScaler
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from global_forecast import FORECAST_HORIZON, GlobalForecaster
+from tuning import PARAM_SPACE, fit_best, tune_xgboost
+from demand_forecasting_project.src.features.lag_features import build_lag_features, to_wide
+
+LAGS = (1, 2, 3)
+FEATURES = ['Lag1', 'Lag2', 'Lag3', 'Stock_Break']
+
 # Paso 1: Cargar los datos ajustados
 data_path = 'data/processed/Cintas_Borlas_Cola_Raton/adjusted_data_cintas_borlas_colaraton.csv'  # Cambiar la ruta si es necesario
 adjusted_data = pd.read_csv(data_path)
 
-# Paso 2: Preparar los datos
-adjusted_monthly_sales = adjusted_data.groupby(['Year', 'Month'])['Sales_Adjusted'].sum().reset_index()
-adjusted_monthly_sales['Date'] = pd.to_datetime(adjusted_monthly_sales[['Year', 'Month']].assign(Day=1))
-adjusted_monthly_sales = adjusted_monthly_sales.set_index('Date')
-
-
-# Crear serie temporal y características
-series = adjusted_monthly_sales['Sales_Adjusted']
-adjusted_monthly_sales['Lag1'] = series.shift(1)
-adjusted_monthly_sales['Lag2'] = series.shift(2)
-adjusted_monthly_sales['Lag3'] = series.shift(3)
-adjusted_monthly_sales = adjusted_monthly_sales.dropna()
+# Paso 2: Preparar los datos: serie mensual de la familia (meses sin venta en 0) y sus
+# rezagos, armados una sola vez con lag_features
+adjusted_data['Date'] = pd.to_datetime(adjusted_data[['Year', 'Month']].assign(Day=1))
+adjusted_data['Serie'] = 'Cintas, Borlas y Cola de Ratón'
+monthly_series = to_wide(adjusted_data, id_col='Serie', date_col='Date', value_col='Sales_Adjusted')
+adjusted_monthly_sales = (
+    build_lag_features(monthly_series, lags=LAGS, windows=(), calendar=False)
+    .rename(columns={'target': 'Sales_Adjusted'})
+    .set_index('Date')
+    .dropna()
+)
 
-# Dividir en entrenamiento y prueba
-train = adjusted_monthly_sales[adjusted_monthly_sales.index.year < 2023]
-test = adjusted_monthly_sales[adjusted_monthly_sales.index.year >= 2023]
 # Agregar indicador de quiebres de stock
 stock_break_dates = ['2024-01-01', '2024-02-01', '2024-03-01', '2024-04-01']
-adjusted_monthly_sales['Stock_Break'] = adjusted_monthly_sales.index.isin(stock_break_dates).astype(int)
-
-# Crear serie temporal y características
-series = adjusted_monthly_sales['Sales_Adjusted']
-adjusted_monthly_sales['Lag1'] = series.shift(1)
-adjusted_monthly_sales['Lag2'] = series.shift(2)
-adjusted_monthly_sales['Lag3'] = series.shift(3)
-adjusted_monthly_sales = adjusted_monthly_sales.dropna()
+adjusted_monthly_sales['Stock_Break'] = adjusted_monthly_sales.index.isin(pd.to_datetime(stock_break_dates)).astype(int)
 
 # Dividir en entrenamiento y prueba
 train = adjusted_monthly_sales[adjusted_monthly_sales.index.year < 2023]
 test = adjusted_monthly_sales[adjusted_monthly_sales.index.year >= 2023]
 
 # Separar características (X) y etiquetas (y)
-X_train = train[['Lag1', 'Lag2', 'Lag3', 'Stock_Break']]
+X_train = train[FEATURES]
 y_train = train['Sales_Adjusted']
-X_test = test[['Lag1', 'Lag2', 'Lag3', 'Stock_Break']]
+X_test = test[FEATURES]
 y_test = test['Sales_Adjusted']
 
 
@@ -53,29 +50,14 @@ scaler = StandardScaler()
 X_train_scaled = scaler.fit_transform(X_train)
 X_test_scaled = scaler.transform(X_test)
 
-# Paso 3: Configurar búsqueda de hiperparámetros para XGBoost
-ts_split = TimeSeriesSplit(n_splits=3)
-param_grid = {
-    'n_estimators': [50, 100, 200],
-    'learning_rate': [0.01, 0.1, 0.2],
-    'max_depth': [2, 3, 5],
-    'subsample': [0.8, 1.0],
-    'colsample_bytree': [0.8, 1.0]
-}
-
-grid_search = GridSearchCV(
-    estimator=XGBRegressor(objective='reg:squarederror'),
-    param_grid=param_grid,
-    cv=ts_split,
-    scoring='neg_mean_absolute_error',
-    verbose=1
-)
-
-grid_search.fit(X_train_scaled, y_train)
+# Paso 3: Búsqueda de hiperparámetros para XGBoost (successive halving sobre la misma
+# grilla, folds temporales en paralelo y un tope de tiempo; ver tuning.py)
+tuning = tune_xgboost(X_train_scaled, y_train, PARAM_SPACE, method='halving', budget_seconds=60)
 
 # Mejor modelo
-best_model = grid_search.best_estimator_
-print(f"Mejores Hiperparámetros: {grid_search.best_params_}")
+best_model = fit_best(X_train_scaled, y_train, tuning['best_params'])
+print(f"Mejores Hiperparámetros: {tuning['best_params']} "
+      f"(MAE CV {tuning['best_score']:.2f}, {tuning['seconds']:.1f} s)")
 
 # Paso 4: Generar predicciones
 predictions = best_model.predict(X_test_scaled)
@@ -136,3 +118,12 @@ error_analysis_df = pd.DataFrame({
 error_analysis_df.to_csv('xgboost_error_analysis_cintas_borlas_colaraton_stock_breaks.csv', index=False)
 
 print("Análisis detallado de errores guardado en 'xgboost_error_analysis_cintas_borlas_colaraton_stock_breaks.csv'.")
+
+# Paso 8: Proyección recursiva de 15 meses (como Proyecciones) con los mismos rezagos y
+# los hiperparámetros encontrados. Los meses futuros no tienen quiebres de stock, así que
+# el modelo de la proyección usa sólo los rezagos.
+forecaster = GlobalForecaster(lags=LAGS, windows=(), calendar=False, params=tuning['best_params'],
+                              normalize=False).fit(monthly_series)
+future_forecast = forecaster.forecast(horizon=FORECAST_HORIZON)[['Date', 'Forecast_Sales']]
+future_forecast.to_csv('xgboost_forecast_cintas_borlas_colaraton.csv', index=False)
+print(f"Proyección de {FORECAST_HORIZON} meses guardada en 'xgboost_forecast_cintas_borlas_colaraton.csv'.")
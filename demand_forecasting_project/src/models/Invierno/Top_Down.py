@@ -4,91 +4,16 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import os
+import sys
 
-def normalize_proportions(series):
-    """
-    Normaliza una serie asegurando que sume 1
-    """
-    return series / series.sum() if series.sum() > 0 else series
+# Reparto super familia → familia → producto (vectorizado, ver models/reconciliation.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reconciliation import SUPER_FAMILY_CONFIG, run_top_down
 
-def distribute_forecast(total_forecast, proportions):
-    """
-    Distribuye el pronóstico total según las proporciones
-    asegurando que la suma sea igual al total
-    """
-    distributed = total_forecast * proportions
-    # Ajustar por redondeo
-    adjustment = total_forecast - distributed.sum()
-    distributed.iloc[0] += adjustment
-    return distributed
+forecast_dir = SUPER_FAMILY_CONFIG['Invierno']['forecast_dir']
 
-# Configuración de rutas
-base_dir = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data'
-forecast_dir = os.path.join(base_dir,'processed', 'Invierno')
-file_path = os.path.join(base_dir,'Input', 'Invierno.xlsx')
-forecast_path = 'Proyección_15MM_Invierno.csv'
-
-# Cargar datos
-print("Cargando datos...")
-data = pd.read_excel(file_path)
-data['Date'] = pd.to_datetime(data['Date'])
-
-# Cargar pronósticos SARIMA
-forecast_df = pd.read_csv(os.path.join(forecast_dir, forecast_path))
-
-# Convertir fechas
-data['Month'] = data['Date'].dt.to_period('M')
-forecast_df['Month'] = pd.to_datetime(forecast_df['Date']).dt.to_period('M')
-
-# Pronósticos de super familia
-super_family_forecast = forecast_df.rename(columns={'Forecast_Sales': 'Forecast_SuperFamily'})[['Month', 'Forecast_SuperFamily']]
-
-# Calcular proporciones históricas por familia
-print("Calculando proporciones...")
-family_props = data.groupby('Familia')['Sales'].sum()
-family_props = normalize_proportions(family_props)
-
-# Distribuir hacia familias
-print("Distribuyendo hacia familias...")
-family_forecast = []
-for _, row in super_family_forecast.iterrows():
-    forecast_value = row['Forecast_SuperFamily']
-    family_values = distribute_forecast(forecast_value, family_props)
-    
-    for familia, forecast in family_values.items():
-        family_forecast.append({
-            'Month': row['Month'],
-            'Familia': familia,
-            'Forecast_Family': forecast
-        })
-
-family_forecast_df = pd.DataFrame(family_forecast)
-
-# Calcular proporciones por producto dentro de cada familia
-print("Calculando proporciones por producto...")
-product_props = data.groupby(['Familia', 'Codigo Producto'])['Sales'].sum()
-product_props = product_props.groupby('Familia').transform(normalize_proportions)
-
-# Distribuir hacia productos
-print("Distribuyendo hacia productos...")
-product_forecast = []
-for _, row in family_forecast_df.iterrows():
-    familia = row['Familia']
-    forecast_value = row['Forecast_Family']
-    
-    if familia in product_props.index.get_level_values(0):
-        products = product_props.loc[familia]
-        product_values = distribute_forecast(forecast_value, products)
-        
-        for product_code, forecast in product_values.items():
-            product_forecast.append({
-                'Month': row['Month'],
-                'Familia': familia,
-                'Product_Code': product_code,
-                'Forecast_Product': forecast
-            })
-
-product_forecast_df = pd.DataFrame(product_forecast)
+print("Cargando datos y distribuyendo pronósticos...")
+super_family_forecast, family_forecast_df, product_forecast_df = run_top_down('Invierno', save=False)
 
 # Validaciones
 print("\nValidación de sumas totales:")
@@ -143,8 +68,8 @@ plt.show()
 
 # Guardar resultados
 print("\nGuardando resultados...")
-family_forecast_df.to_csv(os.path.join(forecast_dir, 'forecast_family_invierno.csv'), index=False)
-product_forecast_df.to_csv(os.path.join(forecast_dir, 'forecast_product_invierno.csv'), index=False)
+family_forecast_df.to_csv(os.path.join(forecast_dir, SUPER_FAMILY_CONFIG['Invierno']['family_output']), index=False)
+product_forecast_df.to_csv(os.path.join(forecast_dir, SUPER_FAMILY_CONFIG['Invierno']['product_output']), index=False)
 
 validation_df = pd.DataFrame({
     'Nivel': ['Super Familia', 'Familia', 'Producto'],
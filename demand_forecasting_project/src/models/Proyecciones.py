@@ -4,73 +4,50 @@ from datetime import datetime
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import argparse
 import os
+import sys
+import traceback
 import warnings
+from forecast_history import (
+    HISTORY_DIR, INDEX_FILE, append_forecast, migrate_csv_history, read_history, read_vintage
+)
+
+# Raíz del repositorio en el PATH para importar demand_forecasting_project.src.data
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+from demand_forecasting_project.src.data.Data_groups import CATEGORIES, read_super_family
 warnings.filterwarnings('ignore')
 
 def save_historical_forecast(forecast_df, category_name, forecast_date):
     """
-    Guarda el pronóstico en un archivo histórico con la fecha en que se realizó,
-    reemplazando sólo los meses que correspondan a la nueva proyección.
+    Agrega el pronóstico al histórico incremental de la categoría, particionado por la
+    fecha en que se realizó (ver forecast_history.py). No reescribe las corridas anteriores.
     """
-    history_dir = f'C:\\Users\\Ukryl\\stock-projection-app\\demand_forecasting_project\\data\\forecast_history\\{category_name}'
-    os.makedirs(history_dir, exist_ok=True)
-    
-    # Convertir a datetime para asegurar formatos
-    forecast_df = forecast_df.copy()
-    forecast_df['Date'] = pd.to_datetime(forecast_df['Date'])
-    
-    # Añadir columnas informativas
-    forecast_df['Forecast_Date'] = forecast_date.strftime('%Y-%m-%d')  # fecha en que se corre el modelo
-    forecast_df['Creation_Time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    history_file = os.path.join(history_dir, f'forecast_history_{category_name}.csv')
-    
-    if os.path.exists(history_file):
-        history_df = pd.read_csv(history_file)
-        history_df['Date'] = pd.to_datetime(history_df['Date'], errors='coerce')
-        
-        # 1) Eliminar del histórico cualquier registro cuyas fechas de pronóstico
-        #    estén en el mismo rango que estamos recalculando.
-        min_new_date = forecast_df['Date'].min()
-        max_new_date = forecast_df['Date'].max()
-        
-        mask = (history_df['Date'] >= min_new_date) & (history_df['Date'] <= max_new_date)
-        history_df = history_df[~mask]  # nos quedamos con lo fuera de ese rango
-        
-        # 2) Agregar el nuevo pronóstico
-        history_df = pd.concat([history_df, forecast_df], ignore_index=True)
-    else:
-        history_df = forecast_df
-    
-    # Guardar histórico actualizado
-    history_df.to_csv(history_file, index=False)
+    # Migración única del CSV antiguo (forecast_history_<categoria>.csv) si aún no existe el índice
+    legacy_file = os.path.join(HISTORY_DIR, category_name, f'forecast_history_{category_name}.csv')
+    index_file = os.path.join(HISTORY_DIR, category_name, INDEX_FILE)
+    if os.path.exists(legacy_file) and not os.path.exists(index_file):
+        migrate_csv_history(category_name, legacy_file)
+
+    history_file = append_forecast(forecast_df, category_name, forecast_date)
     print(f"Histórico de proyecciones actualizado en: {history_file}")
 
 
 def load_historical_forecast(category_name, target_date=None):
     """
-    Carga las proyecciones históricas para una fecha específica.
+    Carga las proyecciones históricas realizadas en una fecha específica.
     Si no se especifica fecha, devuelve todo el histórico.
     """
-    history_file = f'C:\\Users\\Ukryl\\stock-projection-app\\demand_forecasting_project\\data\\forecast_history\\{category_name}\\forecast_history_{category_name}.csv'
-    
-    if not os.path.exists(history_file):
-        return None
-    
     try:
-        history_df = pd.read_csv(history_file)
-        
-        # Convertir las fechas asegurando el formato correcto
-        history_df['Date'] = pd.to_datetime(history_df['Date']).dt.strftime('%Y-%m-%d')
-        history_df['Forecast_Date'] = pd.to_datetime(history_df['Forecast_Date'])
-        
         if target_date:
-            target_date = pd.to_datetime(target_date)
-            return history_df[history_df['Forecast_Date'] == target_date]
-        
-        return history_df
-    
+            return read_vintage(category_name, target_date)
+        return read_history(category_name)
+
     except Exception as e:
         print(f"Error al cargar el histórico: {str(e)}")
         return None
@@ -99,9 +76,21 @@ def setup_forecast_periods():
     
     return current_date, train_start, train_end, forecast_start, forecast_periods
 
-def load_and_prepare_data(file_path, train_start, train_end):
-    """Carga y prepara los datos para el pronóstico."""
-    data = pd.read_csv(file_path)
+# Columnas que usa el pronóstico de una Super Familia
+SERIES_COLUMNS = ['Date', 'Sales']
+
+
+def load_and_prepare_data(super_family, train_start, train_end, data=None):
+    """
+    Carga y prepara los datos para el pronóstico.
+
+    Args:
+        super_family (str): Super Familia; se lee sólo su partición (Data_groups) y sólo
+            las columnas SERIES_COLUMNS
+        data (pd.DataFrame): datos de la categoría ya cargados (p.ej. entregados en memoria
+            por el orquestador). Si no se entregan se lee la partición.
+    """
+    data = read_super_family(super_family, columns=SERIES_COLUMNS) if data is None else data[SERIES_COLUMNS].copy()
     data['Date'] = pd.to_datetime(data['Date'])
     
     # Filtrar datos entre train_start y train_end inclusive
@@ -116,13 +105,20 @@ def load_and_prepare_data(file_path, train_start, train_end):
     
     return data, monthly_sales
 
-def generate_forecast(monthly_sales, forecast_periods, use_seasonal=True):
+def select_model(n_observations, use_seasonal=True):
+    """Modelo que usa generate_forecast según el largo de la serie: 'HW+SARIMA' o 'HW'."""
+    if n_observations >= 24 and use_seasonal:
+        return 'HW+SARIMA'
+    return 'HW'
+
+def generate_forecast(monthly_sales, forecast_periods, use_seasonal=True, verbose=True):
     """Genera pronósticos usando el modelo apropiado según los datos disponibles."""
     n_observations = len(monthly_sales)
     
-    if n_observations >= 24 and use_seasonal:
+    if select_model(n_observations, use_seasonal) == 'HW+SARIMA':
         # Si tenemos suficientes datos, usamos modelos estacionales
-        print("Usando modelos estacionales...")
+        if verbose:
+            print("Usando modelos estacionales...")
         
         # Holt-Winters
         hw_model = ExponentialSmoothing(
@@ -146,7 +142,8 @@ def generate_forecast(monthly_sales, forecast_periods, use_seasonal=True):
         
     else:
         # Si tenemos pocos datos, usamos un modelo más simple
-        print("Usando modelo simple debido a datos limitados...")
+        if verbose:
+            print("Usando modelo simple debido a datos limitados...")
         
         model = ExponentialSmoothing(
             monthly_sales['Sales'],
@@ -158,15 +155,25 @@ def generate_forecast(monthly_sales, forecast_periods, use_seasonal=True):
     
     return forecast
 
-def run_forecast(category_name, file_path):
-    """Ejecuta el pronóstico para una categoría específica."""
+def run_forecast(category_name, super_family, periods=None, data=None):
+    """
+    Ejecuta el pronóstico para una categoría específica.
+
+    Args:
+        super_family (str): Super Familia de la categoría (partición de Data_groups)
+        periods (tuple): salida de setup_forecast_periods(). Si no se entrega se calcula aquí;
+            al correr varias categorías se calcula una sola vez para que todas usen las mismas fechas.
+        data (pd.DataFrame): datos de la categoría en memoria (None = leer la partición)
+    """
     print(f"\n=== Pronóstico para categoría: {category_name} ===")
     
     # 1) Configurar periodos
-    current_date, train_start, train_end, forecast_start, forecast_periods = setup_forecast_periods()
+    if periods is None:
+        periods = setup_forecast_periods()
+    current_date, train_start, train_end, forecast_start, forecast_periods = periods
     
     # 2) Cargar y preparar datos de entrenamiento
-    data, monthly_sales = load_and_prepare_data(file_path, train_start, train_end)
+    data, monthly_sales = load_and_prepare_data(super_family, train_start, train_end, data)
     
     # 3) Generar pronóstico de 15 meses
     forecast_values = generate_forecast(monthly_sales, forecast_periods, use_seasonal=True)
@@ -208,19 +215,84 @@ def run_forecast(category_name, file_path):
     except Exception as e:
         print(f"No se pudo cargar la comparación con el mes anterior: {str(e)}")
 
+    return forecast_df
 
-def main():
-    categories = {
-        'Invierno': 'processed_data_invierno.csv',
-        'Verano': 'processed_data_hilos verano.csv',
-        'Bebé': 'processed_data_bebé.csv'
-    }
-    
-    base_path = r'C:\Users\Ukryl\stock-projection-app\demand_forecasting_project\data\processed'
-    
-    for category, filename in categories.items():
-        file_path = os.path.join(base_path, filename)
-        run_forecast(category, file_path)
+
+def _run_forecast_isolated(category_name, super_family, periods, data=None):
+    """Envuelve run_forecast para que el error de una categoría no detenga a las demás."""
+    try:
+        return run_forecast(category_name, super_family, periods, data), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def _collect_forecast(future):
+    """
+    Resultado de una categoría ejecutada en el pool. Si su proceso murió (falta de
+    memoria, caída nativa de statsmodels) el pool queda roto y la categoría se marca
+    como fallida, igual que un error de run_forecast.
+    """
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        return None, traceback.format_exc()
+
+
+def main(max_workers=None, categories=None, data=None):
+    """
+    Ejecuta el pronóstico de todas las categorías.
+
+    Args:
+        max_workers (int): procesos en paralelo. None = uno por categoría (hasta el número
+            de CPUs); 1 = ejecución secuencial en el proceso actual.
+        categories (dict): categoría -> Super Familia. Por defecto CATEGORIES.
+        data (dict): categoría -> DataFrame ya cargado; las categorías que no estén se leen
+            de su partición.
+
+    Returns:
+        dict: categoría -> DataFrame del pronóstico (None si falló), en el orden de categories.
+    """
+    categories = categories or CATEGORIES
+    data = data or {}
+
+    # Mismas fechas de entrenamiento/pronóstico para todas las categorías
+    periods = setup_forecast_periods()
+    jobs = dict(categories)
+
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        outcomes = {
+            category: _run_forecast_isolated(category, super_family, periods, data.get(category))
+            for category, super_family in jobs.items()
+        }
+    else:
+        print(f"Ejecutando {len(jobs)} categorías con {max_workers} procesos...")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                category: executor.submit(_run_forecast_isolated, category, super_family, periods, data.get(category))
+                for category, super_family in jobs.items()
+            }
+            outcomes = {category: _collect_forecast(future) for category, future in futures.items()}
+
+    # Resumen en el orden de las categorías (independiente del orden de término)
+    results = {}
+    print("\n=== Resumen de pronósticos ===")
+    for category, (forecast_df, error) in outcomes.items():
+        results[category] = forecast_df
+        if error is None:
+            print(f"- {category}: OK")
+        else:
+            print(f"- {category}: ERROR\n{error}")
+
+    return results
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Pronóstico de 15 meses por categoría.")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Procesos en paralelo (por defecto uno por categoría; 1 = secuencial)."
+    )
+    args = parser.parse_args()
+    main(max_workers=args.workers)
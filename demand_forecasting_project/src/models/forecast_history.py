@@ -0,0 +1,148 @@
+"""
+Histórico de proyecciones incremental (append-only) por categoría.
+
+Cada corrida del modelo agrega un archivo nuevo, sin reescribir lo anterior:
+
+    forecast_history/<categoria>/Forecast_Date=YYYY-MM-DD/part-<Creation_Time>.parquet
+    forecast_history/<categoria>/index.csv    (Date, Forecast_Date, Creation_Time, File)
+
+- Escribir es O(filas nuevas): un parquet nuevo y un append al índice.
+- "La proyección hecha el día X" es la lectura directa de la partición Forecast_Date=X
+  (la versión más reciente si ese día se corrió más de una vez).
+- "Todas las proyecciones para el mes Y" usa el índice por Date para leer sólo los
+  archivos que contienen ese mes.
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HISTORY_DIR = os.path.join(PROJECT_DIR, 'data', 'forecast_history')
+
+INDEX_FILE = 'index.csv'
+
+
+def _category_dir(category_name, history_dir=None):
+    return os.path.join(history_dir or HISTORY_DIR, category_name)
+
+
+def _partition_dir(category_name, forecast_date, history_dir=None):
+    forecast_date = pd.Timestamp(forecast_date).strftime('%Y-%m-%d')
+    return os.path.join(_category_dir(category_name, history_dir), f'Forecast_Date={forecast_date}')
+
+
+def append_forecast(forecast_df, category_name, forecast_date, history_dir=None, creation_time=None):
+    """
+    Agrega una proyección (columnas Date y Forecast_Sales) al histórico de la categoría.
+
+    Returns:
+        str: ruta del archivo escrito
+    """
+    creation_time = pd.Timestamp(creation_time or datetime.now())
+
+    forecast_df = forecast_df[['Date', 'Forecast_Sales']].copy()
+    forecast_df['Date'] = pd.to_datetime(forecast_df['Date'])
+    forecast_df['Forecast_Date'] = pd.Timestamp(forecast_date).strftime('%Y-%m-%d')
+    forecast_df['Creation_Time'] = creation_time.strftime('%Y-%m-%d %H:%M:%S')
+
+    partition_dir = _partition_dir(category_name, forecast_date, history_dir)
+    os.makedirs(partition_dir, exist_ok=True)
+    file_path = os.path.join(partition_dir, f"part-{creation_time.strftime('%Y%m%dT%H%M%S%f')}.parquet")
+    forecast_df.to_parquet(file_path, index=False)
+
+    # Índice por Date (append, sin releer el histórico)
+    index_path = os.path.join(_category_dir(category_name, history_dir), INDEX_FILE)
+    index_rows = forecast_df[['Date', 'Forecast_Date', 'Creation_Time']].assign(
+        File=os.path.relpath(file_path, os.path.dirname(index_path))
+    )
+    index_rows.to_csv(index_path, mode='a', header=not os.path.exists(index_path), index=False)
+
+    return file_path
+
+
+def read_vintage(category_name, forecast_date, history_dir=None, all_versions=False):
+    """
+    Proyección hecha el día forecast_date (lectura directa de su partición).
+
+    Args:
+        all_versions (bool): si ese día hubo varias corridas, devolverlas todas
+            (por defecto sólo la más reciente).
+
+    Returns:
+        pd.DataFrame o None si no existe una proyección de ese día.
+    """
+    partition_dir = _partition_dir(category_name, forecast_date, history_dir)
+    if not os.path.isdir(partition_dir):
+        return None
+
+    files = sorted(f for f in os.listdir(partition_dir) if f.endswith('.parquet'))
+    if not files:
+        return None
+    if not all_versions:
+        files = files[-1:]
+
+    return pd.concat(
+        [pd.read_parquet(os.path.join(partition_dir, f)) for f in files],
+        ignore_index=True
+    )
+
+
+def read_target_month(category_name, target_date, history_dir=None):
+    """
+    Todas las proyecciones (vintages) hechas para el mes de target_date.
+
+    Returns:
+        pd.DataFrame ordenado por Forecast_Date y Creation_Time (vacío si no hay).
+    """
+    category_dir = _category_dir(category_name, history_dir)
+    index_path = os.path.join(category_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return pd.DataFrame(columns=['Date', 'Forecast_Sales', 'Forecast_Date', 'Creation_Time'])
+
+    target_month = pd.Timestamp(target_date).to_period('M')
+    index_df = pd.read_csv(index_path, parse_dates=['Date'])
+    files = index_df.loc[index_df['Date'].dt.to_period('M') == target_month, 'File'].unique()
+
+    frames = []
+    for file in files:
+        df = pd.read_parquet(os.path.join(category_dir, file))
+        frames.append(df[df['Date'].dt.to_period('M') == target_month])
+
+    if not frames:
+        return pd.DataFrame(columns=['Date', 'Forecast_Sales', 'Forecast_Date', 'Creation_Time'])
+    return pd.concat(frames, ignore_index=True).sort_values(['Forecast_Date', 'Creation_Time'], ignore_index=True)
+
+
+def read_history(category_name, history_dir=None):
+    """Histórico completo de la categoría (todas las vintages y versiones)."""
+    category_dir = _category_dir(category_name, history_dir)
+    if not os.path.isdir(category_dir):
+        return None
+
+    frames = [
+        pd.read_parquet(os.path.join(root, f))
+        for root, _, files in os.walk(category_dir)
+        for f in sorted(files) if f.endswith('.parquet')
+    ]
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True).sort_values(['Forecast_Date', 'Creation_Time', 'Date'], ignore_index=True)
+
+
+def migrate_csv_history(category_name, csv_path, history_dir=None):
+    """
+    Importa un forecast_history_<categoria>.csv antiguo al histórico incremental
+    (una vez). Las filas sin Date válida se descartan.
+    """
+    legacy = pd.read_csv(csv_path)
+    legacy['Date'] = pd.to_datetime(legacy['Date'], errors='coerce')
+    legacy = legacy.dropna(subset=['Date', 'Forecast_Date'])
+
+    written = 0
+    for (forecast_date, creation_time), df in legacy.groupby(['Forecast_Date', 'Creation_Time']):
+        append_forecast(df, category_name, forecast_date, history_dir, creation_time=creation_time)
+        written += len(df)
+
+    print(f"[{category_name}] Migradas {written} filas desde {csv_path}")
+    return written
@@ -0,0 +1,211 @@
+"""
+Modelo global de gradient boosting con pronóstico recursivo por lotes.
+
+En vez de ajustar un modelo por serie (miles de Holt-Winters / SARIMA por producto),
+GlobalForecaster entrena un solo XGBRegressor con las filas de todas las series (features
+de lag_features: rezagos, ventanas móviles y mes del año) y pronostica el horizonte
+completo de todas las series a la vez:
+
+    paso h:  features del mes siguiente para todas las series  ->  un predict
+             la predicción pasa a ser el último dato de cada serie  ->  paso h+1
+
+Cada serie se divide por su escala (promedio de su historia) antes de armar las features,
+para que productos de 5 kg y de 5.000 kg compartan el mismo modelo; el pronóstico se
+devuelve en la unidad original y sin negativos. Los hiperparámetros pueden salir de
+tuning.tune_xgboost (tune=True).
+
+Uso (modelo global vs un Holt-Winters por serie sobre un panel sintético):
+    python global_forecast.py --benchmark --series 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Añadir la raíz del repositorio al PATH para importar las features
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+from demand_forecasting_project.src.features.lag_features import (
+    LAGS, WINDOWS, build_lag_features, feature_names, lag_feature_matrix, month_numbers, to_wide,
+)
+from tuning import PARAM_SPACE, fit_best, tune_xgboost
+
+FORECAST_HORIZON = 15  # Meses, igual que Proyecciones
+DEFAULT_PARAMS = {'n_estimators': 200, 'learning_rate': 0.1, 'max_depth': 5,
+                  'subsample': 0.8, 'colsample_bytree': 1.0}
+
+
+def series_scale(values):
+    """Promedio de la historia de cada serie (1 si es 0 o no tiene datos)."""
+    with np.errstate(invalid='ignore'):
+        scale = np.nanmean(np.where(np.isnan(values).all(axis=1, keepdims=True), 1.0, values), axis=1)
+    return np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+
+
+class GlobalForecaster:
+    def __init__(self, lags=LAGS, windows=WINDOWS, calendar=True, params=None, normalize=True, seed=0):
+        """
+        Args:
+            lags, windows, calendar: Features (ver lag_features)
+            params (dict): Hiperparámetros de XGBRegressor (por defecto DEFAULT_PARAMS)
+            normalize (bool): Dividir cada serie por su escala antes de entrenar
+        """
+        self.lags = tuple(lags)
+        self.windows = tuple(windows)
+        self.calendar = calendar
+        self.params = dict(params or DEFAULT_PARAMS)
+        self.normalize = normalize
+        self.seed = seed
+        self.model = None
+        self.history = None
+        self.tuning = None
+
+    @property
+    def features(self):
+        return feature_names(self.lags, self.windows, self.calendar)
+
+    def _scaled(self, wide):
+        values = wide.to_numpy(dtype=float)
+        scale = series_scale(values) if self.normalize else np.ones(len(values))
+        return values / scale[:, None], scale
+
+    def training_table(self, wide):
+        """Filas de entrenamiento de todas las series (con al menos un mes de historia), en orden temporal."""
+        scaled, _ = self._scaled(wide)
+        table = build_lag_features(pd.DataFrame(scaled, index=wide.index, columns=wide.columns),
+                                   self.lags, self.windows, self.calendar)
+        if self.lags:
+            table = table[table[f'Lag{min(self.lags)}'].notna()]
+        return table.sort_values('Date', kind='stable').reset_index(drop=True)
+
+    def fit(self, wide, tune=False, param_space=PARAM_SPACE, budget_seconds=60.0):
+        """
+        Entrena el modelo global con todas las series de wide (formato de
+        lag_features.to_wide).
+
+        Args:
+            tune (bool): Buscar los hiperparámetros con tuning.tune_xgboost antes de entrenar
+        """
+        table = self.training_table(wide)
+        X, y = table[self.features].to_numpy(dtype=np.float32), table['target'].to_numpy(dtype=np.float32)
+        if tune:
+            self.tuning = tune_xgboost(X, y, param_space, budget_seconds=budget_seconds, seed=self.seed)
+            self.params = self.tuning['best_params']
+        self.model = fit_best(X, y, self.params, seed=self.seed)
+        self.history = wide
+        print(f"Modelo global entrenado: {len(wide)} series, {len(table)} filas, {len(self.features)} features.")
+        return self
+
+    def forecast(self, wide=None, horizon=FORECAST_HORIZON):
+        """
+        Pronóstico recursivo de horizon meses para todas las series a la vez.
+
+        Args:
+            wide (pd.DataFrame): historia a partir de la cual pronosticar (por defecto la
+                del entrenamiento)
+
+        Returns:
+            pd.DataFrame: <serie>, Date y Forecast_Sales (horizon filas por serie)
+        """
+        if self.model is None:
+            raise RuntimeError("El modelo global no está entrenado: ejecuta fit primero")
+        wide = self.history if wide is None else wide
+        scaled, scale = self._scaled(wide)
+        months = month_numbers(wide.columns, horizon)
+        # Sólo se necesitan los últimos meses para las features del paso siguiente
+        keep = min(max(self.lags + self.windows + (1,)), wide.shape[1])
+        values = np.hstack([scaled[:, -keep:], np.full((len(scaled), horizon), np.nan)])
+        months = months[-(keep + horizon):]
+
+        for step in range(horizon):
+            position = keep + step
+            X = lag_feature_matrix(values[:, :position], months[:position + 1], [position],
+                                   self.lags, self.windows, self.calendar)
+            values[:, position] = np.maximum(self.model.predict(X.astype(np.float32)), 0)
+
+        forecast = values[:, keep:] * scale[:, None]
+        dates = pd.date_range(wide.columns[-1], periods=horizon + 1, freq='MS')[1:]
+        id_col = wide.index.name or 'series'
+        return pd.DataFrame({
+            id_col: np.repeat(wide.index.to_numpy(), horizon),
+            'Date': np.tile(dates, len(wide)),
+            'Forecast_Sales': forecast.ravel(),
+        })
+
+
+def forecast_products(data, horizon=FORECAST_HORIZON, id_col='Product_Code', date_col='Date',
+                      value_col='Sales', tune=False, **forecaster_kwargs):
+    """
+    Pronóstico por producto desde ventas en formato largo (p.ej. una partición de
+    Data_groups) con un solo modelo global.
+
+    Returns:
+        tuple: (GlobalForecaster entrenado, DataFrame id_col / Date / Forecast_Sales)
+    """
+    wide = to_wide(data, id_col, date_col, value_col)
+    forecaster = GlobalForecaster(**forecaster_kwargs).fit(wide, tune=tune)
+    return forecaster, forecaster.forecast(horizon=horizon)
+
+
+def make_synthetic_panel(n_series=500, n_months=60, seed=0):
+    """Panel sintético: escala, tendencia y estacionalidad distintas por serie, inicios escalonados."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_months)
+    level = rng.lognormal(4, 1, (n_series, 1))
+    season = 1 + rng.uniform(0.1, 0.5, (n_series, 1)) * np.sin(2 * np.pi * (t + rng.integers(0, 12, (n_series, 1))) / 12)
+    trend = 1 + rng.normal(0, 0.005, (n_series, 1)) * t
+    values = level * season * trend * rng.lognormal(0, 0.15, (n_series, n_months))
+    starts = rng.integers(0, 24, n_series)
+    values[t[None, :] < starts[:, None]] = np.nan
+    dates = pd.date_range('2020-01-01', periods=n_months, freq='MS')
+    return pd.DataFrame(values, index=pd.Index([f'P{i:05d}' for i in range(n_series)], name='Product_Code'),
+                        columns=dates)
+
+
+def benchmark(n_series=500, horizon=FORECAST_HORIZON):
+    """
+    Últimos horizon meses como prueba: modelo global (un fit, pronóstico por lotes) vs
+    un Holt-Winters aditivo por serie.
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    panel = make_synthetic_panel(n_series)
+    train, test = panel.iloc[:, :-horizon], panel.iloc[:, -horizon:].to_numpy()
+
+    start = time.perf_counter()
+    forecaster = GlobalForecaster().fit(train)
+    global_forecast = forecaster.forecast(horizon=horizon)['Forecast_Sales'].to_numpy().reshape(len(panel), horizon)
+    global_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    local_forecast = np.empty_like(test)
+    for i, row in enumerate(train.to_numpy()):
+        history = row[~np.isnan(row)]
+        seasonal = 'add' if len(history) >= 24 else None
+        model = ExponentialSmoothing(history, trend='add', seasonal=seasonal,
+                                     seasonal_periods=12 if seasonal else None).fit()
+        local_forecast[i] = np.maximum(model.forecast(horizon), 0)
+    local_seconds = time.perf_counter() - start
+
+    def wape(forecast):
+        return np.abs(forecast - test).sum() / np.abs(test).sum()
+
+    print(f"{n_series} series, {horizon} meses: modelo global {global_seconds:.1f} s (WAPE {wape(global_forecast):.3f}), "
+          f"Holt-Winters por serie {local_seconds:.1f} s (WAPE {wape(local_forecast):.3f})")
+    return global_seconds, local_seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modelo global de XGBoost con pronóstico recursivo.")
+    parser.add_argument("--benchmark", action="store_true", help="Compara con un Holt-Winters por serie.")
+    parser.add_argument("--series", type=int, default=500, help="Series del panel sintético.")
+    parser.add_argument("--horizon", type=int, default=FORECAST_HORIZON)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.series, args.horizon)
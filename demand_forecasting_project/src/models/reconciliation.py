@@ -0,0 +1,221 @@
+"""
+Reconciliación top-down: super familia → familia → producto.
+
+Reemplaza los loops con iterrows de Invierno/Top_Down.py, Bebé/Top_down_25.py e
+Hilos_Verano/Top_Down_Verano_25.py. El reparto se hace como producto externo de
+vectores de proporciones (meses × familias y meses × productos) con NumPy, manteniendo
+el ajuste por redondeo de distribute_forecast: la diferencia entre el total y la suma
+repartida se suma al primer elemento de cada nivel.
+
+Las tres super familias se configuran en SUPER_FAMILY_CONFIG. Como en los scripts
+originales, Verano y Bebé asignan el pronóstico de una familia sin historial de productos
+a un producto genérico (NO_HISTORY_PRODUCT) e Invierno no entrega filas de producto para
+esas familias (no_history_product=False). El historial de ventas
+sale de un Excel (history_file) o de la partición de la Super Familia en los datos
+procesados (history_super_family, ver Data_groups), leyendo sólo las columnas del reparto.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Raíz del repositorio en el PATH para importar demand_forecasting_project.src.data
+if os.path.dirname(PROJECT_DIR) not in sys.path:
+    sys.path.append(os.path.dirname(PROJECT_DIR))
+
+from demand_forecasting_project.src.data.Data_groups import partition_path, read_super_family
+from demand_forecasting_project.src.data.excel_cache import read_excel_cached
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+
+# Producto genérico para familias sin historial de productos
+NO_HISTORY_PRODUCT = 'Sin_Historial'
+
+SUPER_FAMILY_CONFIG = {
+    'Invierno': {
+        'forecast_dir': os.path.join(DATA_DIR, 'processed', 'Invierno'),
+        'forecast_file': 'Proyección_15MM_Invierno.csv',
+        'history_file': os.path.join(DATA_DIR, 'input', 'Invierno.xlsx'),
+        'product_col': 'Codigo Producto',
+        'no_history_product': False,
+        'family_output': 'forecast_family_invierno.csv',
+        'product_output': 'forecast_product_invierno.csv',
+    },
+    'Verano': {
+        'forecast_dir': os.path.join(DATA_DIR, 'processed', 'Verano'),
+        'forecast_file': 'Proyección_15MM_Verano.csv',
+        'history_super_family': 'HILOS VERANO',
+        'product_col': 'Product_Code',
+        'no_history_product': True,
+        'family_output': 'forecast_family_2025.csv',
+        'product_output': 'forecast_product_2025.csv',
+    },
+    'Bebé': {
+        'forecast_dir': os.path.join(DATA_DIR, 'processed', 'Bebé'),
+        'forecast_file': 'Proyección_15MM_Bebé.csv',
+        'history_super_family': 'BEBÉ',
+        'product_col': 'Product_Code',
+        'no_history_product': True,
+        'family_output': 'forecast_family_2025.csv',
+        'product_output': 'forecast_product_2025.csv',
+    },
+}
+
+
+def normalize_proportions(series):
+    """
+    Normaliza una serie asegurando que sume 1
+    """
+    return series / series.sum() if series.sum() > 0 else series
+
+
+def historical_proportions(data, product_col='Product_Code'):
+    """
+    Proporciones históricas de venta.
+
+    Returns:
+        tuple: (family_props: Serie por Familia que suma 1,
+                product_props: Serie con índice (Familia, producto) que suma 1 dentro de cada Familia)
+    """
+    family_props = normalize_proportions(data.groupby('Familia', observed=True)['Sales'].sum())
+
+    # observed=True: con claves categóricas, sólo los pares (Familia, producto) con ventas
+    product_props = data.groupby(['Familia', product_col], observed=True)['Sales'].sum()
+    product_props = product_props.groupby(level=0, observed=True).transform(normalize_proportions)
+    product_props.index = product_props.index.set_names(['Familia', 'Product_Code'])
+
+    return family_props, product_props
+
+
+def distribute_forecast(super_family_forecast, family_props, product_props, no_history_product=True):
+    """
+    Reparte el pronóstico de super familia hacia familias y productos.
+
+    Args:
+        super_family_forecast (pd.DataFrame): columnas Month y Forecast_SuperFamily
+        family_props (pd.Series): proporción por Familia
+        product_props (pd.Series): proporción por (Familia, Product_Code) dentro de la Familia
+        no_history_product (bool): Asignar el pronóstico de las familias sin productos a
+            NO_HISTORY_PRODUCT (False = esas familias no tienen filas de producto)
+
+    Returns:
+        tuple: (family_forecast_df [Month, Familia, Forecast_Family],
+                product_forecast_df [Month, Familia, Product_Code, Forecast_Product])
+    """
+    months = super_family_forecast['Month'].to_numpy()
+    totals = super_family_forecast['Forecast_SuperFamily'].to_numpy(dtype=float)
+    families = family_props.index.to_numpy()
+    n_months = len(months)
+
+    # Meses × familias, con el ajuste por redondeo en la primera familia
+    family_matrix = np.outer(totals, family_props.to_numpy(dtype=float))
+    if len(families):
+        family_matrix[:, 0] += totals - family_matrix.sum(axis=1)
+
+    # Productos de las familias pronosticadas; las familias sin productos
+    # reciben un producto genérico que se lleva todo su pronóstico
+    product_props = product_props[product_props.index.get_level_values('Familia').isin(families)]
+    missing = np.setdiff1d(families, product_props.index.get_level_values('Familia').unique())
+    if no_history_product and len(missing):
+        generic = pd.Series(
+            1.0, index=pd.MultiIndex.from_product([missing, [NO_HISTORY_PRODUCT]], names=product_props.index.names)
+        )
+        product_props = pd.concat([product_props, generic])
+
+    # Productos en el mismo orden que las familias (bloques contiguos por familia)
+    family_position = pd.Index(families).get_indexer(product_props.index.get_level_values('Familia'))
+    order = np.argsort(family_position, kind='stable')
+    product_props = product_props.iloc[order]
+    family_position = family_position[order]
+    product_families = product_props.index.get_level_values('Familia')
+
+    # Meses × productos: pronóstico de la familia por la proporción del producto
+    product_matrix = family_matrix[:, family_position] * product_props.to_numpy(dtype=float)
+
+    # Ajuste por redondeo en el primer producto de cada familia (bloques contiguos)
+    if len(family_position):
+        starts = np.flatnonzero(np.r_[True, np.diff(family_position) != 0])
+        block_sums = np.add.reduceat(product_matrix, starts, axis=1)
+        product_matrix[:, starts] += family_matrix[:, family_position[starts]] - block_sums
+
+    family_forecast_df = pd.DataFrame({
+        'Month': np.repeat(months, len(families)),
+        'Familia': np.tile(families, n_months),
+        'Forecast_Family': family_matrix.ravel(),
+    })
+    product_forecast_df = pd.DataFrame({
+        'Month': np.repeat(months, len(product_props)),
+        'Familia': np.tile(product_families.to_numpy(), n_months),
+        'Product_Code': np.tile(product_props.index.get_level_values('Product_Code').to_numpy(), n_months),
+        'Forecast_Product': product_matrix.ravel(),
+    })
+    return family_forecast_df, product_forecast_df
+
+
+def history_path(super_family):
+    """Archivo del historial de ventas de una super familia configurada."""
+    config = SUPER_FAMILY_CONFIG[super_family]
+    if 'history_super_family' in config:
+        return partition_path(config['history_super_family'])
+    return config['history_file']
+
+
+def load_inputs(super_family, forecast_df=None, history=None):
+    """
+    Carga el pronóstico de super familia y el historial de ventas según SUPER_FAMILY_CONFIG.
+    forecast_df (Date, Forecast_Sales) e history pueden entregarse ya cargados en memoria.
+    """
+    config = SUPER_FAMILY_CONFIG[super_family]
+
+    if forecast_df is None:
+        forecast_df = pd.read_csv(os.path.join(config['forecast_dir'], config['forecast_file']))
+    else:
+        forecast_df = forecast_df.copy()
+    forecast_df['Month'] = pd.to_datetime(forecast_df['Date']).dt.to_period('M')
+    super_family_forecast = forecast_df.rename(
+        columns={'Forecast_Sales': 'Forecast_SuperFamily'}
+    )[['Month', 'Forecast_SuperFamily']]
+
+    if history is not None:
+        data = history
+    elif 'history_super_family' in config:
+        data = read_super_family(config['history_super_family'],
+                                 columns=['Familia', config['product_col'], 'Sales'])
+    else:
+        data = read_excel_cached(config['history_file'])
+
+    return super_family_forecast, data
+
+
+def run_top_down(super_family, save=True, forecast_df=None, history=None):
+    """
+    Ejecuta el top-down completo de una super familia configurada y guarda los CSV de
+    familia y producto en su carpeta de pronósticos.
+
+    forecast_df e history (ver load_inputs) evitan releer los CSV cuando el paso anterior
+    ya los tiene en memoria.
+
+    Returns:
+        tuple: (super_family_forecast, family_forecast_df, product_forecast_df)
+    """
+    config = SUPER_FAMILY_CONFIG[super_family]
+    super_family_forecast, data = load_inputs(super_family, forecast_df, history)
+
+    family_props, product_props = historical_proportions(data, config['product_col'])
+    family_forecast_df, product_forecast_df = distribute_forecast(
+        super_family_forecast, family_props, product_props, config['no_history_product']
+    )
+
+    if save:
+        family_forecast_df.to_csv(os.path.join(config['forecast_dir'], config['family_output']), index=False)
+        product_forecast_df.to_csv(os.path.join(config['forecast_dir'], config['product_output']), index=False)
+        print(f"[{super_family}] Proyecciones por familia y producto guardadas en: {config['forecast_dir']}")
+
+    return super_family_forecast, family_forecast_df, product_forecast_df
+
+
+if __name__ == "__main__":
+    for name in SUPER_FAMILY_CONFIG:
+        run_top_down(name)
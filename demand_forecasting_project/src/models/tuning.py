@@ -0,0 +1,262 @@
+"""
+Búsqueda rápida de hiperparámetros de XGBoost sobre features de rezagos.
+
+Reemplaza al GridSearchCV exhaustivo (108 combinaciones × 3 folds, un hilo) de
+Cinta,Borlas&Cola_ratón/xg_boost.py y sirve para cualquier familia: recibe la matriz
+de features (X) y la venta (y) ya ordenadas en el tiempo.
+
+- Folds de TimeSeriesSplit armados una vez (FoldCache): los DMatrix de entrenamiento y
+  validación de cada fold se comparten entre todos los candidatos.
+- n_estimators no es una dimensión de la búsqueda sino el recurso: cada candidato se
+  entrena hasta el mayor n_estimators y se evalúa en todos los valores de la grilla
+  con iteration_range (un 200 entrega también el 50 y el 100).
+- method='halving' (successive halving): todos los candidatos parten con pocas rondas;
+  tras cada escalón sigue 1/eta de ellos (los mejores), continuando el mismo booster.
+  method='random': una muestra de candidatos con todas las rondas.
+- Los pares (candidato, fold) de cada escalón se entrenan en paralelo (un hilo por
+  núcleo, nthread=1 por modelo: XGBoost libera el GIL al entrenar).
+- budget_seconds: pasado el plazo no se inician entrenamientos nuevos y se devuelve el
+  mejor candidato evaluado en todos sus folds.
+
+Uso (comparación con el GridSearchCV anterior sobre una serie sintética):
+    python tuning.py --benchmark
+"""
+import argparse
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import TimeSeriesSplit
+
+# Grilla del xg_boost.py original
+PARAM_SPACE = {
+    'n_estimators': [50, 100, 200],
+    'learning_rate': [0.01, 0.1, 0.2],
+    'max_depth': [2, 3, 5],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0],
+}
+RESOURCE = 'n_estimators'
+BASE_PARAMS = {'objective': 'reg:squarederror', 'tree_method': 'hist', 'nthread': 1}
+
+
+class FoldCache:
+    def __init__(self, X, y, n_splits=3):
+        """
+        Folds de validación temporal con sus matrices ya armadas.
+
+        Args:
+            X: Features (filas en orden temporal)
+            y: Valor a predecir
+            n_splits (int): Folds de TimeSeriesSplit
+        """
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        y = np.asarray(y, dtype=np.float32)
+        self.folds = []
+        for train_idx, valid_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+            self.folds.append((
+                xgb.DMatrix(X[train_idx], label=y[train_idx], nthread=1),
+                xgb.DMatrix(X[valid_idx], nthread=1),
+                y[valid_idx],
+            ))
+
+    def __len__(self):
+        return len(self.folds)
+
+
+def sample_candidates(param_space=PARAM_SPACE, n_candidates=None, seed=0):
+    """
+    Combinaciones de la grilla sin la dimensión de rondas (n_estimators), todas o una
+    muestra aleatoria de n_candidates.
+    """
+    names = [name for name in param_space if name != RESOURCE]
+    grid = [dict(zip(names, values)) for values in itertools.product(*(param_space[n] for n in names))]
+    if n_candidates is None or n_candidates >= len(grid):
+        return grid
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in sorted(rng.choice(len(grid), n_candidates, replace=False))]
+
+
+def _rungs(rounds, method, eta):
+    """Rondas de cada escalón: la más chica de la grilla, ×eta hasta la mayor."""
+    if method == 'random':
+        return [max(rounds)]
+    rungs, current = [], min(rounds)
+    while current < max(rounds):
+        rungs.append(current)
+        current *= eta
+    return rungs + [max(rounds)]
+
+
+def _fit_fold(booster, params, fold, start, stop, rounds, seed, deadline):
+    """
+    Sigue entrenando el booster de un (candidato, fold) de start a stop rondas y
+    devuelve el MAE de validación en cada valor de rounds alcanzado (None si se agotó
+    el presupuesto antes de empezar).
+    """
+    if time.monotonic() > deadline:
+        return None
+    dtrain, dvalid, y_valid = fold
+    booster = xgb.train({**BASE_PARAMS, **params, 'seed': seed}, dtrain,
+                        num_boost_round=stop - start, xgb_model=booster)
+    scores = {
+        n: float(np.mean(np.abs(booster.predict(dvalid, iteration_range=(0, n)) - y_valid)))
+        for n in rounds if start < n <= stop
+    }
+    return booster, scores
+
+
+def tune_xgboost(X, y, param_space=PARAM_SPACE, method='halving', n_candidates=None, eta=3,
+                 n_splits=3, budget_seconds=60.0, max_workers=None, seed=0, folds=None):
+    """
+    Busca los hiperparámetros de XGBRegressor con menor MAE en validación temporal.
+
+    Args:
+        param_space (dict): valores por hiperparámetro (n_estimators = rondas a evaluar)
+        method (str): 'halving' (successive halving) o 'random'
+        n_candidates (int): candidatos a muestrear (None = toda la grilla con halving,
+            un tercio con random)
+        eta (int): factor de descarte y de aumento de rondas entre escalones
+        budget_seconds (float): tiempo máximo; al agotarse se devuelve lo evaluado
+        max_workers (int): hilos de entrenamiento (None = núcleos disponibles)
+        folds (FoldCache): folds ya armados para reutilizar entre búsquedas
+
+    Returns:
+        dict: best_params (incluye n_estimators), best_score (MAE medio), results
+            (DataFrame con cada candidato × n_estimators evaluado), seconds y
+            budget_exhausted
+    """
+    if method not in ('halving', 'random'):
+        raise ValueError(f"Método de búsqueda desconocido: {method}")
+    start_time = time.monotonic()
+    deadline = start_time + budget_seconds
+    folds = folds or FoldCache(X, y, n_splits)
+    rounds = sorted(param_space.get(RESOURCE, [100]))
+    if n_candidates is None and method == 'random':
+        n_candidates = max(1, len(sample_candidates(param_space)) // 3)
+    candidates = sample_candidates(param_space, n_candidates, seed)
+
+    boosters = {}     # (candidato, fold) -> booster entrenado hasta trained[candidato]
+    trained = dict.fromkeys(range(len(candidates)), 0)
+    fold_scores = {}  # (candidato, n_estimators) -> MAE por fold
+    alive = list(range(len(candidates)))
+    budget_exhausted = False
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for rung in _rungs(rounds, method, eta):
+            futures = {
+                (c, f): executor.submit(_fit_fold, boosters.get((c, f)), candidates[c], folds.folds[f],
+                                        trained[c], rung, rounds, seed, deadline)
+                for c in alive for f in range(len(folds))
+            }
+            completed = []
+            for c in alive:
+                results = [futures[(c, f)].result() for f in range(len(folds))]
+                if any(result is None for result in results):
+                    budget_exhausted = True
+                    continue
+                for f, (booster, scores) in enumerate(results):
+                    boosters[(c, f)] = booster
+                    for n, score in scores.items():
+                        fold_scores.setdefault((c, n), []).append(score)
+                trained[c] = rung
+                completed.append(c)
+
+            if budget_exhausted or rung == max(rounds):
+                break
+            # Siguen los mejores 1/eta (por su mejor MAE hasta ahora)
+            best_so_far = {c: min(np.mean(fold_scores[(c, n)]) for n in rounds if n <= rung) for c in completed}
+            keep = max(1, math.ceil(len(completed) / eta))
+            alive = sorted(completed, key=best_so_far.get)[:keep]
+
+    if not fold_scores:
+        raise RuntimeError(f"Ningún candidato alcanzó a evaluarse en {budget_seconds} s")
+
+    evaluated = sorted(fold_scores, key=lambda key: np.mean(fold_scores[key]))
+    best_candidate, best_rounds = evaluated[0]
+    best_params = {**candidates[best_candidate], RESOURCE: best_rounds}
+    results = pd.DataFrame([
+        {**candidates[c], RESOURCE: n, 'mae': np.mean(fold_scores[(c, n)]), 'mae_std': np.std(fold_scores[(c, n)])}
+        for c, n in evaluated
+    ])
+    return {
+        'best_params': best_params,
+        'best_score': float(results['mae'].iloc[0]),
+        'results': results,
+        'seconds': time.monotonic() - start_time,
+        'budget_exhausted': budget_exhausted,
+    }
+
+
+def fit_best(X, y, best_params, seed=0, n_jobs=None):
+    """XGBRegressor con los mejores hiperparámetros, entrenado con todo X, y."""
+    from xgboost import XGBRegressor
+
+    model = XGBRegressor(objective='reg:squarederror', tree_method='hist', random_state=seed,
+                         n_jobs=n_jobs, **best_params)
+    return model.fit(X, y)
+
+
+def make_synthetic_lag_data(n_months=72, seed=0):
+    """Venta mensual sintética (tendencia, estacionalidad y ruido) con Lag1-Lag3 y Stock_Break."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2019-01-01', periods=n_months, freq='MS')
+    t = np.arange(n_months)
+    sales = 1000 + 8 * t + 250 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 60, n_months)
+    data = pd.DataFrame({'Sales': sales}, index=dates)
+    for lag in (1, 2, 3):
+        data[f'Lag{lag}'] = data['Sales'].shift(lag)
+    data['Stock_Break'] = rng.random(n_months) < 0.05
+    return data.dropna().astype(float)
+
+
+def benchmark(n_months=72, budget_seconds=60.0):
+    """GridSearchCV exhaustivo (antes) vs tune_xgboost con halving y random."""
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import GridSearchCV
+    from xgboost import XGBRegressor
+
+    data = make_synthetic_lag_data(n_months)
+    features = ['Lag1', 'Lag2', 'Lag3', 'Stock_Break']
+    split = int(len(data) * 0.8)
+    train, test = data.iloc[:split], data.iloc[split:]
+
+    def holdout_mae(model):
+        return mean_absolute_error(test['Sales'], model.predict(test[features]))
+
+    start = time.perf_counter()
+    grid = GridSearchCV(XGBRegressor(objective='reg:squarederror', tree_method='hist', n_jobs=1),
+                        PARAM_SPACE, cv=TimeSeriesSplit(n_splits=3), scoring='neg_mean_absolute_error')
+    grid.fit(train[features], train['Sales'])
+    rows = [{'Búsqueda': 'GridSearchCV', 'Segundos': time.perf_counter() - start,
+             'MAE CV': -grid.best_score_, 'MAE prueba': holdout_mae(grid.best_estimator_),
+             'Parámetros': grid.best_params_}]
+
+    folds = FoldCache(train[features], train['Sales'])
+    for method in ('halving', 'random'):
+        result = tune_xgboost(train[features], train['Sales'], method=method,
+                              budget_seconds=budget_seconds, folds=folds)
+        model = fit_best(train[features], train['Sales'], result['best_params'])
+        rows.append({'Búsqueda': method, 'Segundos': result['seconds'], 'MAE CV': result['best_score'],
+                     'MAE prueba': holdout_mae(model), 'Parámetros': result['best_params']})
+
+    report = pd.DataFrame(rows)
+    with pd.option_context('display.max_colwidth', 120, 'display.width', 200):
+        print(report.to_string(index=False, float_format='{:.2f}'.format))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros de XGBoost.")
+    parser.add_argument("--benchmark", action="store_true", help="Compara con el GridSearchCV anterior.")
+    parser.add_argument("--months", type=int, default=72, help="Meses de la serie sintética.")
+    parser.add_argument("--budget", type=float, default=60.0, help="Presupuesto en segundos.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.months, args.budget)
@@ -0,0 +1,209 @@
+"""
+Orquestador en proceso de pasos con dependencias (DAG).
+
+Cada paso es una función que recibe un dict con los resultados de sus dependencias
+(nombre del paso -> valor devuelto) y devuelve su propio resultado, que queda en memoria
+para los pasos siguientes: no hay un intérprete nuevo por paso ni un CSV intermedio que
+releer. Los pasos cuyas dependencias ya terminaron se ejecutan en un ThreadPoolExecutor,
+así que los independientes (p.ej. las consultas SQL o los tres top-down) corren a la vez.
+
+Se registra la duración de cada paso. Si un paso falla, los que dependen de él se
+omiten y el resto sigue.
+
+Recomputación incremental: cada paso declara sus archivos de entrada y de salida, su
+código y sus parámetros. Con un PipelineState (state.py), un paso cuya huella no cambió
+desde la última corrida exitosa se marca 'cached' y no se ejecuta; sus dependientes
+reciben None en lugar de su resultado y leen sus salidas desde disco.
+"""
+import inspect
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+OK = 'ok'
+CACHED = 'cached'
+ERROR = 'error'
+SKIPPED = 'skipped'
+PENDING = 'pending'
+RUNNING = 'running'
+
+
+class Step:
+    def __init__(self, name, func, deps=(), inputs=(), outputs=(), code=(), params=None):
+        """
+        Args:
+            name (str): Nombre único del paso
+            func (callable): func(inputs) con inputs = {dependencia: resultado}; el
+                resultado de una dependencia omitida por estar al día es None
+            deps (iterable): Nombres de los pasos de los que depende
+            inputs (iterable): Archivos que lee (sin entradas el paso siempre se ejecuta)
+            outputs (iterable): Archivos que escribe
+            code (iterable): Archivos de código del paso, además del de func
+            params: Valores (serializables a JSON) que también invalidan el paso
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.code = tuple(code)
+        self.params = params
+
+    def code_files(self):
+        """Archivos cuyo contenido define la versión del código del paso."""
+        own = inspect.getsourcefile(self.func)
+        return tuple(dict.fromkeys(((own,) if own else ()) + self.code))
+
+    def __repr__(self):
+        return f"Step({self.name!r}, deps={list(self.deps)})"
+
+
+def topological_order(steps):
+    """
+    Nombres de los pasos en un orden que respeta las dependencias (el de la lista
+    cuando hay empate).
+
+    Raises:
+        ValueError: nombres repetidos, dependencias inexistentes o ciclos
+    """
+    by_name = {}
+    for step in steps:
+        if step.name in by_name:
+            raise ValueError(f"Paso repetido: {step.name}")
+        by_name[step.name] = step
+    for step in steps:
+        missing = [dep for dep in step.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"El paso {step.name} depende de pasos inexistentes: {missing}")
+
+    order, done = [], set()
+    pending = list(by_name)
+    while pending:
+        ready = [name for name in pending if all(dep in done for dep in by_name[name].deps)]
+        if not ready:
+            raise ValueError(f"Dependencias circulares entre: {pending}")
+        order.extend(ready)
+        done.update(ready)
+        pending = [name for name in pending if name not in done]
+    return order
+
+
+def select_steps(steps, targets):
+    """Los pasos targets y todos aquellos de los que dependen (en el orden de steps)."""
+    by_name = {step.name: step for step in steps}
+    needed, pending = set(), list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in by_name:
+            raise ValueError(f"Paso inexistente: {name}")
+        if name not in needed:
+            needed.add(name)
+            pending.extend(by_name[name].deps)
+    return [step for step in steps if step.name in needed]
+
+
+def run_steps(steps, max_workers=None, callback=None, state=None, force=False):
+    """
+    Ejecuta los pasos respetando sus dependencias, en paralelo cuando se puede.
+
+    Args:
+        steps (list[Step]): Pasos del pipeline
+        max_workers (int): Hilos en paralelo (por defecto uno por paso, hasta 8; 1 = secuencial)
+        callback (callable): callback(name, status, seconds) para cada paso al inicio de la
+            corrida ('pending'), al empezar ('running') y al terminar u omitirse; seconds es
+            None salvo al terminar
+        state (PipelineState): Huellas de la última corrida; None = ejecutar todo sin registrar
+        force (bool): Ejecutar todos los pasos aunque estén al día (y registrar sus huellas)
+
+    Returns:
+        dict: results (paso -> resultado), status (paso -> 'ok'/'cached'/'error'/'skipped'),
+            timings (paso -> segundos), errors (paso -> traceback), wall_time y ok
+            (True si ningún paso falló ni se omitió por una falla)
+    """
+    order = topological_order(steps)
+    by_name = {step.name: step for step in steps}
+    max_workers = max_workers or min(len(steps), 8) or 1
+
+    results, status, timings, errors = {}, {}, {}, {}
+    notify = callback or (lambda name, step_status, seconds: None)
+
+    def run_one(step):
+        start = time.perf_counter()
+        try:
+            fingerprint = state.fingerprint(step) if state is not None else None
+            if fingerprint is not None and not force and state.is_fresh(step, fingerprint):
+                return CACHED, None, None, time.perf_counter() - start
+
+            value = step.func({dep: results.get(dep) for dep in step.deps})
+            if state is not None:
+                state.record(step, fingerprint)
+            return OK, value, None, time.perf_counter() - start
+        except Exception:
+            if state is not None:
+                state.forget(step.name)
+            return ERROR, None, traceback.format_exc(), time.perf_counter() - start
+
+    for name in order:
+        notify(name, PENDING, None)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while len(status) < len(order):
+            # Omitir los pasos con alguna dependencia fallida u omitida
+            for name in order:
+                if name not in status and name not in running.values() and any(
+                    status.get(dep) in (ERROR, SKIPPED) for dep in by_name[name].deps
+                ):
+                    status[name] = SKIPPED
+                    print(f"[pipeline] {name}: omitido (falló una dependencia)")
+                    notify(name, SKIPPED, None)
+
+            # Lanzar los pasos cuyas dependencias terminaron bien
+            for name in order:
+                step = by_name[name]
+                if name not in status and name not in running.values() and all(
+                    status.get(dep) in (OK, CACHED) for dep in step.deps
+                ):
+                    print(f"[pipeline] {name}: iniciando")
+                    notify(name, RUNNING, None)
+                    running[executor.submit(run_one, step)] = name
+
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                step_status, value, error, seconds = future.result()
+                status[name] = step_status
+                timings[name] = seconds
+                if step_status == OK:
+                    results[name] = value
+                    print(f"[pipeline] {name}: OK en {seconds:.1f} s")
+                elif step_status == CACHED:
+                    print(f"[pipeline] {name}: al día, omitido ({seconds:.1f} s)")
+                else:
+                    errors[name] = error
+                    print(f"[pipeline] {name}: ERROR en {seconds:.1f} s\n{error}")
+                if state is not None:
+                    state.save()
+                notify(name, step_status, seconds)
+
+    return {
+        'results': results,
+        'status': {name: status[name] for name in order if name in status},
+        'timings': timings,
+        'errors': errors,
+        'wall_time': time.perf_counter() - started,
+        'ok': all(status.get(name) in (OK, CACHED) for name in order),
+    }
+
+
+def timings_table(run):
+    """Duración y estado de cada paso de una corrida de run_steps, como texto."""
+    lines = [f"{'Paso':<24}{'Estado':<10}{'Segundos':>10}"]
+    for name, step_status in run['status'].items():
+        seconds = run['timings'].get(name)
+        lines.append(f"{name:<24}{step_status:<10}{'' if seconds is None else f'{seconds:.1f}':>10}")
+    lines.append(f"{'Total (reloj)':<34}{run['wall_time']:>10.1f}")
+    return "\n".join(lines)
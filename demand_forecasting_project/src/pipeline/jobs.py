@@ -0,0 +1,134 @@
+"""
+Ejecución en segundo plano del pipeline para el dashboard.
+
+JobRunner tiene una cola local (queue.Queue) y un único hilo trabajador, así que hay a
+lo sumo una corrida a la vez: submit no encola un trabajo nuevo mientras hay otro en
+cola o en ejecución, y devuelve ese. El trabajador actualiza el registro del trabajo con
+el callback de dag.run_steps (estado y segundos de cada paso); la interfaz lo consulta
+con get/latest en cada rerun (polling), sin bloquear la sesión.
+
+Los resultados nuevos llegan a los dashboards sólo al final, con el paso publish del
+pipeline (publish.py).
+"""
+import copy
+import queue
+import threading
+import traceback
+import uuid
+from datetime import datetime
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+def _run_job(kind, params, callback):
+    """Ejecuta un trabajo del tipo kind y devuelve la corrida de dag.run_steps."""
+    # Import diferido: statsmodels/sklearn sólo se cargan al correr el primer trabajo
+    from demand_forecasting_project.src.pipeline import model_pipeline
+
+    runners = {
+        'model': model_pipeline.run_model_pipeline,
+        'stock': model_pipeline.run_stock_refresh,
+        'demand': model_pipeline.run_demand_update,
+    }
+    return runners[kind](callback=callback, **params)
+
+
+class JobRunner:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._order = []
+        self._worker = threading.Thread(target=self._work, name='pipeline-jobs', daemon=True)
+        self._worker.start()
+
+    def submit(self, kind='model', **params):
+        """
+        Encola un trabajo ('model', 'stock' o 'demand') si no hay otro pendiente.
+
+        Returns:
+            tuple: (registro del trabajo, True si se creó / False si ya había uno activo)
+        """
+        with self._lock:
+            active = self._active()
+            if active is not None:
+                return copy.deepcopy(active), False
+
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                'id': job_id,
+                'kind': kind,
+                'params': params,
+                'status': QUEUED,
+                'submitted_at': datetime.now(),
+                'started_at': None,
+                'finished_at': None,
+                'wall_time': None,
+                'steps': {},  # paso -> {'status', 'seconds'}
+                'error': None,
+            }
+            self._jobs[job_id] = job
+            self._order.append(job_id)
+            self._queue.put(job_id)
+            return copy.deepcopy(job), True
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def latest(self, kind=None):
+        """Último trabajo enviado (del tipo kind si se indica)."""
+        with self._lock:
+            for job_id in reversed(self._order):
+                if kind is None or self._jobs[job_id]['kind'] == kind:
+                    return copy.deepcopy(self._jobs[job_id])
+        return None
+
+    def is_busy(self):
+        with self._lock:
+            return self._active() is not None
+
+    def _active(self):
+        for job_id in self._order:
+            if self._jobs[job_id]['status'] in (QUEUED, RUNNING):
+                return self._jobs[job_id]
+        return None
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                kind, params = job['kind'], dict(job['params'])
+            self._update(job_id, status=RUNNING, started_at=datetime.now())
+
+            def callback(name, step_status, seconds):
+                with self._lock:
+                    self._jobs[job_id]['steps'][name] = {'status': step_status, 'seconds': seconds}
+
+            try:
+                run = _run_job(kind, params, callback)
+                errors = '\n'.join(f"{name}:\n{error}" for name, error in run['errors'].items())
+                result = {'status': SUCCEEDED if run['ok'] else FAILED,
+                          'error': errors or None, 'wall_time': run['wall_time']}
+            except Exception:
+                result = {'status': FAILED, 'error': traceback.format_exc()}
+            self._update(job_id, finished_at=datetime.now(), **result)
+            self._queue.task_done()
+
+
+def job_progress(job):
+    """Fracción de pasos terminados (ok, al día, con error u omitidos) de un trabajo."""
+    steps = job['steps']
+    if not steps:
+        return 0.0 if job['status'] in (QUEUED, RUNNING) else 1.0
+    done = sum(1 for step in steps.values() if step['status'] not in ('pending', 'running'))
+    return done / len(steps)
@@ -0,0 +1,353 @@
+"""
+Pipeline del modelo de proyección, ejecutado en proceso con el orquestador de dag.py.
+
+Reemplaza la cadena de subprocess.run(["python", script]) de Main.py y de
+dashboard.run_model_pipeline: cada script se llama como función y los DataFrames pasan
+en memoria de un paso al siguiente (los CSV que leen los dashboards se siguen
+escribiendo). Dependencias:
+
+    hierarchy                          (hierarchy_map.py: hierarchy_index.npz)
+    processor ─> groups ─> forecast    (run_processor*.py, Data_groups.py: dataset por
+                                        Super Familia, Proyecciones.py)
+    forecast, groups ─> top_down_Invierno / top_down_Verano / top_down_Bebé  (en paralelo)
+    top_down_* ─> consolidate ─> merged        (Consolidado_resultados.py, merged_data.py)
+    hierarchy ─> merged                (SuperFamily y Familia de merged2 desde el índice)
+    demand ─> merged                   (Demanda_real.py / demand_store.py, sólo con extract=True)
+    stock ─> stock_cono_ovillo         (Descarga_Stock.py, flow_details.py)
+    todos ─> publish                   (publish.py: los dashboards ven los resultados nuevos
+                                        sólo si todos los pasos terminaron bien; se publican
+                                        los artefactos de los pasos de la corrida, STEP_ARTIFACTS)
+
+Cada paso declara los archivos que lee y escribe y los módulos de su código: con el
+estado de state.py sólo se ejecutan los pasos cuyas entradas, código o parámetros
+cambiaron (el pronóstico depende además del mes de inicio). Las consultas SQL no tienen
+entradas declaradas y siempre se ejecutan; demand y stock corren a la vez con el pool de
+conexiones de sql_extract y escriben su Parquet por bloques.
+
+Uso:
+    python model_pipeline.py --input venta --extract    # lo que ejecutaba Main.py
+    python model_pipeline.py --stock-only               # refresco horario del stock
+"""
+import argparse
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_DIR = os.path.dirname(PROJECT_DIR)
+MODELS_DIR = os.path.join(PROJECT_DIR, 'src', 'models')
+
+# Raíz del repositorio (demand_forecasting_project.src...), el proyecto (merged_data,
+# Consolidado_resultados) y src/models (Proyecciones y reconciliation importan planos)
+for path in (REPO_DIR, PROJECT_DIR, MODELS_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from demand_forecasting_project.src import flow_details
+from demand_forecasting_project.src.data import Data_groups, data_loader, excel_cache, hierarchy_index, hierarchy_map
+from demand_forecasting_project.src.data import data_processor
+from demand_forecasting_project.src.data.Data_groups import group_filename, partition_path, split_by_super_family
+from demand_forecasting_project.src.data.data_processor import DataProcessor
+from demand_forecasting_project.src.data.hierarchy_map import build_hierarchy_mapping
+from demand_forecasting_project.src.data.schema import read_artifact
+from demand_forecasting_project.src.flow_details import build_stock_cono_ovillo
+from demand_forecasting_project.src.pipeline.dag import Step, run_steps, select_steps, timings_table
+from demand_forecasting_project.src.pipeline.publish import publish
+from demand_forecasting_project.src.pipeline.state import PipelineState
+
+import Consolidado_resultados
+import Proyecciones
+import forecast_history
+import merged_data
+import reconciliation
+import sales_cube
+from Consolidado_resultados import consolidar_proyecciones
+from merged_data import build_merged_data, save_merged_data
+from reconciliation import SUPER_FAMILY_CONFIG, history_path, run_top_down
+
+# Archivo de entrada del DataProcessor según el tipo de datos
+INPUT_FILES = {
+    'demand': 'data.xlsx',
+    'demanda': 'data.xlsx',
+    'venta': 'data_venta.xlsx',
+}
+
+RAW_DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'input')
+PROCESSED_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
+
+# Pasos del refresco de stock (sin reentrenar modelos)
+STOCK_STEPS = ['stock_cono_ovillo']
+
+# Artefactos publicados (publish.ARTIFACTS) que escribe cada paso
+STEP_ARTIFACTS = {
+    'hierarchy': ['hierarchy_index.npz'],
+    'consolidate': ['Consolidated_forecast.csv'],
+    'merged': ['merged2.csv', 'merged2_cube.parquet'],
+    'stock_cono_ovillo': ['Stock_Cono_Ovillo.csv'],
+}
+
+
+def processed_path(input_type):
+    """CSV que escribe el DataProcessor para el archivo de entrada."""
+    return os.path.join(PROCESSED_DIR, f"processed_{os.path.splitext(INPUT_FILES[input_type])[0]}.csv")
+
+
+def forecast_path(super_family):
+    config = SUPER_FAMILY_CONFIG[super_family]
+    return os.path.join(config['forecast_dir'], config['forecast_file'])
+
+
+def product_forecast_path(super_family):
+    config = SUPER_FAMILY_CONFIG[super_family]
+    return os.path.join(config['forecast_dir'], config['product_output'])
+
+
+# ------------------------------------------------------------------------------
+# Pasos: cada uno recibe {dependencia: resultado} y devuelve su resultado
+# ------------------------------------------------------------------------------
+def step_hierarchy(inputs):
+    return build_hierarchy_mapping()
+
+
+def make_step_processor(input_type):
+    input_file = INPUT_FILES[input_type]
+
+    def step_processor(inputs):
+        processor = DataProcessor(
+            raw_data_path=RAW_DATA_DIR,
+            processed_data_path=PROCESSED_DIR,
+            hierarchy_path=os.path.join(PROJECT_DIR, 'data', 'hierarchy_mapping.json')
+        )
+        return processor.process(input_file)
+
+    return step_processor
+
+
+def make_step_groups(input_type):
+    def step_groups(inputs):
+        processed = inputs['processor']
+        if processed is None:  # processor al día: su salida está en disco
+            processed = read_artifact(processed_path(input_type), 'processed_data')
+        return split_by_super_family(processed)
+
+    return step_groups
+
+
+def step_forecast(inputs):
+    """
+    Proyecciones.main con los datos de cada categoría en memoria. Falla si alguna
+    categoría no se pudo pronosticar: el top-down usaría su CSV anterior sin avisar y
+    el estado marcaría el paso como al día.
+    """
+    groups = inputs['groups'] or {}  # None = groups al día: cada categoría lee su partición
+    data = {
+        category: groups[sf] for category, sf in Proyecciones.CATEGORIES.items() if sf in groups
+    }
+    forecasts = Proyecciones.main(data=data)
+    failed = [category for category, forecast_df in forecasts.items() if forecast_df is None]
+    if failed:
+        raise RuntimeError(f"Falló el pronóstico de: {', '.join(failed)}")
+    return forecasts
+
+
+def make_step_top_down(super_family):
+    history_super_family = SUPER_FAMILY_CONFIG[super_family].get('history_super_family')
+
+    def step_top_down(inputs):
+        _, _, product_forecast_df = run_top_down(
+            super_family,
+            forecast_df=(inputs['forecast'] or {}).get(super_family),  # None = último CSV
+            history=(inputs['groups'] or {}).get(history_super_family),  # None = Excel / partición
+        )
+        return product_forecast_df
+
+    return step_top_down
+
+
+def step_consolidate(inputs):
+    product_forecasts = {
+        super_family: inputs[f'top_down_{super_family}'] for super_family in SUPER_FAMILY_CONFIG
+        if inputs[f'top_down_{super_family}'] is not None
+    }
+    consolidated = consolidar_proyecciones(product_forecasts)
+    if consolidated is None:
+        raise RuntimeError("No se pudo consolidar las proyecciones")
+    return consolidated
+
+
+def make_step_demand(full=False):
+    def step_demand(inputs):
+        """Actualiza el almacén de demanda desde la marca de agua (demand_store) y escribe demand_data.csv."""
+        from demand_forecasting_project.src.data.Demanda_real import save_demand_data
+        from demand_forecasting_project.src.data.demand_store import load_demand_store, update_demand_store
+
+        update_demand_store(full=full)
+        return save_demand_data(load_demand_store())
+
+    return step_demand
+
+
+def step_merged(inputs):
+    # Jerarquía desde el índice que escribe el paso hierarchy (en memoria o en disco)
+    index = inputs['hierarchy'] or hierarchy_index.load_hierarchy_index()
+    merged = build_merged_data(inputs['consolidate'], inputs.get('demand'), index)
+    save_merged_data(merged)
+    return merged
+
+
+def step_stock(inputs):
+    from demand_forecasting_project.src.Descarga_Stock import get_stock_data, save_stock_data
+
+    stock_data = get_stock_data()
+    if stock_data is None:
+        raise RuntimeError("No se pudo obtener el stock desde SQL Server")
+    return save_stock_data(stock_data)
+
+
+def step_stock_cono_ovillo(inputs):
+    return build_stock_cono_ovillo(inputs.get('stock'))
+
+
+def make_step_publish(step_names):
+    """
+    Publica sólo los artefactos de los pasos de esta corrida (todos terminaron bien o
+    estaban al día); los demás siguen siendo los de la versión publicada anterior.
+    """
+    names = [name for step in step_names for name in STEP_ARTIFACTS.get(step, [])]
+
+    def step_publish(inputs):
+        return publish(names=names)
+
+    return step_publish
+
+
+def with_publish(steps):
+    """Agrega la publicación de resultados, que depende de todos los pasos."""
+    step_names = [step.name for step in steps]
+    return steps + [Step('publish', make_step_publish(step_names), deps=step_names)]
+
+
+def build_steps(input_type='demand', extract=False):
+    """
+    Pasos del pipeline con sus archivos de entrada/salida y su código.
+
+    Args:
+        input_type (str): 'demand'/'demanda' (data.xlsx) o 'venta' (data_venta.xlsx)
+        extract (bool): incluir la descarga de demanda y stock desde SQL Server
+    """
+    top_down_steps = [f'top_down_{super_family}' for super_family in SUPER_FAMILY_CONFIG]
+    partition_files = [partition_path(sf) for sf in Proyecciones.CATEGORIES.values()]
+    group_files = partition_files + [
+        os.path.join(Data_groups.output_dir, group_filename(sf)) for sf in Proyecciones.CATEGORIES.values()
+    ]
+    forecast_start = Proyecciones.setup_forecast_periods()[3]
+    cube_path = os.path.join(os.path.dirname(merged_data.output_path), sales_cube.CUBE_FILENAME)
+
+    steps = [
+        Step('hierarchy', step_hierarchy,
+             inputs=[hierarchy_map.input_file_path],
+             outputs=[hierarchy_map.output_hierarchy_path, hierarchy_index.INDEX_PATH],
+             code=[hierarchy_map.__file__, hierarchy_index.__file__, excel_cache.__file__, Data_groups.__file__]),
+        Step('processor', make_step_processor(input_type),
+             inputs=[os.path.join(RAW_DATA_DIR, INPUT_FILES[input_type])], outputs=[processed_path(input_type)],
+             code=[data_processor.__file__, data_loader.__file__, excel_cache.__file__]),
+        Step('groups', make_step_groups(input_type), deps=['processor'],
+             inputs=[processed_path(input_type)], outputs=group_files,
+             code=[Data_groups.__file__, excel_cache.__file__]),
+        Step('forecast', step_forecast, deps=['groups'],
+             inputs=partition_files,
+             outputs=[forecast_path(category) for category in Proyecciones.CATEGORIES],
+             code=[Proyecciones.__file__, forecast_history.__file__, Data_groups.__file__],
+             params={'forecast_start': forecast_start}),
+    ]
+    steps += [
+        Step(name, make_step_top_down(super_family), deps=['forecast', 'groups'],
+             inputs=[forecast_path(super_family), history_path(super_family)],
+             outputs=[
+                 os.path.join(SUPER_FAMILY_CONFIG[super_family]['forecast_dir'],
+                              SUPER_FAMILY_CONFIG[super_family]['family_output']),
+                 product_forecast_path(super_family),
+             ],
+             code=[reconciliation.__file__, Data_groups.__file__, excel_cache.__file__])
+        for name, super_family in zip(top_down_steps, SUPER_FAMILY_CONFIG)
+    ]
+    steps.append(Step(
+        'consolidate', step_consolidate, deps=top_down_steps,
+        inputs=[product_forecast_path(super_family) for super_family in SUPER_FAMILY_CONFIG],
+        outputs=[Consolidado_resultados.CONSOLIDATED_PATH], code=[Consolidado_resultados.__file__, Data_groups.__file__]
+    ))
+
+    merged_deps = ['consolidate', 'hierarchy', 'demand'] if extract else ['consolidate', 'hierarchy']
+    stock_deps = ['stock'] if extract else []
+    if extract:
+        steps += [Step('demand', make_step_demand()), Step('stock', step_stock)]
+    steps += [
+        Step('merged', step_merged, deps=merged_deps,
+             inputs=[merged_data.projections_path, merged_data.sales_paths, hierarchy_index.INDEX_PATH],
+             outputs=[merged_data.output_path, cube_path],
+             code=[merged_data.__file__, sales_cube.__file__, hierarchy_index.__file__]),
+        Step('stock_cono_ovillo', step_stock_cono_ovillo, deps=stock_deps,
+             inputs=[flow_details.STOCK_DATA_PATH, flow_details.RELATION_CONE_PATH],
+             outputs=[flow_details.STOCK_CONO_OVILLO_PATH], code=[flow_details.__file__]),
+    ]
+    return steps
+
+
+def run_model_pipeline(input_type='demand', extract=False, max_workers=None, callback=None,
+                       targets=None, incremental=True, force=False, publish_results=True):
+    """
+    Ejecuta el pipeline y muestra la duración de cada paso.
+
+    Args:
+        targets (list): ejecutar sólo estos pasos y sus dependencias (None = todos)
+        incremental (bool): omitir los pasos al día según pipeline_state.json
+        force (bool): ejecutar todo aunque esté al día (y actualizar el estado)
+        publish_results (bool): publicar los artefactos de los dashboards al terminar bien
+
+    Returns:
+        dict: la corrida de dag.run_steps (results, status, timings, errors, wall_time, ok)
+    """
+    print(f"Usando datos de {'venta' if input_type == 'venta' else 'demanda'} ({INPUT_FILES[input_type]})")
+    steps = build_steps(input_type, extract)
+    if targets:
+        steps = select_steps(steps, targets)
+    if publish_results:
+        steps = with_publish(steps)
+    state = PipelineState() if incremental else None
+
+    run = run_steps(steps, max_workers=max_workers, callback=callback, state=state, force=force)
+    print("\n=== Tiempos por paso ===")
+    print(timings_table(run))
+    return run
+
+
+def run_stock_refresh(callback=None):
+    """Descarga el stock y recalcula sólo los pasos de stock (sin proyecciones ni SARIMA)."""
+    return run_model_pipeline(extract=True, targets=STOCK_STEPS, callback=callback)
+
+
+def run_demand_update(callback=None, full=False):
+    """
+    Sólo la descarga de demanda desde SQL Server (demand_data.csv): los meses desde la
+    marca de agua, o toda la ventana con full=True.
+    """
+    return run_steps([Step('demand', make_step_demand(full))], callback=callback)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline del modelo de proyección (en proceso).")
+    parser.add_argument("--input", choices=sorted(INPUT_FILES), default="demand",
+                        help="Datos de entrada del DataProcessor.")
+    parser.add_argument("--extract", action="store_true",
+                        help="Descargar también demanda y stock desde SQL Server.")
+    parser.add_argument("--workers", type=int, default=None, help="Pasos en paralelo (1 = secuencial).")
+    parser.add_argument("--only", nargs="+", default=None, help="Ejecutar sólo estos pasos y sus dependencias.")
+    parser.add_argument("--stock-only", action="store_true", help="Refresco de stock (descarga + stock_cono_ovillo).")
+    parser.add_argument("--force", action="store_true", help="Ejecutar todos los pasos aunque estén al día.")
+    args = parser.parse_args()
+
+    if args.stock_only:
+        run = run_stock_refresh()
+    else:
+        run = run_model_pipeline(args.input, extract=args.extract, max_workers=args.workers,
+                                 targets=args.only, force=args.force)
+    sys.exit(0 if run['ok'] else 1)
@@ -0,0 +1,96 @@
+"""
+Publicación atómica de los resultados que leen los dashboards.
+
+Los pasos del pipeline escriben sus archivos en las rutas de siempre mientras corren.
+Los dashboards no leen esas rutas directamente: leen la última versión publicada,
+
+    data/published/<run_id>/merged2.csv, merged2_cube.parquet, hierarchy_index.npz, ...
+    data/published/current.json    ({"run_id": ..., "files": {nombre: ruta}})
+
+publish() copia los artefactos a una carpeta nueva y recién entonces reemplaza
+current.json (os.replace). Mientras una corrida está en curso, o si falla, los
+dashboards siguen viendo la versión anterior completa. Una corrida parcial (p.ej. el
+refresco de stock) publica sólo los artefactos que produjeron sus pasos (names); los
+demás se copian desde la versión publicada anterior, no desde la ruta de trabajo, que
+puede haber quedado a medio escribir por otra corrida. current_path devuelve la ruta
+publicada de un artefacto, o la ruta de trabajo si todavía no se publicó nada.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_DIR = os.path.dirname(PROJECT_DIR)
+PUBLISHED_DIR = os.path.join(PROJECT_DIR, 'data', 'published')
+CURRENT_FILE = 'current.json'
+KEEP_VERSIONS = 3  # Versiones publicadas que se conservan (un lector puede seguir en la anterior)
+
+# Artefactos de los dashboards: nombre -> ruta de trabajo (donde los escribe el pipeline)
+ARTIFACTS = {
+    'merged2.csv': os.path.join(PROJECT_DIR, 'data', 'output', 'merged2.csv'),
+    'merged2_cube.parquet': os.path.join(PROJECT_DIR, 'data', 'output', 'merged2_cube.parquet'),
+    'Consolidated_forecast.csv': os.path.join(PROJECT_DIR, 'data', 'output', 'Consolidated_forecast.csv'),
+    'Stock_Cono_Ovillo.csv': os.path.join(REPO_DIR, 'Stock_Optimization', 'Results', 'Stock_Cono_Ovillo.csv'),
+    'hierarchy_index.npz': os.path.join(PROJECT_DIR, 'data', 'hierarchy_index.npz'),
+}
+
+
+def read_current(published_dir=PUBLISHED_DIR):
+    """Contenido de current.json (None si no hay nada publicado)."""
+    path = os.path.join(published_dir, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def current_path(name, default=None, published_dir=PUBLISHED_DIR):
+    """Ruta publicada del artefacto name; default (o la ruta de trabajo) si no se ha publicado."""
+    current = read_current(published_dir)
+    path = current['files'].get(name) if current else None
+    if path and os.path.exists(path):
+        return path
+    return default or ARTIFACTS[name]
+
+
+def publish(run_id=None, artifacts=None, published_dir=PUBLISHED_DIR, names=None):
+    """
+    Copia los artefactos a una versión nueva y la deja como la actual.
+
+    Args:
+        names (list): artefactos producidos por esta corrida, que se copian desde su ruta
+            de trabajo (None = todos los que existan). El resto se copia desde la versión
+            publicada anterior, si la hay.
+
+    Returns:
+        dict: el nuevo current.json
+    """
+    artifacts = artifacts or ARTIFACTS
+    names = set(artifacts if names is None else names)
+    previous = (read_current(published_dir) or {}).get('files', {})
+    run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    version_dir = os.path.join(published_dir, run_id)
+    os.makedirs(version_dir, exist_ok=True)
+
+    files = {}
+    for name, working_path in artifacts.items():
+        source = working_path if name in names else previous.get(name)
+        if source and os.path.exists(source):
+            files[name] = os.path.join(version_dir, name)
+            shutil.copy2(source, files[name])
+
+    current = {'run_id': run_id, 'published_at': datetime.now().isoformat(timespec='seconds'), 'files': files}
+    tmp_path = os.path.join(published_dir, f'{CURRENT_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(published_dir, CURRENT_FILE))
+    print(f"Resultados publicados ({len(files)} archivos) en: {version_dir}")
+
+    # Versiones antiguas
+    versions = sorted(d for d in os.listdir(published_dir) if os.path.isdir(os.path.join(published_dir, d)))
+    for old in versions[:-KEEP_VERSIONS]:
+        if old != run_id:
+            shutil.rmtree(os.path.join(published_dir, old), ignore_errors=True)
+
+    return current
@@ -0,0 +1,95 @@
+"""
+Estado del pipeline para recomputar sólo lo que cambió.
+
+Por cada paso se guarda la huella de la última corrida exitosa:
+
+    sha256 de cada archivo de entrada, sha256 del código del paso, parámetros
+    (p.ej. el mes del pronóstico) y sha256 de cada archivo de salida
+
+en un JSON (por defecto data/pipeline_state.json). Un paso está al día si al momento de
+ejecutarlo sus entradas, su código y sus parámetros tienen la misma huella y sus
+salidas siguen existiendo sin cambios; el orquestador (dag.run_steps) lo omite.
+
+Como en excel_cache, el sha256 de un archivo sólo se recalcula cuando cambian su mtime
+o su tamaño.
+"""
+import json
+import os
+import threading
+
+from demand_forecasting_project.src.data.excel_cache import file_sha256
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STATE_PATH = os.path.join(PROJECT_DIR, 'data', 'pipeline_state.json')
+
+
+class PipelineState:
+    def __init__(self, path=STATE_PATH):
+        """
+        Args:
+            path (str): JSON con las huellas de los pasos y de los archivos
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {'steps': {}, 'files': {}}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._state = json.load(f)
+
+    def file_hash(self, path):
+        """sha256 del archivo (None si no existe), reutilizado si mtime y tamaño no cambiaron."""
+        key = os.path.abspath(path)
+        if not os.path.exists(key):
+            return None
+        stat = os.stat(key)
+        with self._lock:
+            known = self._state['files'].get(key)
+        if known and known['mtime'] == stat.st_mtime and known['size'] == stat.st_size:
+            return known['sha256']
+
+        sha256 = file_sha256(key)
+        with self._lock:
+            self._state['files'][key] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': sha256}
+        return sha256
+
+    def fingerprint(self, step):
+        """Huella de entradas, código y parámetros del paso."""
+        return {
+            'inputs': {path: self.file_hash(path) for path in step.inputs},
+            'code': {path: self.file_hash(path) for path in step.code_files()},
+            'params': json.loads(json.dumps(step.params, default=str)),
+        }
+
+    def is_fresh(self, step, fingerprint):
+        """
+        True si el paso puede omitirse: tiene entradas declaradas (un paso sin entradas,
+        como una consulta SQL, siempre se ejecuta), la huella coincide con la de la
+        última corrida y las salidas están como quedaron.
+        """
+        if not step.inputs or None in fingerprint['inputs'].values():
+            return False
+        with self._lock:
+            last = self._state['steps'].get(step.name)
+        if last is None or last['fingerprint'] != fingerprint:
+            return False
+        return all(self.file_hash(path) == sha256 for path, sha256 in last['outputs'].items())
+
+    def record(self, step, fingerprint):
+        """Guarda la huella de una corrida exitosa del paso con el hash de sus salidas."""
+        outputs = {path: self.file_hash(path) for path in step.outputs}
+        with self._lock:
+            self._state['steps'][step.name] = {'fingerprint': fingerprint, 'outputs': outputs}
+
+    def forget(self, step_name):
+        with self._lock:
+            self._state['steps'].pop(step_name, None)
+
+    def save(self):
+        """Escribe el JSON (reemplazo atómico)."""
+        with self._lock:
+            payload = json.dumps(self._state, indent=2, ensure_ascii=False)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
@@ -20,7 +20,7 @@ RELATION_CONE_PATH = os.path.join(DATA_DIR, "relation_cone_skein.xlsx")
 OUTPUT_FILE = os.path.join(DATA_DIR, "consolidated_forecast.csv")
 # Credenciales DB (si usas .env)
 SERVER = os.getenv("SQL_SERVER", "186.10.95.240")
-DATABASE = os.getenv("DATABASE", "tasa_entel_srv")
-USERNAME = os.getenv("USERNAME", "tasa_entel_usr")
-PASSWORD = os.getenv("PASSWORD", "t4s43nt3l")
+DATABASE = os.getenv("SQL_DATABASE", "tasa_entel_srv")
+USERNAME = os.getenv("SQL_USERNAME", "tasa_entel_usr")
+PASSWORD = os.getenv("SQL_PASSWORD", "t4s43nt3l")
 
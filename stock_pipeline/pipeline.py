@@ -12,11 +12,12 @@ pipeline.py - Versión Ajustada
 
 3. step_run_model():
    - Lee stock_data, forecast_data y relation_data (Cono→Ovillo).
-   - Combina y genera archivos intermedios en subcarpetas de 'Results'.
-   - (Opcional) Aplica lógica de simulación de consumo (Stock_Flow).
+   - Calcula el flujo de stock (Stock_Flow) de todos los productos con stock_flow.py.
+   - Guarda el resultado como dataset Parquet particionado por SuperFamily/Familia
+     (opcional: exporta además los *_details.csv por producto).
 
 4. step_consolidate_results():
-   - Recorre la carpeta 'Results' y busca '*_details.csv' para unificarlos en "stock_unificado.csv".
+   - Lee el dataset de resultados en una pasada y genera "stock_unificado.csv".
 
 5. run_pipeline():
    - Ejecuta los pasos 1→2→3→4.
@@ -27,21 +28,26 @@ import sys
 import os
 import pandas as pd
 
-SERVER = '186.10.95.240'  # Reemplaza con el nombre de tu servidor
-DATABASE = 'tasa_entel_srv'  # Reemplaza con el nombre de tu base de datos
-USERNAME = 'tasa_entel_usr'  # Reemplaza con tu usuario
-PASSWORD = 't4s43nt3l'  # Reemplaza con tu contraseña
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STOCK_DATA_PATH   = "Stock_Optimization/Data/stock_data.csv" 
 FORECAST_DATA_PATH = "Stock_Optimization/Data/consolidated_forecast.csv" 
 RELATION_CONE_PATH = "Stock_Optimization/Data/relation_cone_skein.xlsx"
 PROCESSED_DIR = os.path.join(BASE_DIR, "..", "demand_forecasting_project", "data", "processed")
 RESULTS_DIR = os.path.join(BASE_DIR, "..", "Stock_Optimization", "Results")
+RESULTS_DATASET_DIR = os.path.join(RESULTS_DIR, "stock_flow_dataset")
+STOCK_UNIFICADO_PATH = os.path.join(RESULTS_DIR, "stock_unificado.csv")
 
 # Agregar la raíz del proyecto al sys.path
 project_root = BASE_DIR
 if project_root not in sys.path:
     sys.path.append(project_root)
+# Y la raíz del repositorio (consulta de stock compartida en demand_forecasting_project)
+if os.path.dirname(BASE_DIR) not in sys.path:
+    sys.path.append(os.path.dirname(BASE_DIR))
+
+from stock_flow import compute_stock_flow, split_by_product
+from results_store import consolidate_results, export_legacy_csv, write_results
+from demand_forecasting_project.src.data.schema import write_artifact
 
 # Archivo final unificado que el dashboard leerá
 
@@ -50,36 +56,21 @@ if project_root not in sys.path:
 # ------------------------------------------------------------------------------
 def step_get_stock():
     """
-    Conecta a SQL Server para leer el stock real (asumiendo que son conos).
+    Lee el stock real (asumiendo que son conos) con la consulta y el pool de conexiones
+    compartidos (Descarga_Stock / sql_extract).
     Guarda un CSV en STOCK_DATA_PATH con col ["Product_Code", "Stock"].
     """
-    import pyodbc
-
-    QUERY = """
-    SELECT 
-        KOPR AS 'Product_Code', 
-        STFI1 AS 'Stock'
-    FROM MAEPR
-    WHERE RUPR IN ('R10','R20') 
-      AND TIPR = 'FPN'
-    """
+    from demand_forecasting_project.src.Descarga_Stock import get_stock_data
 
-    try:
-        connection = pyodbc.connect(
-            f"DRIVER={{SQL Server}};"
-            f"SERVER={SERVER};DATABASE={DATABASE};UID={USERNAME};PWD={PASSWORD}"
-        )
-        print("[step_get_stock] Conexión a SQL Server exitosa.")
-        df_stock = pd.read_sql_query(QUERY, connection)
-        connection.close()
-
-        # Guardamos en CSV
-        os.makedirs(os.path.dirname(STOCK_DATA_PATH), exist_ok=True)
-        df_stock.to_csv(STOCK_DATA_PATH, index=False)
-        print(f"[step_get_stock] Stock data guardada en: {STOCK_DATA_PATH}")
+    df_stock = get_stock_data()
+    if df_stock is None:
+        print("[step_get_stock] No se pudo obtener el stock desde SQL Server.")
+        return
 
-    except Exception as e:
-        print(f"[step_get_stock] Error al conectarse a SQL o ejecutar la consulta: {e}")
+    # Guardamos en CSV
+    os.makedirs(os.path.dirname(STOCK_DATA_PATH), exist_ok=True)
+    df_stock.to_csv(STOCK_DATA_PATH, index=False)
+    print(f"[step_get_stock] Stock data guardada en: {STOCK_DATA_PATH}")
 pass
 # ------------------------------------------------------------------------------
 # 2) step_consolidate_forecasts
@@ -132,7 +123,7 @@ pass
 # ------------------------------------------------------------------------------
 # 3) step_run_model (genera archivos intermedios y, luego, usaremos la 4 para unificar)
 # ------------------------------------------------------------------------------
-def step_run_model():
+def step_run_model(export_legacy_csv_files=False):
     """
     1) Lee stock_data (conos) => STOCK_DATA_PATH
     2) Lee forecast_data => CONSOLIDATED_FORECAST_PATH
@@ -140,7 +131,9 @@ def step_run_model():
     4) Combina y produce un DF con, al menos:
        [Product_Code, Stock (ovillos?), Stock_Cones, Stock_Total,
         Forecast_Product, Month, Familia, SuperFamily, ...]
-    5) Genera archivos *_details.csv en subcarpetas de ./Results/<SuperFamily>/<Familia>/
+    5) Guarda el flujo en RESULTS_DATASET_DIR (Parquet particionado por SuperFamily/Familia).
+       Si export_legacy_csv_files=True, genera además los *_details.csv en
+       ./Results/<SuperFamily>/<Familia>/
     """
 
     # 1) Leer stock_data (conos)
@@ -177,10 +170,10 @@ def step_run_model():
     ).rename(columns={'Stock': 'Ovillo_Stock'})
 
     # Calcular el Stock_total
-    merged_data['Stock_total'] = merged_data['Cono_Stock'].fillna(0) + merged_data['Ovillo_Stock'].fillna(0)
+    merged_data['Stock_Total'] = merged_data['Cono_Stock'].fillna(0) + merged_data['Ovillo_Stock'].fillna(0)
 
     # Seleccionar las columnas relevantes para el resultado final
-    final_data = merged_data[['Ovillo_Code', 'Cono_Stock', 'Ovillo_Stock', 'Stock_total']]
+    final_data = merged_data[['Ovillo_Code', 'Cono_Stock', 'Ovillo_Stock', 'Stock_Total']]
     final_data.rename(columns={"Ovillo_Code": "Product_Code"}, inplace=True)
     # Hacemos un merge base: forecast con stock_ovillos
     # OJO: asumiendo que df_stock_raw son conos => si stock_data.csv está en conos,
@@ -206,127 +199,58 @@ def step_run_model():
     # (Opcional) rename a "Total_Projection"
     df_combined["Total_Projection"] = df_combined["Forecast_Product"]
 
-    # Para simular el flujo de stock (Stock_Flow):
-    def calculate_stock_flow(data):
-        stock_flow = []
-        # Partimos del stock inicial (primera fila)
-        available_stock = data["Stock_Total"].iloc[0]
-
-        for projection in data["Total_Projection"]:
-            available_stock -= projection
-            stock_flow.append(available_stock)
-
-        return stock_flow
-
     # Creamos la carpeta Results para ir guardando subcarpetas
     os.makedirs(RESULTS_DIR, exist_ok=True)
 
     # Debugear: ver columnas finales
     print("[DEBUG] Columnas en df_combined:", df_combined.columns.tolist())
 
-    # Recorremos SuperFamily
     if "SuperFamily" not in df_combined.columns:
         print("[step_run_model] WARNING: No existe la columna 'SuperFamily'. Se creará con 'UndefinedSF'.")
         df_combined["SuperFamily"] = "UndefinedSF"
 
-    for super_familia in df_combined["SuperFamily"].unique():
-        df_sf = df_combined[df_combined["SuperFamily"] == super_familia]
-
-        super_familia_path = os.path.join(RESULTS_DIR, super_familia)
-        os.makedirs(super_familia_path, exist_ok=True)
-
-        # Asegurarnos de que exista "Familia"
-        if "Familia" not in df_sf.columns:
-            print(f"[step_run_model] WARNING: No existe columna 'Familia' en {super_familia}. Creando una ficticia.")
-            df_sf["Familia"] = "Desconocida"
-
-        # Recorremos Familia
-        for familia in df_sf["Familia"].unique():
-            df_fam = df_sf[df_sf["Familia"] == familia]
-
-            familia_path = os.path.join(super_familia_path, familia)
-            os.makedirs(familia_path, exist_ok=True)
-
-            # Recorremos Product_Code
-            for product_code in df_fam["Product_Code"].unique():
-                df_prod = df_fam[df_fam["Product_Code"] == product_code]
+    # Asegurarnos de que exista "Familia"
+    if "Familia" not in df_combined.columns:
+        print("[step_run_model] WARNING: No existe columna 'Familia'. Creando una ficticia.")
+        df_combined["Familia"] = "Desconocida"
 
+    # Flujo de stock (Stock_Flow) de todos los productos en una sola pasada
+    df_flow = compute_stock_flow(df_combined)
+    print(f"[step_run_model] Flujo de stock calculado: {len(df_flow)} filas.")
 
-                # Agrupamos por Month
-                df_prod_monthly = df_prod.groupby("Month").agg({
-                    "Total_Projection":"sum",
-                    "Cono_Stock":"sum",
-                    "Ovillo_Stock":"sum",
-                    "Stock_Total":"sum"
-                }).reset_index()
+    # Un solo dataset Parquet particionado por SuperFamily/Familia
+    write_results(df_flow, RESULTS_DATASET_DIR)
 
-                # Calculamos el flujo
-                df_prod_monthly["Stock_Flow"] = calculate_stock_flow(df_prod_monthly)
+    # (Opcional) exportación antigua: ./Results/<SuperFamily>/<Familia>/<Product_Code>_details.csv
+    if export_legacy_csv_files:
+        export_legacy_csv(split_by_product(df_flow), RESULTS_DIR)
 
-                # Guardamos
-                product_file = os.path.join(familia_path, f"{product_code}_details.csv")
-                df_prod_monthly.to_csv(product_file, index=False)
+    return df_flow
 pass
 # ------------------------------------------------------------------------------
-# 4) step_consolidate_results: Unir *_details.csv en un CSV final
+# 4) step_consolidate_results: Unir resultados en un CSV final
 # ------------------------------------------------------------------------------
 def step_consolidate_results():
-    root_folder = "Results"  # Cambia esto por la ruta local de tus archivos
-
-    # Crear una lista para almacenar los DataFrames
-    normalized_data = []
-
-    # Iterar sobre las carpetas y archivos
-    for root, dirs, files in os.walk(root_folder):
-        for file in files:
-            if file.endswith('_details.csv'):
-                # Ruta completa del archivo
-                file_path = os.path.join(root, file)
-            
-                try:
-                    # Leer archivo
-                    df = pd.read_csv(file_path)
-                
-                    # Renombrar columnas para normalización
-                    df.rename(columns={
-                        'Month':'Fecha',
-                        'Total_Projection':'Projection',
-                        'Stock_Total': 'Stock Total',
-                        'Stock_Flow': 'Stock_Flow'
-                    }, inplace=True)
-                
-                    # Extraer información de la estructura de carpetas
-                    path_parts = root.split(os.sep)
-                    super_familia = path_parts[-2]  # Nivel de "Invierno/Verano"
-                    familia = path_parts[-1]       # Nombre de la familia
-                    codigo_producto = file.split('_')[0]  # Código del producto
-                
-                    # Agregar columnas adicionales
-                    df['Super Familia'] = super_familia
-                    df['Familia'] = familia
-                    df['Codigo Producto'] = codigo_producto
-                
-                    # Filtrar columnas relevantes
-                    columns_to_keep = ['Fecha', 'Super Familia', 'Familia', 'Codigo Producto', 
-                                      'Projection','Cono_Stock','Ovillo_Stock', 'Stock Total', 'Stock_Flow']
-                    normalized_df = df[[col for col in columns_to_keep if col in df.columns]]
-                
-                    # Agregar a la lista de datos consolidados
-                    normalized_data.append(normalized_df)
-                except Exception as e:
-                    print(f"Error procesando el archivo {file_path}: {e}")
-
-    # Consolidar los datos
-    if normalized_data:
-        consolidated_df = pd.concat(normalized_data, ignore_index=True)
-    
-        # Exportar a un archivo CSV consolidado
-        output_path = "Stock_Optimization/Results/stock_unificado.csv"  # Cambia el nombre y la ubicación según lo necesites
-        consolidated_df.to_csv(output_path, index=False)
-        print(f"Archivo consolidado generado en: {output_path}")
-    else:
+    """
+    Lee el dataset de resultados (RESULTS_DATASET_DIR) en una sola pasada y lo
+    exporta normalizado a STOCK_UNIFICADO_PATH.
+    """
+    if not os.path.exists(RESULTS_DATASET_DIR):
+        print(f"[step_consolidate_results] No existe el dataset {RESULTS_DATASET_DIR}. Ejecuta step_run_model primero.")
+        return
+
+    try:
+        consolidated_df = consolidate_results(RESULTS_DATASET_DIR)
+    except Exception as e:
+        print(f"[step_consolidate_results] Error leyendo el dataset de resultados: {e}")
+        return
+
+    if consolidated_df.empty:
         print("No se encontraron datos para consolidar.")
-        pass
+        return
+
+    write_artifact(consolidated_df, STOCK_UNIFICADO_PATH, 'stock_unificado')
+    print(f"Archivo consolidado generado en: {STOCK_UNIFICADO_PATH}")
     # ------------------------------------------------------------------------------
     # 5) run_pipeline
 # ------------------------------------------------------------------------------
@@ -334,8 +258,8 @@ def run_pipeline():
     print("=== EJECUTANDO PIPELINE ===")
     step_get_stock()               # 1) Extraer stock real de DB (conos)
     step_consolidate_forecasts()   # 2) Unir proyecciones
-    step_run_model()               # 3) Combinar todo y generar archivos intermedios
-    step_consolidate_results()     # 4) Unir los *_details.csv en stock_unificado.csv
+    step_run_model()               # 3) Combinar todo y guardar el dataset de resultados
+    step_consolidate_results()     # 4) Unir el dataset de resultados en stock_unificado.csv
     print("=== PIPELINE COMPLETADA ===")
 
 
@@ -0,0 +1,94 @@
+"""
+results_store.py
+----------------
+
+Almacén columnar de los resultados de step_run_model.
+
+En vez de escribir un *_details.csv por producto en Results/<SuperFamily>/<Familia>/,
+el flujo de stock completo se guarda como un único dataset Parquet particionado por
+SuperFamily/Familia. La consolidación (stock_unificado.csv) pasa a ser una sola lectura
+del dataset en lugar de recorrer el árbol de carpetas con os.walk.
+
+La exportación por producto en CSV se mantiene como opción (export_legacy_csv) para
+quien todavía consuma los archivos antiguos.
+"""
+
+import os
+import shutil
+
+import pandas as pd
+
+PARTITION_COLS = ["SuperFamily", "Familia"]
+
+# Renombre al formato de stock_unificado.csv (el que lee el dashboard)
+CONSOLIDATED_COLUMNS = {
+    "Month": "Fecha",
+    "SuperFamily": "Super Familia",
+    "Familia": "Familia",
+    "Product_Code": "Codigo Producto",
+    "Total_Projection": "Projection",
+    "Cono_Stock": "Cono_Stock",
+    "Ovillo_Stock": "Ovillo_Stock",
+    "Stock_Total": "Stock Total",
+    "Stock_Flow": "Stock_Flow",
+}
+
+
+def write_results(df_flow, dataset_dir):
+    """
+    Escribe el flujo de stock como dataset Parquet particionado por SuperFamily/Familia.
+    Reemplaza por completo el dataset anterior.
+    """
+    tmp_dir = f"{dataset_dir}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+    df_flow.to_parquet(tmp_dir, partition_cols=PARTITION_COLS, index=False)
+
+    # Se escribe primero en una carpeta temporal para no dejar un dataset a medias
+    if os.path.exists(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    os.replace(tmp_dir, dataset_dir)
+    print(f"[results_store] Dataset de resultados guardado en: {dataset_dir}")
+
+
+def read_results(dataset_dir, columns=None, filters=None):
+    """
+    Lee el dataset de resultados (opcionalmente sólo algunas columnas/particiones).
+
+    Args:
+        columns (list): columnas a leer (None = todas)
+        filters (list): filtros de pyarrow, p.ej. [("SuperFamily", "==", "Invierno")]
+    """
+    df = pd.read_parquet(dataset_dir, columns=columns, filters=filters)
+
+    # Las columnas de partición vuelven como categóricas; se dejan como texto
+    for col in PARTITION_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df
+
+
+def consolidate_results(dataset_dir):
+    """Lee el dataset completo en una pasada y lo normaliza al formato de stock_unificado.csv."""
+    df = read_results(dataset_dir)
+    df = df.rename(columns=CONSOLIDATED_COLUMNS)
+    columns_to_keep = [col for col in CONSOLIDATED_COLUMNS.values() if col in df.columns]
+    return df[columns_to_keep]
+
+
+def export_legacy_csv(product_tables, results_dir):
+    """
+    Exportación antigua: un <Product_Code>_details.csv por producto en
+    results_dir/<SuperFamily>/<Familia>/.
+
+    Args:
+        product_tables (dict): salida de stock_flow.split_by_product
+    """
+    for (super_familia, familia, product_code), df_prod_monthly in product_tables.items():
+        familia_path = os.path.join(results_dir, super_familia, familia)
+        os.makedirs(familia_path, exist_ok=True)
+
+        product_file = os.path.join(familia_path, f"{product_code}_details.csv")
+        df_prod_monthly.to_csv(product_file, index=False)
+    print(f"[results_store] Exportados {len(product_tables)} archivos *_details.csv en: {results_dir}")